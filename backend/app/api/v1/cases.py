@@ -1,12 +1,18 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, func, desc, select, tuple_
 from typing import List, Optional
 import logging
 from datetime import datetime, timedelta
 
-from app.core.database import get_db
+from app.config import settings
+from app.core.database import get_async_db
 from app.models import Case, User, Lawyer
+from app.services.case_search import apply_case_search
+from app.utils.pagination import decode_cursor, encode_cursor, estimate_count
+from app.services.case_stats import (
+    case_stats_key, compute_case_stats, compute_case_stats_from_rollup, record_case_change
+)
 from app.schemas.case import (
     CaseCreate, CaseUpdate, CaseResponse, CaseListResponse,
     CaseFilter, CaseStats, CaseStatus, CasePriority, CaseType
@@ -25,7 +31,7 @@ def generate_case_number() -> str:
 @router.post("/", response_model=CaseResponse)
 async def create_case(
     case_data: CaseCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new case"""
     try:
@@ -39,8 +45,8 @@ async def create_case(
                 email=f"temp_{datetime.now().timestamp()}@temp.local"
             )
             db.add(client)
-            db.commit()
-            db.refresh(client)
+            await db.commit()
+            await db.refresh(client)
             client_id = client.id
         else:
             client_id = case_data.client_id
@@ -60,24 +66,26 @@ async def create_case(
         )
 
         db.add(db_case)
-        db.commit()
-        db.refresh(db_case)
+        await db.flush()
+        await db.refresh(db_case)
+        await record_case_change(db, None, case_stats_key(db_case))
+        await db.commit()
 
         logger.info(f"Created case {db_case.case_number} for client {client_id}")
         return db_case
 
     except Exception as e:
         logger.error(f"Error creating case: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to create case")
 
 @router.get("/{case_id}", response_model=CaseResponse)
 async def get_case(
     case_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific case by ID"""
-    case = db.query(Case).filter(Case.id == case_id).first()
+    case = await db.get(Case, case_id)
     if not case:
         raise HTTPException(status_code=404, detail="Case not found")
 
@@ -87,53 +95,98 @@ async def get_case(
 async def list_cases(
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    count: str = Query("none", regex="^(none|estimate|exact)$"),
     status: Optional[CaseStatus] = None,
     priority: Optional[CasePriority] = None,
     case_type: Optional[CaseType] = None,
     lawyer_id: Optional[int] = None,
     client_id: Optional[int] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List cases with filtering and pagination"""
+    """
+    List cases with filtering and pagination, newest first.
+    Follow next_cursor for constant-cost paging; page is still honoured
+    without a cursor but uses OFFSET. The total is skipped unless asked
+    for with count=estimate (planner estimate) or count=exact.
+    """
+    try:
+        after = decode_cursor(cursor)
+        if after is not None:
+            if not isinstance(after.get("created_at"), datetime):
+                raise ValueError("cursor has no created_at")
+            if not isinstance(after.get("id"), int) or isinstance(after["id"], bool):
+                raise ValueError("cursor has no id")
+            if search and search.strip():
+                if not isinstance(after.get("rank"), (int, float)) or isinstance(after["rank"], bool):
+                    raise ValueError("cursor has no rank")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
     try:
         # Build query
-        query = db.query(Case)
+        query = select(Case)
 
         # Apply filters
         if status:
-            query = query.filter(Case.status == status)
+            query = query.where(Case.status == status)
         if priority:
-            query = query.filter(Case.priority == priority)
+            query = query.where(Case.priority == priority)
         if case_type:
-            query = query.filter(Case.case_type == case_type.value)
+            query = query.where(Case.case_type == case_type.value)
         if lawyer_id:
-            query = query.filter(Case.lawyer_id == lawyer_id)
+            query = query.where(Case.lawyer_id == lawyer_id)
         if client_id:
-            query = query.filter(Case.client_id == client_id)
-
-        # Apply search
-        if search:
-            search_filter = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Case.title.ilike(search_filter),
-                    Case.description.ilike(search_filter),
-                    Case.case_number.ilike(search_filter)
-                )
-            )
-
-        # Get total count
-        total = query.count()
-
-        # Apply pagination and ordering
-        cases = query.order_by(desc(Case.created_at)).offset((page - 1) * size).limit(size).all()
+            query = query.where(Case.client_id == client_id)
+
+        # Apply search; matches are ranked, so the rank leads the sort key
+        rank = None
+        if search and search.strip():
+            query, rank = apply_case_search(query, search, db.bind.dialect.name)
+            query = query.add_columns(rank.label("rank"))
+
+        # Get total count, only if asked for
+        total = None
+        total_is_estimate = False
+        if count == "estimate":
+            total = await estimate_count(db, query)
+            total_is_estimate = total is not None
+        if count == "exact" or (count == "estimate" and total is None):
+            total = await db.scalar(select(func.count()).select_from(query.subquery()))
+
+        # Apply pagination and ordering; (created_at, id) is unique so pages never overlap
+        sort_key = [Case.created_at, Case.id]
+        if rank is not None:
+            sort_key.insert(0, rank)
+        query = query.order_by(*(desc(column) for column in sort_key))
+        if after:
+            cursor_key = [after["created_at"], after["id"]]
+            if rank is not None:
+                cursor_key.insert(0, after["rank"])
+            query = query.where(tuple_(*sort_key) < tuple_(*cursor_key))
+        elif page > 1:
+            query = query.offset((page - 1) * size)
+
+        # Fetch one extra row to know whether there is a next page
+        rows = (await db.execute(query.limit(size + 1))).all()
+        next_cursor = None
+        if len(rows) > size:
+            rows = rows[:size]
+            last = rows[-1]
+            position = {"created_at": last[0].created_at, "id": last[0].id}
+            if rank is not None:
+                position["rank"] = last.rank
+            next_cursor = encode_cursor(position)
+        cases = [row[0] for row in rows]
 
         return CaseListResponse(
             cases=cases,
             total=total,
+            total_is_estimate=total_is_estimate,
             page=page,
-            size=size
+            size=size,
+            next_cursor=next_cursor
         )
 
     except Exception as e:
@@ -144,14 +197,17 @@ async def list_cases(
 async def update_case(
     case_id: int,
     case_update: CaseUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an existing case"""
     try:
-        case = db.query(Case).filter(Case.id == case_id).first()
+        case = await db.get(Case, case_id)
         if not case:
             raise HTTPException(status_code=404, detail="Case not found")
 
+        before = case_stats_key(case)
+        was_closed = case.status is not None and case.status.value == CaseStatus.CLOSED.value
+
         # Update fields
         update_data = case_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
@@ -162,11 +218,12 @@ async def update_case(
         case.updated_at = datetime.utcnow()
 
         # If status is being set to closed, set closed_at
-        if case_update.status == CaseStatus.CLOSED and case.status != CaseStatus.CLOSED:
+        if case_update.status == CaseStatus.CLOSED and not was_closed:
             case.closed_at = datetime.utcnow()
 
-        db.commit()
-        db.refresh(case)
+        await record_case_change(db, before, case_stats_key(case))
+        await db.commit()
+        await db.refresh(case)
 
         logger.info(f"Updated case {case.case_number}")
         return case
@@ -175,25 +232,27 @@ async def update_case(
         raise
     except Exception as e:
         logger.error(f"Error updating case: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to update case")
 
 @router.delete("/{case_id}")
 async def delete_case(
     case_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a case (soft delete by changing status)"""
     try:
-        case = db.query(Case).filter(Case.id == case_id).first()
+        case = await db.get(Case, case_id)
         if not case:
             raise HTTPException(status_code=404, detail="Case not found")
 
         # Soft delete by changing status
+        before = case_stats_key(case)
         case.status = CaseStatus.CANCELLED
         case.updated_at = datetime.utcnow()
 
-        db.commit()
+        await record_case_change(db, before, case_stats_key(case))
+        await db.commit()
 
         logger.info(f"Deleted case {case.case_number}")
         return {"message": "Case deleted successfully"}
@@ -202,13 +261,13 @@ async def delete_case(
         raise
     except Exception as e:
         logger.error(f"Error deleting case: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to delete case")
 
 @router.get("/stats/summary", response_model=CaseStats)
 async def get_case_stats(
     days: int = Query(30, ge=1, le=365),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get case statistics for the specified period"""
     try:
@@ -216,57 +275,9 @@ async def get_case_stats(
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
 
-        # Base query for the period
-        base_query = db.query(Case).filter(Case.created_at >= start_date)
-
-        # Basic counts
-        total_cases = base_query.count()
-        new_cases = base_query.filter(Case.status == CaseStatus.NEW).count()
-        in_progress_cases = base_query.filter(Case.status == CaseStatus.IN_PROGRESS).count()
-        closed_cases = base_query.filter(Case.status == CaseStatus.CLOSED).count()
-        cancelled_cases = base_query.filter(Case.status == CaseStatus.CANCELLED).count()
-
-        # Cases by type
-        cases_by_type = {}
-        for case_type in CaseType:
-            count = base_query.filter(Case.case_type == case_type.value).count()
-            if count > 0:
-                cases_by_type[case_type.value] = count
-
-        # Cases by priority
-        cases_by_priority = {}
-        for priority in CasePriority:
-            count = base_query.filter(Case.priority == priority).count()
-            if count > 0:
-                cases_by_priority[priority.value] = count
-
-        # Average resolution time (for closed cases in the period)
-        closed_cases_query = db.query(Case).filter(
-            Case.status == CaseStatus.CLOSED,
-            Case.closed_at >= start_date,
-            Case.created_at >= start_date
-        )
-
-        resolution_times = []
-        for case in closed_cases_query.all():
-            if case.closed_at and case.created_at:
-                days = (case.closed_at - case.created_at).days
-                resolution_times.append(days)
-
-        average_resolution_time = None
-        if resolution_times:
-            average_resolution_time = sum(resolution_times) / len(resolution_times)
-
-        return CaseStats(
-            total_cases=total_cases,
-            new_cases=new_cases,
-            in_progress_cases=in_progress_cases,
-            closed_cases=closed_cases,
-            cancelled_cases=cancelled_cases,
-            cases_by_type=cases_by_type,
-            cases_by_priority=cases_by_priority,
-            average_resolution_time=average_resolution_time
-        )
+        if settings.case_stats_rollup:
+            return await compute_case_stats_from_rollup(db, start_date)
+        return await compute_case_stats(db, start_date)
 
     except Exception as e:
         logger.error(f"Error getting case stats: {e}")
@@ -276,17 +287,17 @@ async def get_case_stats(
 async def assign_case_to_lawyer(
     case_id: int,
     lawyer_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Assign a case to a lawyer"""
     try:
         # Verify case exists
-        case = db.query(Case).filter(Case.id == case_id).first()
+        case = await db.get(Case, case_id)
         if not case:
             raise HTTPException(status_code=404, detail="Case not found")
 
         # Verify lawyer exists and is available
-        lawyer = db.query(Lawyer).filter(Lawyer.id == lawyer_id).first()
+        lawyer = await db.get(Lawyer, lawyer_id)
         if not lawyer:
             raise HTTPException(status_code=404, detail="Lawyer not found")
 
@@ -294,6 +305,7 @@ async def assign_case_to_lawyer(
             raise HTTPException(status_code=400, detail="Lawyer is not available")
 
         # Assign the case
+        before = case_stats_key(case)
         case.lawyer_id = lawyer_id
         case.status = CaseStatus.IN_PROGRESS
         case.updated_at = datetime.utcnow()
@@ -301,7 +313,8 @@ async def assign_case_to_lawyer(
         # Update lawyer's case count
         lawyer.total_cases += 1
 
-        db.commit()
+        await record_case_change(db, before, case_stats_key(case))
+        await db.commit()
 
         logger.info(f"Assigned case {case.case_number} to lawyer {lawyer_id}")
         return {"message": "Case assigned successfully"}
@@ -310,5 +323,5 @@ async def assign_case_to_lawyer(
         raise
     except Exception as e:
         logger.error(f"Error assigning case: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to assign case")
\ No newline at end of file
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, HTTPException, Request, Depends
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
 from app.schemas.whatsapp import WhatsAppWebhookPayload, WebhookPayload, WhatsAppWebhookVerification
-from app.services.whatsapp.conversation_manager import ConversationManager
-from app.models import Conversation, Message, User
+from app.services.whatsapp.message_handler import handle_incoming_messages
+from app.services.whatsapp.event_queue import get_event_queue
 from app.core.supabase import supabase
+import asyncio
 import logging
 import hmac
 import hashlib
@@ -38,69 +39,11 @@ async def verify_webhook_signature(request: Request, body: bytes) -> bool:
         logger.error(f"Signature verification error: {e}")
         return False
 
-async def handle_incoming_message(payload: WebhookPayload, db: Session):
-    """Handle incoming WhatsApp message"""
-    try:
-        # Create or get user
-        user = db.query(User).filter(User.phone == payload.phone).first()
-        if not user:
-            user = User(
-                phone=payload.phone,
-                full_name=f"WhatsApp User {payload.phone}",
-                email=f"whatsapp_{payload.phone}@temp.local"
-            )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
-
-        # Create or get conversation
-        conversation = db.query(Conversation).filter(
-            Conversation.phone_number == payload.phone,
-            Conversation.status.in_(["new", "in_progress"])
-        ).first()
-
-        if not conversation:
-            conversation = Conversation(
-                client_id=user.id,
-                phone_number=payload.phone,
-                status="new",
-                language="en"  # Will be updated by language detector
-            )
-            db.add(conversation)
-            db.commit()
-            db.refresh(conversation)
-
-        # Create message record
-        message = Message(
-            conversation_id=conversation.id,
-            message_type=payload.message_type,
-            content=payload.text,
-            whatsapp_message_id=payload.whatsapp_message_id,
-            is_from_user=True
-        )
-        db.add(message)
-        db.commit()
-
-        # Initialize conversation manager and handle the message
-        manager = ConversationManager(payload.phone)
-        await manager.handle_message(payload.text or "", {})
-
-        # Update conversation status
-        conversation.status = "in_progress"
-        db.commit()
-
-        logger.info(f"Processed message from {payload.phone}: {payload.text[:50]}...")
-
-    except Exception as e:
-        logger.error(f"Error handling incoming message: {e}")
-        db.rollback()
-        raise
-
 @router.post("/whatsapp")
 async def whatsapp_webhook(
     request: Request,
     payload: WhatsAppWebhookPayload,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Handle incoming WhatsApp webhooks.
@@ -112,20 +55,30 @@ async def whatsapp_webhook(
         if not await verify_webhook_signature(request, body):
             raise HTTPException(status_code=401, detail="Invalid signature")
 
-        # Process the webhook payload
-        message = payload.get_first_message()
-        if not message:
+        # Fast-ack mode: hand the raw event to the workers and return immediately
+        # so Meta does not time out and redeliver while we process
+        if settings.webhook_processing_mode == "queue":
+            try:
+                await get_event_queue().enqueue(payload.dict(by_alias=True))
+            except asyncio.QueueFull:
+                # Backpressure: Meta retries non-2xx responses later
+                logger.warning("Webhook queue full, asking Meta to retry")
+                raise HTTPException(status_code=503, detail="Webhook queue full")
+            return {"status": "ok", "message": "Message queued for processing"}
+
+        # Convert every message in the (possibly batched) payload to internal format
+        webhook_payloads = WebhookPayload.list_from_whatsapp_webhook(payload)
+        if not webhook_payloads:
             logger.info("No message found in webhook payload")
             return {"status": "ok", "message": "No message to process"}
 
-        # Convert to internal payload format
-        webhook_payload = WebhookPayload.from_whatsapp_webhook(payload)
-
-        # Handle the message
-        await handle_incoming_message(webhook_payload, db)
+        # Handle the messages
+        await handle_incoming_messages(webhook_payloads, db)
 
-        return {"status": "ok", "message": "Message processed successfully"}
+        return {"status": "ok", "message": f"Processed {len(webhook_payloads)} message(s) successfully"}
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Webhook processing error: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -13,10 +13,40 @@ class Settings(BaseSettings):
     meta_phone_number_id: str = Field(..., env="META_PHONE_NUMBER_ID")
     meta_verify_token: str = Field(..., env="META_VERIFY_TOKEN")
     meta_webhook_secret: str = Field(..., env="META_WEBHOOK_SECRET")
+    meta_api_base_url: str = Field(default="https://graph.facebook.com/v18.0", env="META_API_BASE_URL")
+    meta_messages_per_second: float = Field(default=80, env="META_MESSAGES_PER_SECOND")  # throughput tier of the sending number
+    meta_max_connections: int = Field(default=100, env="META_MAX_CONNECTIONS")
+    meta_send_max_retries: int = Field(default=4, env="META_SEND_MAX_RETRIES")  # retries on 429, 5xx and network errors
+    meta_send_timeout: float = Field(default=10.0, env="META_SEND_TIMEOUT")  # seconds
 
     # AI Services Configuration
     openai_api_key: str = Field(..., env="OPENAI_API_KEY")
     huggingface_token: str = Field(..., env="HUGGINGFACE_TOKEN")
+    language_cache_size: int = Field(default=10000, env="LANGUAGE_CACHE_SIZE")  # detected languages kept in memory
+    language_model_path: str = Field(default="", env="LANGUAGE_MODEL_PATH")  # n-gram model file, empty for the bundled one
+    llm_backend: str = Field(default="openai", env="LLM_BACKEND")  # openai, or fake for tests and benchmarks
+    llm_model: str = Field(default="gpt-3.5-turbo", env="LLM_MODEL")
+    llm_max_concurrency: int = Field(default=16, env="LLM_MAX_CONCURRENCY")  # provider calls in flight per process
+    llm_feature_concurrency: dict = Field(default={"summarizer": 8, "entity_extractor": 8, "translator": 4, "language_detector": 4}, env="LLM_FEATURE_CONCURRENCY")  # per-feature caps within the global one
+    llm_cache_size: int = Field(default=10000, env="LLM_CACHE_SIZE")  # responses kept in memory
+    llm_cache_ttl: float = Field(default=24 * 60 * 60, env="LLM_CACHE_TTL")  # seconds
+    llm_fake_latency: float = Field(default=0.0, env="LLM_FAKE_LATENCY")  # seconds per call for the fake backend
+    llm_timeout: float = Field(default=30.0, env="LLM_TIMEOUT")  # seconds per call, including queueing
+    llm_feature_timeouts: dict = Field(default={"language_detector": 2.0, "translator": 5.0}, env="LLM_FEATURE_TIMEOUTS")  # tighter deadlines on the reply path
+    llm_hedge_features: list = Field(default=["language_detector", "translator"], env="LLM_HEDGE_FEATURES")  # features that send a second request when the first is slow
+    llm_hedge_quantile: float = Field(default=0.95, env="LLM_HEDGE_QUANTILE")  # hedge once a call runs past this latency percentile
+    llm_breaker_failure_rate: float = Field(default=0.5, env="LLM_BREAKER_FAILURE_RATE")  # share of recent calls failing that opens the breaker
+    llm_breaker_min_calls: int = Field(default=20, env="LLM_BREAKER_MIN_CALLS")
+    llm_breaker_cooldown: float = Field(default=30.0, env="LLM_BREAKER_COOLDOWN")  # seconds before a probe call is let through
+    summary_chunk_tokens: int = Field(default=3000, env="SUMMARY_CHUNK_TOKENS")  # document text per chunk summary call
+    summary_reduce_tokens: int = Field(default=3000, env="SUMMARY_REDUCE_TOKENS")  # chunk summaries combined per reduce call
+    summary_concurrency: int = Field(default=4, env="SUMMARY_CONCURRENCY")  # chunk summary calls in flight per document
+    summary_cache_backend: str = Field(default="memory", env="SUMMARY_CACHE_BACKEND")  # memory or redis
+    summary_cache_size: int = Field(default=10000, env="SUMMARY_CACHE_SIZE")  # chunk summaries kept by the memory backend
+    summary_cache_ttl: int = Field(default=7 * 24 * 60 * 60, env="SUMMARY_CACHE_TTL")  # seconds
+    entity_llm_fields: list = Field(default=["parties", "courts", "case_numbers"], env="ENTITY_LLM_FIELDS")  # fields the LLM may fill in
+    entity_llm_threshold: float = Field(default=0.75, env="ENTITY_LLM_THRESHOLD")  # ask the LLM when rules are less confident than this
+    legal_gazetteer_path: str = Field(default="", env="LEGAL_GAZETTEER_PATH")  # courts/acts/police stations JSON, empty for the bundled one
 
     # Storage Configuration (AWS S3)
     aws_access_key_id: str = Field(..., env="AWS_ACCESS_KEY_ID")
@@ -43,6 +73,27 @@ class Settings(BaseSettings):
     # Redis Configuration
     redis_url: str = Field(default="redis://localhost:6379", env="REDIS_URL")
 
+    # Conversation State Configuration
+    conversation_state_backend: str = Field(default="memory", env="CONVERSATION_STATE_BACKEND")  # memory or redis
+    conversation_state_ttl: int = Field(default=7 * 24 * 60 * 60, env="CONVERSATION_STATE_TTL")  # seconds idle before expiry
+    conversation_state_max_entries: int = Field(default=10000, env="CONVERSATION_STATE_MAX_ENTRIES")  # in-memory LRU size
+    message_catalog_dir: str = Field(default="", env="MESSAGE_CATALOG_DIR")  # locale JSON files, empty for the bundled ones
+    message_catalog_reload_interval: float = Field(default=0, env="MESSAGE_CATALOG_RELOAD_INTERVAL")  # seconds between file checks, 0 disables
+
+    # Webhook Processing Configuration
+    webhook_processing_mode: str = Field(default="inline", env="WEBHOOK_PROCESSING_MODE")  # inline or queue
+    webhook_queue_backend: str = Field(default="memory", env="WEBHOOK_QUEUE_BACKEND")  # memory or celery
+    webhook_queue_workers: int = Field(default=1, env="WEBHOOK_QUEUE_WORKERS")
+    webhook_queue_max_size: int = Field(default=10000, env="WEBHOOK_QUEUE_MAX_SIZE")
+    conversation_shards: int = Field(default=8, env="CONVERSATION_SHARDS")  # parallel conversations per process
+    conversation_shard_queue_size: int = Field(default=100, env="CONVERSATION_SHARD_QUEUE_SIZE")
+    message_dedup_backend: str = Field(default="memory", env="MESSAGE_DEDUP_BACKEND")  # memory or redis
+    message_dedup_ttl: int = Field(default=24 * 60 * 60, env="MESSAGE_DEDUP_TTL")  # seconds
+    message_dedup_max_entries: int = Field(default=100000, env="MESSAGE_DEDUP_MAX_ENTRIES")
+
+    # Case Statistics Configuration
+    case_stats_rollup: bool = Field(default=False, env="CASE_STATS_ROLLUP")  # serve stats from case_daily_stats
+
     # Frontend URLs
     frontend_url: str = Field(default="http://localhost:3000", env="FRONTEND_URL")
 
@@ -55,6 +106,21 @@ class Settings(BaseSettings):
     max_file_size: int = Field(default=10 * 1024 * 1024)  # 10MB
     allowed_extensions: list = Field(default=[".pdf", ".doc", ".docx", ".jpg", ".jpeg", ".png"])
 
+    # Document Processing Configuration
+    document_process_workers: int = Field(default=0, env="DOCUMENT_PROCESS_WORKERS")  # extraction processes, 0 for one per CPU
+    document_max_pages: int = Field(default=0, env="DOCUMENT_MAX_PAGES")  # pages read per PDF, 0 for all
+    document_ai_concurrency: int = Field(default=8, env="DOCUMENT_AI_CONCURRENCY")  # summarize/entity calls in flight per process
+    document_cache_backend: str = Field(default="disk", env="DOCUMENT_CACHE_BACKEND")  # disk, postgres or none
+    document_cache_dir: str = Field(default="/tmp/legal-intake-document-cache", env="DOCUMENT_CACHE_DIR")
+    document_cache_max_bytes: int = Field(default=1024 * 1024 * 1024, env="DOCUMENT_CACHE_MAX_BYTES")  # evicts least recently used beyond this
+    near_duplicate_threshold: float = Field(default=0.95, env="NEAR_DUPLICATE_THRESHOLD")  # MinHash similarity to reuse results, 0 disables
+    document_model_version: str = Field(default="1", env="DOCUMENT_MODEL_VERSION")  # bump when summary/entity models change
+    ocr_languages: str = Field(default="eng+hin", env="OCR_LANGUAGES")  # Tesseract language packs
+    tesseract_cmd: str = Field(default="", env="TESSERACT_CMD")  # tesseract binary, empty to use PATH
+    ocr_max_side: int = Field(default=3500, env="OCR_MAX_SIDE")  # pixels; larger photos are downscaled
+    ocr_tile_height: int = Field(default=1000, env="OCR_TILE_HEIGHT")  # rows per tile recognised in parallel
+    ocr_min_confidence: float = Field(default=60, env="OCR_MIN_CONFIDENCE")  # below this a page is logged as unreliable
+
     # Email Configuration (for notifications)
     smtp_server: str = Field(default="smtp.gmail.com", env="SMTP_SERVER")
     smtp_port: int = Field(default=587, env="SMTP_PORT")
@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
@@ -24,6 +25,30 @@ engine = create_engine(
 # Create SessionLocal class for database sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def get_async_database_url(url: str) -> str:
+    """Map the configured database URL onto its asyncio driver"""
+    url = url.replace("rest", "postgres")
+    for prefix in ("postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+# Async engine for the FastAPI endpoints, so queries do not block the event loop
+async_engine = create_async_engine(
+    get_async_database_url(settings.supabase_url),
+    pool_size=10,
+    max_overflow=20,
+    pool_pre_ping=True,
+    pool_recycle=300,
+    echo=settings.debug,
+    connect_args={"ssl": "require"} if "supabase.co" in settings.supabase_url else {}
+)
+
+# expire_on_commit=False: async sessions cannot lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create Base class for declarative models
 Base = declarative_base()
 
@@ -38,6 +63,29 @@ def get_db() -> Session:
     finally:
         db.close()
 
+async def get_async_db() -> AsyncSession:
+    """
+    Dependency to get an async database session.
+    Yields an AsyncSession and ensures it's closed after use.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def _pool_status(pool) -> dict:
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+
+def get_pool_metrics() -> dict:
+    """Connection pool usage for the sync and async engines"""
+    return {
+        "sync": _pool_status(engine.pool),
+        "async": _pool_status(async_engine.pool),
+    }
+
 def create_tables():
     """
     Create all tables defined in models.
@@ -70,17 +118,19 @@ async def get_database_health():
     Get database health status for monitoring.
     """
     try:
-        with SessionLocal() as db:
+        async with AsyncSessionLocal() as db:
             # Simple query to check database connectivity
-            db.execute("SELECT 1")
+            await db.execute(text("SELECT 1"))
             return {
                 "status": "healthy",
                 "database": "connected",
-                "engine": "postgresql"
+                "engine": "postgresql",
+                "pool": get_pool_metrics()
             }
     except Exception as e:
         return {
             "status": "unhealthy",
             "error": str(e),
-            "database": "disconnected"
+            "database": "disconnected",
+            "pool": get_pool_metrics()
         }
@@ -2,8 +2,15 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.middleware import audit_middleware
 from app.api.v1 import webhooks, cases, documents, lawyers, payments, calendar, analytics
-from app.core.database import engine
+from app.core.database import engine, get_database_health
 from app.models import Base
+from app.config import settings
+from app.services.whatsapp.event_queue import get_event_queue
+from app.services.whatsapp.dispatcher import get_dispatcher
+from app.services.whatsapp.message_catalog import get_message_catalog
+from app.services.whatsapp.client import close_whatsapp_client
+from app.services.document.pool import shutdown_process_pool
+from app.services.ai.llm_client import get_llm_gateway
 
 # Create tables
 Base.metadata.create_all(bind=engine)
@@ -23,6 +30,44 @@ app.include_router(payments.router, prefix="/api/v1/payments", tags=["Payments"]
 app.include_router(calendar.router, prefix="/api/v1/calendar", tags=["Calendar"])
 app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["Analytics"])
 
+@app.on_event("startup")
+async def start_webhook_queue():
+    get_message_catalog()
+    await get_dispatcher().start()
+    if settings.webhook_processing_mode == "queue":
+        await get_event_queue().start()
+
+@app.on_event("shutdown")
+async def stop_webhook_queue():
+    if settings.webhook_processing_mode == "queue":
+        await get_event_queue().stop()
+    await get_dispatcher().stop()
+    await close_whatsapp_client()
+    shutdown_process_pool()
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/health/db")
+async def database_health():
+    """Database connectivity and connection pool usage"""
+    return await get_database_health()
+
+@app.get("/health/queue")
+async def queue_health():
+    """Webhook queue depth and processing lag"""
+    dispatcher = get_dispatcher().stats()
+    if settings.webhook_processing_mode != "queue":
+        return {"mode": settings.webhook_processing_mode, "dispatcher": dispatcher}
+    return {"mode": "queue", **await get_event_queue().stats(), "dispatcher": dispatcher}
+
+@app.get("/health/llm")
+async def llm_health():
+    """LLM circuit breaker state and per-feature latency percentiles"""
+    gateway = get_llm_gateway()
+    if gateway is None:
+        return {"status": "disabled"}
+    stats = gateway.stats()
+    status = "healthy" if stats["breaker"]["state"] == "closed" else "degraded"
+    return {"status": status, **stats}
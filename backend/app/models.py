@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey, JSON, Enum
+from sqlalchemy import Column, Integer, BigInteger, SmallInteger, String, Text, Date, DateTime, Boolean, Float, ForeignKey, JSON, Enum, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -83,6 +83,7 @@ class Case(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     closed_at = Column(DateTime(timezone=True))
+    search_tokens = Column(Text)  # Maintained by app.services.case_search
 
     # Relationships
     client = relationship("User", back_populates="cases")
@@ -91,6 +92,27 @@ class Case(Base):
     appointments = relationship("Appointment", back_populates="case")
     payments = relationship("Payment", back_populates="case")
 
+    # Keyset pagination walks (created_at, id) newest first, optionally within a filter
+    __table_args__ = (
+        Index("ix_cases_created_at_id", "created_at", "id"),
+        Index("ix_cases_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_cases_lawyer_created_at_id", "lawyer_id", "created_at", "id"),
+        Index("ix_cases_client_created_at_id", "client_id", "created_at", "id"),
+        Index("ix_cases_type_created_at_id", "case_type", "created_at", "id"),
+    )
+
+class CaseDailyStats(Base):
+    """Per-day rollup of case counts, maintained incrementally by the cases API"""
+    __tablename__ = "case_daily_stats"
+
+    day = Column(Date, primary_key=True)  # UTC day the cases were created
+    case_type = Column(String, primary_key=True)
+    priority = Column(Enum(CasePriority), primary_key=True)
+    status = Column(Enum(CaseStatus), primary_key=True)
+    case_count = Column(Integer, nullable=False, default=0)
+    resolved_count = Column(Integer, nullable=False, default=0)  # closed cases with closed_at set
+    resolution_days_total = Column(Integer, nullable=False, default=0)
+
 class Lawyer(Base):
     __tablename__ = "lawyers"
 
@@ -139,7 +161,7 @@ class Message(Base):
     content = Column(Text)
     media_url = Column(String)
     media_type = Column(String)  # image, video, document, audio
-    whatsapp_message_id = Column(String)
+    whatsapp_message_id = Column(String, unique=True, index=True)  # Meta redelivers; dedup backstop
     is_from_user = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -156,6 +178,9 @@ class Document(Base):
     file_size = Column(Integer)
     file_type = Column(String)
     document_type = Column(String)  # contract, evidence, correspondence, etc.
+    content_hash = Column(String(64), index=True)  # SHA-256 of the file, links copies of the same upload
+    minhash = Column(LargeBinary)  # MinHash signature of the extracted text, for near-duplicate lookup
+    page_range = Column(String)  # Pages the text and minhash cover, e.g. "1-50"; NULL for the whole file
     is_confidential = Column(Boolean, default=False)
     uploaded_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -165,6 +190,27 @@ class Document(Base):
     case = relationship("Case", back_populates="documents")
     uploader = relationship("User")
 
+class DocumentLshBucket(Base):
+    """LSH band buckets of document MinHash signatures"""
+    __tablename__ = "document_lsh_buckets"
+
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+class ProcessedDocument(Base):
+    """Cached pipeline output for a file's content, keyed by hash and pipeline/model version"""
+    __tablename__ = "processed_documents"
+
+    cache_key = Column(String, primary_key=True)
+    content_hash = Column(String(64), nullable=False, index=True)
+    pages = Column(JSON, nullable=False)  # [[page number, text], ...]
+    summary = Column(JSON)
+    entities = Column(JSON)
+    size_bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
 class Appointment(Base):
     __tablename__ = "appointments"
 
@@ -73,9 +73,11 @@ class CaseResponse(BaseModel):
 
 class CaseListResponse(BaseModel):
     cases: List[CaseResponse]
-    total: int
+    total: Optional[int] = None  # Only when requested with count=estimate|exact
+    total_is_estimate: bool = False
     page: int
     size: int
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page
 
 class CaseFilter(BaseModel):
     status: Optional[CaseStatus] = None
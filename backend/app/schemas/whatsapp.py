@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterator, List
 from datetime import datetime
 
 class WhatsAppContact(BaseModel):
@@ -76,6 +76,15 @@ class WhatsAppWebhookPayload(BaseModel):
                         return WhatsAppMessage(**messages[0])
         return None
 
+    def iter_messages(self) -> Iterator[WhatsAppMessage]:
+        """Yield every message in the payload, across all entries and changes"""
+        for entry in self.entry:
+            for change in entry.changes:
+                if change.get("field") == "messages":
+                    value = change.get("value", {})
+                    for message in value.get("messages") or []:
+                        yield WhatsAppMessage(**message)
+
     def get_phone_number(self) -> Optional[str]:
         """Extract phone number from the webhook payload"""
         for entry in self.entry:
@@ -126,6 +135,24 @@ class WebhookPayload(BaseModel):
             media_type=None
         )
 
+    @classmethod
+    def from_whatsapp_message(cls, message: WhatsAppMessage) -> "WebhookPayload":
+        """Create WebhookPayload from a single WhatsApp message"""
+        return cls(
+            phone=message.from_,
+            text=message.text.get("body") if message.text else None,
+            message_type=message.type or "text",
+            whatsapp_message_id=message.id,
+            timestamp=datetime.fromtimestamp(int(message.timestamp)) if message.timestamp else None,
+            media_url=None,  # Would need to download media from WhatsApp API
+            media_type=None
+        )
+
+    @classmethod
+    def list_from_whatsapp_webhook(cls, webhook_payload: WhatsAppWebhookPayload) -> List["WebhookPayload"]:
+        """Create a WebhookPayload for every message in a (possibly batched) webhook"""
+        return [cls.from_whatsapp_message(message) for message in webhook_payload.iter_messages()]
+
 class WhatsAppMediaUpload(BaseModel):
     """Response for media upload"""
     media_id: str = Field(..., description="WhatsApp media ID")
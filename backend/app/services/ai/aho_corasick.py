@@ -0,0 +1,125 @@
+import re
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Characters treated as a plain space; runs of whitespace match a single space
+_WHITESPACE = str.maketrans({"\n": " ", "\r": " ", "\t": " ", "\x0b": " ", "\x0c": " ", "\xa0": " "})
+
+# A match must start after one of these (or at the start of the text)
+_NOT_ALNUM = re.compile(r"[\W_]")
+
+def fold(text: str) -> str:
+    """Lower-case text with whitespace mapped to spaces, same length as the input so offsets carry over"""
+    folded = text.lower()
+    if len(folded) != len(text):
+        # A few characters lower-case to two (e.g. 'İ'); keep the first
+        folded = "".join(char.lower()[0] for char in text)
+    return folded.translate(_WHITESPACE)
+
+def _normalize_pattern(pattern: str) -> str:
+    return " ".join(fold(pattern).split())
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton for matching many phrases in one pass.
+    Matching is case-insensitive, a run of whitespace in the text matches
+    one space in a pattern (names wrap across lines in PDF text), and matches
+    must start and end on word boundaries. Overlapping matches are resolved
+    leftmost-longest.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # (pattern length, value) of the longest pattern ending at each state
+        self._output: List[Optional[Tuple[int, Any]]] = [None]
+        # Nearest state along the failure chain that has an output
+        self._output_link: List[int] = [0]
+        self.max_length = 0
+
+        for pattern, value in patterns:
+            self._add(_normalize_pattern(pattern), value)
+        self._build()
+
+    def __len__(self) -> int:
+        return sum(1 for output in self._output if output is not None)
+
+    def _add(self, pattern: str, value: Any):
+        if not pattern:
+            return
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._output_link.append(0)
+                self._goto[state][char] = next_state
+            state = next_state
+        # The first value registered for a phrase wins
+        if self._output[state] is None:
+            self._output[state] = (len(pattern), value)
+        self.max_length = max(self.max_length, len(pattern))
+
+    def _build(self):
+        queue: Deque[int] = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                failed = self._fail[child]
+                self._output_link[child] = failed if self._output[failed] is not None else self._output_link[failed]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        """(start, end, value) of every non-overlapping phrase in `text`, in order"""
+        candidates = []
+        folded = fold(text)
+        goto, fail, output, output_link = self._goto, self._fail, self._output, self._output_link
+        # Text offsets of the characters the automaton consumed, enough to find match starts
+        positions: Deque[int] = deque(maxlen=self.max_length + 1)
+        state = 0
+        previous = " "
+        index = -1
+        text_length = len(folded)
+
+        while index + 1 < text_length:
+            index += 1
+            char = folded[index]
+            if char == " " and previous == " ":
+                continue
+            previous = char
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not state:
+                # Nothing is partly matched and matches start on word boundaries,
+                # so the rest of this word can be skipped
+                if char.isalnum():
+                    boundary = _NOT_ALNUM.search(folded, index + 1)
+                    if boundary is None:
+                        break
+                    index = boundary.start() - 1
+                continue
+            positions.append(index)
+
+            match_state = state if output[state] is not None else output_link[state]
+            while match_state:
+                length, value = output[match_state]
+                start = positions[-length]
+                end = index + 1
+                if (start == 0 or not folded[start - 1].isalnum()) and (end == text_length or not folded[end].isalnum()):
+                    candidates.append((start, -end, value))
+                match_state = output_link[match_state]
+
+        last_end = 0
+        for start, negative_end, value in sorted(candidates, key=lambda candidate: (candidate[0], candidate[1])):
+            if start >= last_end:
+                last_end = -negative_end
+                yield start, last_end, value
@@ -0,0 +1,543 @@
+import asyncio
+import json
+import os
+import re
+from collections import OrderedDict
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+import logging
+from app.config import settings
+from app.services.ai.aho_corasick import AhoCorasick
+from app.services.ai.llm_client import LLMUnavailableError, get_llm_gateway
+from app.services.document.pdf_pages import PageStream, SpooledPage, leading_text, numbered_pages, read_spooled_pages
+from app.services.document.pool import get_process_pool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), "data", "legal_gazetteer.json")
+
+ENTITY_FIELDS = [
+    "parties", "courts", "case_numbers", "fir_numbers", "police_stations",
+    "statutes", "acts", "dates", "amounts",
+]
+
+# Most distinct values kept per field; repeats only raise the count
+MAX_VALUES_PER_FIELD = 50
+
+# Characters of document text sent to the LLM for low-confidence fields
+MAX_INPUT_CHARS = 12000
+
+# Confidence by how an entity was found
+GAZETTEER_CONFIDENCE = 0.95
+STRICT_RULE_CONFIDENCE = 0.9
+LOOSE_RULE_CONFIDENCE = 0.65
+LLM_CONFIDENCE = 0.6
+
+class Entity(NamedTuple):
+    field: str
+    value: str  # normalized, e.g. "IPC Section 302", "FIR 123/2021", "2021-03-12"
+    text: str  # as written in the document
+    page: Optional[int]
+    start: Optional[int]  # character offsets within the page text
+    end: Optional[int]
+    confidence: float
+    source: str  # rules, gazetteer, llm, or near_duplicate when reused from a similar document
+
+class ExtractedEntities:
+    """Entities by field, one entry per distinct value with the first place it was seen and a count"""
+
+    def __init__(self, max_per_field: int = MAX_VALUES_PER_FIELD):
+        self.max_per_field = max_per_field
+        self._fields: Dict[str, "OrderedDict[str, List]"] = {field: OrderedDict() for field in ENTITY_FIELDS}
+
+    def add(self, entity: Entity):
+        values = self._fields[entity.field]
+        key = entity.value.casefold()
+        entry = values.get(key)
+        if entry is not None:
+            entry[1] += 1
+            if entity.confidence > entry[0].confidence:
+                entry[0] = entity._replace(page=entry[0].page, start=entry[0].start, end=entry[0].end, text=entry[0].text)
+        elif len(values) < self.max_per_field:
+            values[key] = [entity, 1]
+
+    def values(self, field: str) -> List[str]:
+        return [entity.value for entity, _ in self._fields[field].values()]
+
+    def confidence(self, field: str) -> float:
+        """Confidence of the best entity found for a field, 0 when there is none"""
+        return max((entity.confidence for entity, _ in self._fields[field].values()), default=0.0)
+
+    def as_dict(self) -> Dict[str, List[dict]]:
+        return {
+            field: [
+                {**entity._asdict(), "count": count}
+                for entity, count in entries.values()
+            ]
+            for field, entries in self._fields.items()
+        }
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+_MONTH = r"(?i:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?"
+
+# Case types as written in Indian cause lists; dots and spaces are optional when matching
+CASE_TYPES = [
+    "W.P.(C)", "W.P.(Crl.)", "W.P.", "W.A.", "Writ Petition (Civil)", "Writ Petition (Criminal)", "Writ Petition",
+    "S.L.P.(C)", "S.L.P.(Crl.)", "S.L.P.", "Special Leave Petition (Civil)", "Special Leave Petition (Criminal)", "Special Leave Petition",
+    "C.A.", "Civil Appeal", "Crl.A.", "Criminal Appeal", "Crl.Rev.P.", "Criminal Revision", "Crl.M.C.", "Crl.O.P.", "Crl.M.P.",
+    "Bail Appln.", "Bail Application", "B.A.", "C.S.(OS)", "C.S.(COMM)", "C.S.", "O.S.", "Original Suit", "O.A.", "Original Application",
+    "O.M.P.", "Arb.P.", "E.P.", "Ex.P.", "Execution Petition", "R.F.A.", "F.A.O.", "F.A.", "First Appeal", "S.A.", "Second Appeal",
+    "R.S.A.", "L.P.A.", "Letters Patent Appeal", "M.A.", "I.A.", "C.M.(M)", "C.M.A.", "C.R.P.", "C.W.P.", "CRM-M", "H.C.P.",
+    "T.P.(C)", "T.P.", "Transfer Petition", "R.P.", "Review Petition", "Cont.Cas.(C)", "Contempt Petition",
+    "MAT.APP.(F.C.)", "M.A.C.T.", "MACT Case", "C.C.", "Complaint Case", "Consumer Complaint", "CT Case", "G.R. Case",
+]
+
+def _flexible(case_type: str) -> List[str]:
+    """Pattern pieces for a case type with optional dots, optional space after dots and before parentheses"""
+    parts = []
+    for char in case_type.upper():
+        if char == ".":
+            parts.append(r"\.?\s?")
+        elif char == " ":
+            parts.append(r"\s+")
+        elif char == "(":
+            parts.append(r"\s?\(")
+        else:
+            parts.append(re.escape(char))
+    return parts
+
+def _prefix_alternation(alternatives: List[List[str]]) -> str:
+    """
+    One pattern for several alternatives, factored into a trie so a shared
+    prefix is matched once instead of once per alternative. Longer
+    alternatives are tried before their prefixes.
+    """
+    branches: Dict[str, List[List[str]]] = {}
+    ends = False
+    for parts in alternatives:
+        if parts:
+            branches.setdefault(parts[0], []).append(parts[1:])
+        else:
+            ends = True
+    options = [piece + _prefix_alternation(rests) for piece, rests in branches.items()]
+    if not options:
+        return ""
+    if ends:
+        return "(?:" + "|".join(options) + ")?"
+    return options[0] if len(options) == 1 else "(?:" + "|".join(options) + ")"
+
+def _case_type_key(case_type: str) -> str:
+    return re.sub(r"[\s.]", "", case_type).upper()
+
+_CASE_TYPE_NAMES = {_case_type_key(case_type): case_type for case_type in CASE_TYPES}
+_CASE_TYPE = "(?i:" + _prefix_alternation([_flexible(case_type) for case_type in CASE_TYPES]) + ")"
+
+_SECTION_NUMBER = r"\d{1,4}[A-Z]{0,2}(?:\s?\(\w{1,4}\))*"
+_SECTION_LIST = rf"{_SECTION_NUMBER}(?:\s*(?:,|/|&|(?i:and|r/w|read\s+with))\s*{_SECTION_NUMBER})*"
+_NAME = r"[A-Z][\w.&'-]*(?:[ \t]+(?:(?:of|and|&)[ \t]+)?[A-Z][\w.&'-]*){0,6}"
+_PLACE = r"[A-Z][a-z]+(?:[ \t]+[A-Z][a-z]+){0,2}"
+
+# One alternation scanned once per page; earlier alternatives win at the same position
+ENTITY_RULES = [
+    ("fir", rf"\b(?i:F\.?\s?I\.?\s?R\.?)\s*(?i:No\.?|Number)?\s*[:.-]?\s*(?P<fir_no>\d{{1,6}})(?:\s*(?:/|-|(?i:of))\s*(?P<fir_year>(?:19|20)?\d{{2}})\b)?"),
+    ("case_number", rf"\b(?P<case_type>{_CASE_TYPE})\s*(?i:Nos?\.?|Number)?\s*[:.-]?\s*(?P<case_no>\d{{1,7}})\s*(?:/|-|(?i:of))\s*(?P<case_year>(?:19|20)\d{{2}})\b"),
+    ("generic_case_number", r"\b(?i:(?:case|suit|petition|appeal|complaint|application)\s+No\.?)\s*(?P<generic_no>\d{1,7})(?:\s*(?:/|(?i:of))\s*(?P<generic_year>(?:19|20)\d{2})\b)?"),
+    ("section", rf"(?:\b(?i:sections?|secs?\.|u/ss?\.?|under\s+sections?)|\bS\.)\s*(?P<section_numbers>{_SECTION_LIST})"),
+    ("article", rf"\b(?i:articles?|art\.)\s*(?P<article_numbers>{_SECTION_LIST})"),
+    ("numeric_date", r"\b(?P<numeric_day>0?[1-9]|[12]\d|3[01])(?P<date_separator>[./-])(?P<numeric_month>0?[1-9]|1[0-2])(?P=date_separator)(?P<numeric_year>(?:19|20)\d{2}|\d{2})\b"),
+    ("day_month_date", rf"\b(?P<dm_day>[0-3]?\d)(?i:st|nd|rd|th)?(?:\s+|-)(?i:day\s+of\s+)?(?P<dm_month>{_MONTH})(?:,?\s+|-)(?P<dm_year>(?:19|20)\d{{2}})\b"),
+    ("month_day_date", rf"\b(?P<md_month>{_MONTH})\s+(?P<md_day>[0-3]?\d)(?i:st|nd|rd|th)?,?\s+(?P<md_year>(?:19|20)\d{{2}})\b"),
+    ("amount", r"(?:\b(?i:rs\.?|inr)|₹)\s*(?P<amount_number>\d[\d,]*(?:\.\d+)?)(?:\s*(?P<amount_unit>(?i:lakhs?|lacs?|crores?|cr\.?)\b))?(?:\s*/-)?"),
+    ("amount_in_words", r"\b(?P<worded_number>\d[\d,]*(?:\.\d+)?)\s*(?P<worded_unit>(?i:lakhs?|lacs?|crores?)\s+)?(?i:rupees)\b"),
+    ("court", rf"\b(?P<court_name>(?i:(?:additional\s+|principal\s+|chief\s+)?(?:district\s+and\s+sessions|district|sessions|family|civil|commercial)\s+(?:judge|court)|(?:chief\s+)?(?:metropolitan|judicial)\s+magistrate(?:\s+(?:first|1st|second|2nd)\s+class)?))(?:\s*(?:,|(?i:at))\s*(?P<court_place>{_PLACE}))?"),
+    ("police_station", rf"(?:\b(?i:police\s+station|p\.\s?s\.|thana)\s*[:-]?\s*(?P<station_after>{_PLACE})|\b(?P<station_before>{_PLACE})\s+(?i:police\s+station))"),
+    ("parties", rf"(?P<party_a>{_NAME})\s+(?i:v\.|vs\.?|versus)\s+(?P<party_b>{_NAME})"),
+]
+
+# Every rule starts at the start of a word or a rupee sign; checking that once up
+# front lets the scan skip the middle of words without trying each rule there
+ENTITY_PATTERN = re.compile(
+    r"(?:\b(?=\w)|(?=₹))(?:" + "|".join(f"(?P<{name}>{pattern})" for name, pattern in ENTITY_RULES) + ")"
+)
+
+_ROLE_WORDS = re.compile(
+    r"^(?:(?:the|in|between|and|of|matter)\s+)+|"
+    r"(?:\.{2,}|…)?\s*(?:petitioners?|appellants?|respondents?|accused|complainants?|plaintiffs?|defendants?|applicants?|opposite\s+part(?:y|ies))\s*$|"
+    r"\s*(?:&|and)\s+(?:ors|anr|others|another)\.?\s*$",
+    re.IGNORECASE
+)
+
+_SECTION_SPLIT = re.compile(r"\s*(?:,|/|&|\band\b|\br/w\b|\bread\s+with\b)\s*", re.IGNORECASE)
+
+# How far after a section list an act name may start and still belong to it
+_ACT_WINDOW = 16
+
+def _section_numbers(text: str) -> List[str]:
+    return [number.replace(" ", "") for number in _SECTION_SPLIT.split(text) if number]
+
+def _full_year(year: str) -> int:
+    value = int(year)
+    if len(year) == 2:
+        value += 2000 if value < 50 else 1900
+    return value
+
+def _iso_date(day: str, month: Union[str, int], year: str) -> Optional[str]:
+    if isinstance(month, str) and not month.isdigit():
+        month = _MONTHS.get(month.lower()[:3])
+    try:
+        return date(_full_year(year), int(month), int(day)).isoformat()
+    except (TypeError, ValueError):
+        return None
+
+def _rupees(number: str, unit: Optional[str]) -> Optional[str]:
+    try:
+        value = float(number.replace(",", ""))
+    except ValueError:
+        return None
+    unit = (unit or "").strip().lower()
+    if unit.startswith(("lakh", "lac")):
+        value *= 100000
+    elif unit.startswith("cr"):
+        value *= 10000000
+    return f"INR {value:.0f}" if value == int(value) else f"INR {value:.2f}"
+
+def _clean_party(name: str) -> str:
+    previous = None
+    while previous != name:
+        previous = name
+        name = _ROLE_WORDS.sub("", name).strip(" ,.:;-")
+    return name
+
+def _adjacent_line(text: str, position: int, before: bool) -> Tuple[str, int]:
+    """
+    The nearest non-empty text before or after `position`: first the rest of
+    its own line, then whole lines moving away from it. Returns the text and
+    its start offset, or ("", -1).
+    """
+    if before:
+        end = position
+        while end > 0:
+            start = text.rfind("\n", 0, end) + 1
+            line = text[start:end].strip()
+            if line:
+                return line, text.index(line, start)
+            end = start - 1
+    else:
+        start = position
+        while start < len(text):
+            end = text.find("\n", start)
+            end = len(text) if end == -1 else end
+            line = text[start:end].strip()
+            if line:
+                return line, text.index(line, start)
+            start = end + 1
+    return "", -1
+
+class GazetteerEntry(NamedTuple):
+    field: str
+    value: str
+    short: Optional[str] = None  # act abbreviation used in statute values, e.g. IPC
+
+def _police_station_aliases(name: str) -> List[str]:
+    return [
+        f"{name} Police Station", f"Police Station {name}", f"P.S. {name}", f"P. S. {name}",
+        f"PS {name}", f"PS. {name}", f"Thana {name}", f"{name} Thana",
+    ]
+
+def load_gazetteer(path: Optional[str] = None) -> List[Tuple[str, GazetteerEntry]]:
+    """(phrase, entry) pairs for every court, act and police station alias"""
+    with open(path or DEFAULT_GAZETTEER_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+
+    phrases = []
+    for court in data.get("courts", []):
+        entry = GazetteerEntry("courts", court["name"])
+        phrases += [(alias, entry) for alias in court["aliases"]]
+    for act in data.get("acts", []):
+        entry = GazetteerEntry("acts", act["name"], act.get("short"))
+        phrases += [(alias, entry) for alias in act["aliases"]]
+    for city, stations in data.get("police_stations", {}).items():
+        for station in stations:
+            entry = GazetteerEntry("police_stations", f"{station}, {city}")
+            phrases += [(alias, entry) for alias in _police_station_aliases(station)]
+    return phrases
+
+class LegalEntityEngine:
+    """
+    Compiled extraction of Indian legal entities.
+    Each page is scanned twice in total, whatever the number of patterns:
+    once by ENTITY_PATTERN, one alternation of every regex rule, and once by
+    an Aho-Corasick automaton over the gazetteer of courts, acts and police
+    stations. Section and article numbers are tied to an act named right
+    after them. Every entity keeps its page and character offsets.
+    """
+
+    def __init__(self, gazetteer: Iterable[Tuple[str, GazetteerEntry]]):
+        self.gazetteer = AhoCorasick(gazetteer)
+        self._handlers: Dict[str, Callable] = {
+            "fir": self._fir,
+            "case_number": self._case_number,
+            "generic_case_number": self._generic_case_number,
+            "section": self._sections,
+            "article": self._sections,
+            "numeric_date": self._date,
+            "day_month_date": self._date,
+            "month_day_date": self._date,
+            "amount": self._amount,
+            "amount_in_words": self._amount,
+            "court": self._court,
+            "police_station": self._police_station,
+            "parties": self._parties,
+        }
+
+    def extract(self, pages: Iterable[Tuple[int, str]], entities: Optional[ExtractedEntities] = None) -> ExtractedEntities:
+        entities = entities if entities is not None else ExtractedEntities()
+        for number, text in pages:
+            for entity in self.extract_page(number, text):
+                entities.add(entity)
+        return entities
+
+    def extract_page(self, page: int, text: str) -> Iterator[Entity]:
+        acts: Dict[int, GazetteerEntry] = {}  # start offset -> act
+        known: Dict[str, List[Tuple[int, int]]] = {}  # gazetteer spans by field
+        for start, end, entry in self.gazetteer.iter_matches(text):
+            if entry.field == "acts":
+                acts[start] = entry
+            known.setdefault(entry.field, []).append((start, end))
+            yield Entity(entry.field, entry.value, text[start:end], page, start, end, GAZETTEER_CONFIDENCE, "gazetteer")
+
+        for match in ENTITY_PATTERN.finditer(text):
+            for entity in self._handlers[match.lastgroup](match, page, text, acts):
+                # A rule hit on a phrase the gazetteer already named adds nothing
+                spans = known.get(entity.field, ())
+                if not any(start < entity.end and entity.start < end for start, end in spans):
+                    yield entity
+
+    @staticmethod
+    def _entity(field: str, value: str, match: re.Match, page: int, confidence: float, group: int = 0) -> Entity:
+        return Entity(field, value, match.group(group), page, match.start(group), match.end(group), confidence, "rules")
+
+    def _fir(self, match, page, text, acts):
+        year = match.group("fir_year")
+        number = int(match.group("fir_no"))
+        if year:
+            yield self._entity("fir_numbers", f"FIR {number}/{_full_year(year)}", match, page, STRICT_RULE_CONFIDENCE)
+        else:
+            yield self._entity("fir_numbers", f"FIR {number}", match, page, LOOSE_RULE_CONFIDENCE)
+
+    def _case_number(self, match, page, text, acts):
+        key = _case_type_key(match.group("case_type"))
+        case_type = _CASE_TYPE_NAMES.get(key, match.group("case_type"))
+        value = f"{case_type} No. {int(match.group('case_no'))}/{match.group('case_year')}"
+        yield self._entity("case_numbers", value, match, page, STRICT_RULE_CONFIDENCE)
+
+    def _generic_case_number(self, match, page, text, acts):
+        year = match.group("generic_year")
+        value = f"No. {int(match.group('generic_no'))}" + (f"/{year}" if year else "")
+        yield self._entity("case_numbers", value, match, page, LOOSE_RULE_CONFIDENCE)
+
+    def _sections(self, match, page, text, acts):
+        article = match.lastgroup == "article"
+        numbers = _section_numbers(match.group("article_numbers" if article else "section_numbers"))
+        act = next((acts[start] for start in range(match.end(), match.end() + _ACT_WINDOW) if start in acts), None)
+        if act is None and article:
+            act_name, confidence = "Constitution", LOOSE_RULE_CONFIDENCE
+        elif act is None:
+            act_name, confidence = None, LOOSE_RULE_CONFIDENCE
+        else:
+            act_name, confidence = act.short or act.value, STRICT_RULE_CONFIDENCE
+        label = "Article" if article else "Section"
+        for number in numbers:
+            value = f"{act_name} {label} {number}" if act_name else f"{label} {number}"
+            yield self._entity("statutes", value, match, page, confidence)
+
+    def _date(self, match, page, text, acts):
+        kind = match.lastgroup
+        if kind == "numeric_date":
+            value = _iso_date(match.group("numeric_day"), match.group("numeric_month"), match.group("numeric_year"))
+            confidence = STRICT_RULE_CONFIDENCE if len(match.group("numeric_year")) == 4 else LOOSE_RULE_CONFIDENCE
+        elif kind == "day_month_date":
+            value = _iso_date(match.group("dm_day"), match.group("dm_month"), match.group("dm_year"))
+            confidence = STRICT_RULE_CONFIDENCE
+        else:
+            value = _iso_date(match.group("md_day"), match.group("md_month"), match.group("md_year"))
+            confidence = STRICT_RULE_CONFIDENCE
+        if value:
+            yield self._entity("dates", value, match, page, confidence)
+
+    def _amount(self, match, page, text, acts):
+        if match.lastgroup == "amount":
+            value = _rupees(match.group("amount_number"), match.group("amount_unit"))
+        else:
+            value = _rupees(match.group("worded_number"), match.group("worded_unit"))
+        if value:
+            yield self._entity("amounts", value, match, page, STRICT_RULE_CONFIDENCE)
+
+    def _court(self, match, page, text, acts):
+        name = " ".join(match.group("court_name").split()).title()
+        place = match.group("court_place")
+        value = f"{name}, {' '.join(place.split())}" if place else name
+        yield self._entity("courts", value, match, page, LOOSE_RULE_CONFIDENCE)
+
+    def _police_station(self, match, page, text, acts):
+        group = "station_after" if match.group("station_after") else "station_before"
+        yield self._entity("police_stations", " ".join(match.group(group).split()), match, page, LOOSE_RULE_CONFIDENCE)
+
+    def _parties(self, match, page, text, acts):
+        # Cause titles put each party on its own line, labelled "...Petitioner"
+        for group, before in (("party_a", True), ("party_b", False)):
+            raw = match.group(group)
+            name = _clean_party(raw)
+            start = match.start(group) + raw.find(name) if name else -1
+            if not name:
+                line, start = _adjacent_line(text, match.start(group) if before else match.end(group), before)
+                name = _clean_party(line)
+                if not name or len(name) > 80 or not name[0].isupper() or any(char.isdigit() for char in name):
+                    continue
+                start = text.index(name, start)
+            confidence = 0.8 if page <= 2 else LOOSE_RULE_CONFIDENCE
+            yield Entity("parties", " ".join(name.split()), name, page, start, start + len(name), confidence, "rules")
+
+_entity_engine: Optional[LegalEntityEngine] = None
+
+def get_entity_engine() -> LegalEntityEngine:
+    """Get the process-wide extraction engine, compiled on first use"""
+    global _entity_engine
+    if _entity_engine is None:
+        _entity_engine = LegalEntityEngine(load_gazetteer(settings.legal_gazetteer_path or None))
+        logger.info(f"Compiled legal entity engine with {len(_entity_engine.gazetteer)} gazetteer phrases")
+    return _entity_engine
+
+def extract_entities_with_rules(source: Union[str, PageStream]) -> ExtractedEntities:
+    """Rule and gazetteer extraction over every page, read one at a time"""
+    return get_entity_engine().extract(numbered_pages(source))
+
+def extract_spooled_entities(spool_path: str, pages: List[SpooledPage]) -> ExtractedEntities:
+    """Rule and gazetteer extraction of a spooled PageStream; runs in the document process pool"""
+    return get_entity_engine().extract(read_spooled_pages(spool_path, pages))
+
+def parse_entities(reply: str, fields: List[str]) -> Dict[str, List[str]]:
+    """Values for `fields` from a model reply, tolerating code fences and missing or malformed keys"""
+    parsed: Dict[str, List[str]] = {field: [] for field in fields}
+    start, end = reply.find("{"), reply.rfind("}")
+    if start == -1 or end <= start:
+        return parsed
+    try:
+        data = json.loads(reply[start:end + 1])
+    except ValueError:
+        logger.warning("Entity extraction returned invalid JSON")
+        return parsed
+    if not isinstance(data, dict):
+        return parsed
+    for field in fields:
+        values = data.get(field)
+        if isinstance(values, str):
+            values = [values]
+        if isinstance(values, list):
+            parsed[field] = [str(value).strip() for value in values if value and str(value).strip()]
+    return parsed
+
+def _locate(value: str, pages: List[Tuple[int, str]]) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    """Page and offsets of the first occurrence of a value in the pages sent to the LLM"""
+    needle = value.casefold()
+    for number, text in pages:
+        start = text.casefold().find(needle)
+        if start != -1:
+            return number, start, start + len(value)
+    return None, None, None
+
+def relocate_entities(entities: Dict[str, List[dict]], source: Union[str, PageStream]) -> Dict[str, List[dict]]:
+    """
+    Entities of another document (as from ExtractedEntities.as_dict) placed in
+    this one: each is marked source "near_duplicate" and gets the page and
+    offsets of its text here, or None where the text does not occur.
+    """
+    relocated = {
+        field: [{**entity, "source": "near_duplicate", "page": None, "start": None, "end": None} for entity in items]
+        for field, items in entities.items()
+    }
+    # Re-scans differ in line breaks and spacing, so any whitespace run matches
+    unplaced = [
+        (entity, re.compile(r"\s+".join(map(re.escape, entity["text"].split())), re.IGNORECASE))
+        for items in relocated.values() for entity in items if entity.get("text", "").strip()
+    ]
+    for number, page_text in numbered_pages(source):
+        if not unplaced:
+            break
+        still_unplaced = []
+        for entity, pattern in unplaced:
+            match = pattern.search(page_text)
+            if match is None:
+                still_unplaced.append((entity, pattern))
+            else:
+                entity.update(page=number, start=match.start(), end=match.end())
+        unplaced = still_unplaced
+    return relocated
+
+async def _fill_with_llm(source: Union[str, PageStream], entities: ExtractedEntities, fields: List[str]) -> bool:
+    """Ask the LLM for `fields`; False if it was unavailable and nothing was added"""
+    llm = get_llm_gateway()
+    text = leading_text(source, MAX_INPUT_CHARS).strip()
+    if llm is None or not text:
+        return True
+
+    prompt = (
+        "Extract legal entities from this Indian legal document. Respond with only a JSON object with the keys "
+        + ", ".join(fields)
+        + "; each value is a list of strings exactly as they appear in the text, empty when absent."
+    )
+    try:
+        response = await llm.complete(
+            feature="entity_extractor",
+            messages=[
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": text}
+            ],
+            max_tokens=400,
+            temperature=0
+        )
+    except LLMUnavailableError as e:
+        logger.warning(f"LLM entity extraction unavailable, keeping rule results: {e}")
+        return False
+
+    pages = []
+    remaining = MAX_INPUT_CHARS
+    for number, page_text in numbered_pages(source):
+        if remaining <= 0:
+            break
+        pages.append((number, page_text[:remaining]))
+        remaining -= len(page_text)
+
+    for field, values in parse_entities(response.text, fields).items():
+        for value in values:
+            page, start, end = _locate(value, pages)
+            entities.add(Entity(field, value, value, page, start, end, LLM_CONFIDENCE, "llm"))
+    return True
+
+class LegalEntities(NamedTuple):
+    entities: Dict[str, List[dict]]
+    degraded: bool  # The LLM was needed but unavailable, so only rule results are included
+
+async def extract_legal_entities(source: Union[str, PageStream]) -> LegalEntities:
+    """
+    Parties, courts, case and FIR numbers, police stations, statutes, acts,
+    dates and amounts in a document, each with page, offsets, confidence and
+    source. The compiled rules cover the whole document; the LLM is only
+    asked about ENTITY_LLM_FIELDS whose best rule confidence is below
+    ENTITY_LLM_THRESHOLD.
+    """
+    if isinstance(source, PageStream):
+        loop = asyncio.get_running_loop()
+        entities = await loop.run_in_executor(get_process_pool(), extract_spooled_entities, source.spool_path, list(source.pages))
+    else:
+        entities = extract_entities_with_rules(source)
+
+    low_confidence = [
+        field for field in settings.entity_llm_fields
+        if entities.confidence(field) < settings.entity_llm_threshold
+    ]
+    answered = await _fill_with_llm(source, entities, low_confidence) if low_confidence else True
+    return LegalEntities(entities.as_dict(), not answered)
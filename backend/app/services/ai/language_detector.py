@@ -1,10 +1,139 @@
 import re
-from typing import Optional, Dict, List, Tuple
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import NamedTuple, Optional, Dict, List, Tuple
 import logging
 from app.config import settings
+from app.services.ai.llm_client import LLMUnavailableError, get_llm_gateway
+from app.services.ai.ngram_classifier import get_language_classifier
 
 logger = logging.getLogger(__name__)
 
+# A pattern that is a single character class such as [\u0600-\u06FF]
+_SCRIPT_RANGE_PATTERN = re.compile(r'^\[\\u([0-9A-Fa-f]{4})-\\u([0-9A-Fa-f]{4})\]$')
+# A pattern that is a word alternation such as \b(hello|hi)\b
+_WORD_LIST_PATTERN = re.compile(r'^\\b\((.*)\)\\b$')
+
+def _trie_pattern(words) -> str:
+    """Regex matching any of the words, factored by common prefix, longest match first"""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+class LanguagePatternMatcher:
+    """
+    LANGUAGE_PATTERNS compiled into one matcher.
+    All word lists become a single alternation scanned once, with a lookup
+    table from each word to the languages (and how many of their patterns)
+    that contain it; script ranges are counted in one pass over the
+    characters. Scores equal running every pattern separately: one point per
+    word match, two per character in a script range.
+    """
+
+    def __init__(self, language_patterns: Dict[str, List[str]]):
+        self.word_weights: Dict[str, Dict[str, int]] = {}
+        self.script_ranges: List[Tuple[int, int, str]] = []
+
+        for lang_code, patterns in language_patterns.items():
+            for pattern in patterns:
+                script_range = _SCRIPT_RANGE_PATTERN.match(pattern)
+                word_list = _WORD_LIST_PATTERN.match(pattern)
+                if script_range:
+                    low, high = (int(bound, 16) for bound in script_range.groups())
+                    self.script_ranges.append((low, high, lang_code))
+                elif word_list:
+                    # Each word counts once per pattern, however often it is listed
+                    for word in {re.sub(r'\\(.)', r'\1', alt).lower() for alt in word_list.group(1).split('|')}:
+                        weights = self.word_weights.setdefault(word, {})
+                        weights[lang_code] = weights.get(lang_code, 0) + 1
+                else:
+                    raise ValueError(f"Unsupported language pattern for {lang_code}: {pattern}")
+
+        # Words are merged into a trie-shaped regex so the engine branches on
+        # one character at a time instead of trying every word in turn
+        self.word_regex = re.compile(
+            r'\b(?:' + _trie_pattern(self.word_weights) + r')\b',
+            re.IGNORECASE | re.UNICODE
+        )
+        self.script_regex = re.compile(
+            '[' + ''.join(f'{re.escape(chr(low))}-{re.escape(chr(high))}' for low, high, _ in self.script_ranges) + ']'
+        )
+
+    def score(self, text: str) -> Dict[str, int]:
+        """Raw per-language score for one text"""
+        return self.score_many([text])[0]
+
+    def score_many(self, texts: List[str]) -> List[Dict[str, int]]:
+        """Raw per-language scores for a batch of texts"""
+        results = []
+        for text, script_counts in zip(texts, self._count_scripts(texts)):
+            scores: Dict[str, int] = {}
+            for match in self.word_regex.findall(text):
+                for lang_code, weight in self.word_weights.get(match.lower(), {}).items():
+                    scores[lang_code] = scores.get(lang_code, 0) + weight
+            for (_, _, lang_code), count in zip(self.script_ranges, script_counts):
+                if count:
+                    scores[lang_code] = scores.get(lang_code, 0) + 2 * count
+            results.append(scores)
+        return results
+
+    def _count_scripts(self, texts: List[str]) -> List[List[int]]:
+        """Characters per script range for each text"""
+        if len(texts) > 1:
+            try:
+                import numpy as np
+                return self._count_scripts_numpy(texts, np)
+            except ImportError:
+                pass
+        return [self._count_scripts_one(text) for text in texts]
+
+    def _count_scripts_one(self, text: str) -> List[int]:
+        counts = [0] * len(self.script_ranges)
+        if text.isascii():
+            return counts
+
+        # One scan in C picks out every in-range character; only the distinct
+        # ones are classified in Python
+        for char, count in Counter(self.script_regex.findall(text)).items():
+            for i, (low, high, _) in enumerate(self.script_ranges):
+                if low <= ord(char) <= high:
+                    counts[i] += count
+        return counts
+
+    def _count_scripts_numpy(self, texts: List[str], np) -> List[List[int]]:
+        # One array of code points for the whole batch; a running count per
+        # range gives each text's count as the difference at its boundaries
+        lengths = np.array([len(text) for text in texts])
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        code_points = np.frombuffer(''.join(texts).encode('utf-32-le'), dtype=np.uint32)
+
+        counts = np.zeros((len(texts), len(self.script_ranges)), dtype=np.int64)
+        for i, (low, high, _) in enumerate(self.script_ranges):
+            running = np.concatenate(([0], np.cumsum((code_points >= low) & (code_points <= high))))
+            counts[:, i] = running[ends] - running[starts]
+        return counts.tolist()
+
+def normalize_for_cache(text: str) -> str:
+    """Cache key for a message: NFC, case folded, whitespace collapsed"""
+    return ' '.join(unicodedata.normalize('NFC', text).casefold().split())[:500]
+
+class DetectedLanguage(NamedTuple):
+    language: str
+    confident: bool  # From the LLM or a strong pattern match, safe to keep for the conversation
+
 class LanguageDetector:
     """
     Service for detecting the language of text messages.
@@ -54,49 +183,118 @@ class LanguageDetector:
         'low': 0.4
     }
 
-    def __init__(self):
-        self.use_openai = bool(settings.openai_api_key)
-        if self.use_openai:
-            try:
-                import openai
-                self.openai_client = openai.OpenAI(api_key=settings.openai_api_key)
-            except ImportError:
-                logger.warning("OpenAI package not available, falling back to pattern matching")
-                self.use_openai = False
+    # Posterior probability above which the n-gram classifier is trusted
+    # without asking the LLM (see benchmarks/bench_language_classifier.py)
+    CLASSIFIER_THRESHOLD = 0.9
+
+    # The classifier's small corpus makes it confidently wrong on names,
+    # places and email addresses, so it is only trusted on text at least this
+    # long, and only when the patterns agree with it
+    CLASSIFIER_MIN_WORDS = 3
+    CLASSIFIER_MIN_LETTERS = 15
+
+    # Hinglish has no entry in LANGUAGE_PATTERNS; one of these common words
+    # stands in for a pattern match
+    HINGLISH_WORDS = frozenset({
+        'hai', 'hain', 'nahi', 'nahin', 'kya', 'kyun', 'kaise', 'kitna', 'kitni', 'mujhe', 'mera', 'meri',
+        'mere', 'hamare', 'humein', 'aap', 'aapka', 'kar', 'karna', 'raha', 'rahi', 'chahiye', 'tha', 'thi',
+        'ka', 'ki', 'ke', 'ko', 'se', 'bhi', 'haan', 'ji', 'kal', 'abhi', 'gaya', 'diya', 'wapas', 'paise'
+    })
+
+    def __init__(self, cache_size: Optional[int] = None):
+        self.matcher = LanguagePatternMatcher(self.LANGUAGE_PATTERNS)
+        self.classifier = get_language_classifier(settings.language_model_path or None)
+        self.cache_size = settings.language_cache_size if cache_size is None else cache_size
+        self._cache: "OrderedDict[str, DetectedLanguage]" = OrderedDict()
+        self.llm = get_llm_gateway()
+        if self.llm is None:
+            logger.warning("No LLM backend available, falling back to pattern matching")
 
     async def detect_language(self, text: str) -> str:
         """
         Detect the language of the input text.
         Returns ISO 639-1 language code (e.g., 'en', 'es', 'fr').
         """
+        return (await self.detect(text)).language
+
+    async def detect(self, text: str) -> DetectedLanguage:
+        """
+        Detect the language of the input text, noting how reliable the answer is.
+        Cascade: cache, then the local n-gram classifier when the text is long
+        enough and the patterns agree, then a confident pattern match, then the
+        LLM gateway, then a weak pattern match, then English.
+        Only the first three avoid a network call. The classifier is the only
+        step that recognises Hinglish ('hi-Latn').
+        """
         if not text or not text.strip():
-            return 'en'  # Default to English for empty text
+            return DetectedLanguage('en', False)  # Default to English for empty text
 
         text = text.strip()
+        key = normalize_for_cache(text)
+        cached = self._cache_get(key)
+        if cached:
+            return cached
+
+        pattern_lang, confidence = self._score_patterns(text)
 
-        # Try OpenAI if available (most accurate)
-        if self.use_openai:
+        # A confident local answer makes the LLM round trip unnecessary
+        if self.classifier and self._classifier_applies(text):
+            classified_lang, probability = self.classifier.classify(text)
+            if probability >= self.CLASSIFIER_THRESHOLD and self._patterns_agree(text, classified_lang, pattern_lang):
+                return self._cache_put(key, DetectedLanguage(classified_lang, True))
+
+        if pattern_lang and confidence >= self.CONFIDENCE_THRESHOLDS['high']:
+            return self._cache_put(key, DetectedLanguage(pattern_lang, True))
+
+        # Try the LLM if available (most accurate)
+        if self.llm:
             try:
-                openai_result = await self._detect_with_openai(text)
-                if openai_result and openai_result != 'unknown':
-                    return openai_result
+                llm_result = await self._detect_with_llm(text)
+                if llm_result and llm_result != 'unknown':
+                    return self._cache_put(key, DetectedLanguage(llm_result, True))
             except Exception as e:
-                logger.warning(f"OpenAI language detection failed: {e}")
+                logger.warning(f"LLM language detection failed: {e}")
 
         # Fallback to pattern matching
-        pattern_result = self._detect_with_patterns(text)
-        if pattern_result:
-            return pattern_result
+        if pattern_lang and confidence >= self.CONFIDENCE_THRESHOLDS['low']:
+            return self._cache_put(key, DetectedLanguage(pattern_lang, False))
 
-        # Final fallback to English
+        # Final fallback to English; not cached so a later attempt can still reach the LLM
         logger.info(f"Could not detect language for text: '{text[:50]}...', defaulting to 'en'")
-        return 'en'
+        return DetectedLanguage('en', False)
+
+    def _classifier_applies(self, text: str) -> bool:
+        """Whether the text is long enough for the classifier to be trusted"""
+        return (
+            len(text.split()) >= self.CLASSIFIER_MIN_WORDS
+            or sum(char.isalpha() for char in text) >= self.CLASSIFIER_MIN_LETTERS
+        )
+
+    def _patterns_agree(self, text: str, classified_lang: str, pattern_lang: Optional[str]) -> bool:
+        """Whether the pattern matcher supports the classifier's answer"""
+        if classified_lang == 'hi-Latn':
+            return any(word in self.HINGLISH_WORDS for word in re.findall(r'\w+', text.lower()))
+        return classified_lang == pattern_lang
+
+    def _cache_get(self, key: str) -> Optional[DetectedLanguage]:
+        detected = self._cache.get(key)
+        if detected:
+            self._cache.move_to_end(key)
+        return detected
+
+    def _cache_put(self, key: str, detected: DetectedLanguage) -> DetectedLanguage:
+        if self.cache_size > 0:
+            self._cache[key] = detected
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return detected
 
-    async def _detect_with_openai(self, text: str) -> Optional[str]:
-        """Detect language using OpenAI API"""
+    async def _detect_with_llm(self, text: str) -> Optional[str]:
+        """Detect language through the shared LLM gateway"""
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
+            response = await self.llm.complete(
+                feature="language_detector",
                 messages=[
                     {
                         "role": "system",
@@ -111,7 +309,7 @@ class LanguageDetector:
                 temperature=0
             )
 
-            detected_lang = response.choices[0].message.content.strip().lower()
+            detected_lang = response.text.strip().lower()
 
             # Validate the response is a valid language code
             if len(detected_lang) == 2 and detected_lang in self.LANGUAGE_PATTERNS:
@@ -119,48 +317,62 @@ class LanguageDetector:
             elif detected_lang == 'unknown':
                 return None
 
-            logger.warning(f"OpenAI returned invalid language code: {detected_lang}")
+            logger.warning(f"LLM returned invalid language code: {detected_lang}")
             return None
 
+        except LLMUnavailableError as e:
+            # Timed out or the breaker is open; patterns take over
+            logger.info(f"LLM language detection unavailable: {e}")
+            return None
         except Exception as e:
-            logger.error(f"OpenAI language detection error: {e}")
+            logger.error(f"LLM language detection error: {e}")
             return None
 
     def _detect_with_patterns(self, text: str) -> Optional[str]:
         """Detect language using pattern matching"""
-        scores = {}
+        lang_code, confidence = self._score_patterns(text)
+        if lang_code and confidence >= self.CONFIDENCE_THRESHOLDS['low']:
+            logger.info(f"Pattern detection: {lang_code} with confidence {confidence:.3f}")
+            return lang_code
+        return None
 
-        # Check each language's patterns
-        for lang_code, patterns in self.LANGUAGE_PATTERNS.items():
-            score = 0
-            total_patterns = len(patterns)
+    def detect_many(self, texts: List[str]) -> List[str]:
+        """
+        Detect the language of many texts with pattern matching only.
+        Meant for analytics backfills: no LLM calls, script ranges are
+        counted for the whole batch at once, and undetected texts get 'en'.
+        """
+        stripped = [text.strip() if text else '' for text in texts]
+        results = []
+        for text, raw_scores in zip(stripped, self.matcher.score_many(stripped)):
+            lang_code, confidence = self._best_language(text, raw_scores)
+            results.append(lang_code if lang_code and confidence >= self.CONFIDENCE_THRESHOLDS['low'] else 'en')
+        return results
 
-            for pattern in patterns:
-                matches = len(re.findall(pattern, text, re.IGNORECASE | re.UNICODE))
-                if matches > 0:
-                    # Weight different pattern types differently
-                    if pattern.startswith(r'[\u'):  # Unicode range patterns
-                        score += matches * 2  # Higher weight for character sets
-                    else:
-                        score += matches
+    def _score_patterns(self, text: str) -> Tuple[Optional[str], float]:
+        """Best pattern-matched language and its confidence"""
+        return self._best_language(text, self.matcher.score(text))
 
+    def _best_language(self, text: str, raw_scores: Dict[str, int]) -> Tuple[Optional[str], float]:
+        """Normalise raw pattern scores and return the best language"""
+        scores = {}
+        # Ties go to the language listed first, as when scoring pattern by pattern
+        for lang_code, patterns in self.LANGUAGE_PATTERNS.items():
+            score = raw_scores.get(lang_code, 0)
             if score > 0:
                 # Normalize score by text length and number of patterns
-                normalized_score = score / (len(text) + 1) * (score / total_patterns)
-                scores[lang_code] = normalized_score
+                scores[lang_code] = score / (len(text) + 1) * (score / len(patterns))
 
-        # Return language with highest score if above threshold
-        if scores:
-            best_lang = max(scores.items(), key=lambda x: x[1])
-            if best_lang[1] >= self.CONFIDENCE_THRESHOLDS['low']:
-                logger.info(f"Pattern detection: {best_lang[0]} with confidence {best_lang[1]:.3f}")
-                return best_lang[0]
-
-        return None
+        if not scores:
+            return None, 0.0
+        return max(scores.items(), key=lambda x: x[1])
 
     def get_supported_languages(self) -> List[str]:
         """Get list of supported language codes"""
-        return list(self.LANGUAGE_PATTERNS.keys())
+        languages = list(self.LANGUAGE_PATTERNS.keys())
+        if self.classifier:
+            languages += [label for label in self.classifier.labels if label not in languages]
+        return languages
 
     def get_language_name(self, lang_code: str) -> str:
         """Get full language name from language code"""
@@ -172,9 +384,14 @@ class LanguageDetector:
             'pt': 'Portuguese',
             'ar': 'Arabic',
             'hi': 'Hindi',
-            'zh': 'Chinese'
+            'zh': 'Chinese',
+            'hi-Latn': 'Hinglish'
         }
         return language_names.get(lang_code, 'Unknown')
 
 # Global language detector instance
-language_detector = LanguageDetector()
\ No newline at end of file
+language_detector = LanguageDetector()
+
+async def detect_language(text: str) -> str:
+    """Detect the language of a text with the global detector"""
+    return await language_detector.detect_language(text)
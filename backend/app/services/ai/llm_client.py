@@ -0,0 +1,534 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import logging
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+Messages = List[Dict[str, str]]
+
+class LLMUnavailableError(Exception):
+    """The provider is failing, too slow, or the circuit breaker is open; use a local fallback"""
+
+class LLMTimeoutError(LLMUnavailableError):
+    """A call missed its deadline"""
+
+class LLMResponse(NamedTuple):
+    text: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    cached: bool = False
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) for budgeting and the fake backend"""
+    return max(1, len(text) // 4)
+
+_encoding = None
+_encoding_loaded = False
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken when it is installed, otherwise estimated"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.info(f"tiktoken not available, estimating token counts: {e}")
+    if _encoding is None:
+        return estimate_tokens(text)
+    return len(_encoding.encode(text, disallowed_special=()))
+
+class LLMBackend:
+    """Base class for LLM providers behind the gateway"""
+
+    async def complete(self, model: str, messages: Messages, params: Dict[str, Any]) -> LLMResponse:
+        raise NotImplementedError
+
+class OpenAIBackend(LLMBackend):
+    """Chat completions through the OpenAI API"""
+
+    def __init__(self, api_key: str):
+        import openai
+        self.client = openai.AsyncOpenAI(api_key=api_key)
+
+    async def complete(self, model: str, messages: Messages, params: Dict[str, Any]) -> LLMResponse:
+        response = await self.client.chat.completions.create(model=model, messages=messages, **params)
+        usage = response.usage
+        return LLMResponse(
+            response.choices[0].message.content or "",
+            response.model,
+            usage.prompt_tokens if usage else 0,
+            usage.completion_tokens if usage else 0
+        )
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Deterministic local stand-in for tests and benchmarks.
+    The reply is a pure function of the request: `responder(model, messages,
+    params)` when given, otherwise the start of the last user message. An
+    optional latency per call models the network.
+    """
+
+    def __init__(self, latency: float = 0.0, responder: Optional[Callable[[str, Messages, Dict[str, Any]], str]] = None):
+        self.latency = latency
+        self.responder = responder
+        self.calls = 0
+
+    async def complete(self, model: str, messages: Messages, params: Dict[str, Any]) -> LLMResponse:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.responder:
+            text = self.responder(model, messages, params)
+        else:
+            prompt = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+            text = prompt[:4 * params.get("max_tokens", 256)]
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        return LLMResponse(text, model, prompt_tokens, estimate_tokens(text))
+
+def percentile(samples: Sequence[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of unsorted samples, None when there are none"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+class FeatureStats:
+    """Call, token and latency accounting for one feature"""
+
+    def __init__(self, window: int = 1000):
+        self.calls = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.rejected = 0  # refused while the circuit breaker was open
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latencies: Deque[float] = deque(maxlen=window)  # seconds, provider calls only
+
+    def as_dict(self) -> dict:
+        samples = list(self.latencies)
+
+        def ms(pct: float) -> Optional[float]:
+            value = percentile(samples, pct)
+            return None if value is None else round(value * 1000, 1)
+
+        return {
+            "calls": self.calls,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "p50_ms": ms(0.50),
+            "p95_ms": ms(0.95),
+            "p99_ms": ms(0.99),
+        }
+
+class CircuitBreaker:
+    """
+    Stops calling a degraded provider.
+    Closed: calls flow and outcomes are kept for the last `window` calls; once
+    at least `min_calls` are recorded and `failure_rate` of them failed (errors
+    and timeouts), the breaker opens. Open: calls are refused for `cooldown`
+    seconds. Half-open: one probe call is let through; success closes the
+    breaker, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_rate: float = 0.5, min_calls: int = 20, window: int = 100, cooldown: float = 30.0):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self.opened = 0  # times the breaker has tripped
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a provider call may start now"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record(self, success: bool):
+        if self._state == self.HALF_OPEN:
+            self._probing = False
+            if success:
+                self._state = self.CLOSED
+                self._outcomes.clear()
+            else:
+                self._trip()
+            return
+        if self._state == self.OPEN:
+            # A call that started before the breaker opened
+            return
+
+        self._outcomes.append(success)
+        if len(self._outcomes) >= self.min_calls:
+            failures = self._outcomes.count(False)
+            if failures >= self.failure_rate * len(self._outcomes):
+                self._trip()
+
+    def abandon(self):
+        """Release the half-open probe if it ended without reaching the provider"""
+        if self._state == self.HALF_OPEN:
+            self._probing = False
+
+    def _trip(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.opened += 1
+        logger.warning(f"LLM circuit breaker opened for {self.cooldown:g}s")
+
+    def as_dict(self) -> dict:
+        state = self.state
+        return {
+            "state": state,
+            "opened": self.opened,
+            "recent_calls": len(self._outcomes),
+            "recent_failures": self._outcomes.count(False),
+            "retry_in": round(max(0.0, self.cooldown - (time.monotonic() - self._opened_at)), 1) if state == self.OPEN else None,
+        }
+
+class LLMGateway:
+    """
+    The one way AI services reach an LLM.
+    - Exact-match response cache keyed on (model, messages, params), LRU with TTL
+    - Single-flight: identical requests in flight share one provider call
+    - A global concurrency limit plus one per feature
+    - A deadline per call, and for latency-sensitive features a hedged second
+      request once the first has run past the feature's p95 latency
+    - A circuit breaker that refuses calls while the provider is degraded
+    - Token and latency accounting per feature
+    Failures a caller can work around (timeouts, an open breaker, provider
+    errors) are raised as LLMUnavailableError.
+    """
+
+    def __init__(
+        self,
+        backend: LLMBackend,
+        default_model: str,
+        max_concurrency: int = 16,
+        feature_concurrency: Optional[Dict[str, int]] = None,
+        cache_size: int = 10000,
+        cache_ttl: float = 24 * 60 * 60,
+        timeout: float = 30.0,
+        feature_timeouts: Optional[Dict[str, float]] = None,
+        hedge_features: Sequence[str] = (),
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.backend = backend
+        self.default_model = default_model
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.timeout = timeout
+        self.feature_timeouts = feature_timeouts or {}
+        self.hedge_features = set(hedge_features)
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker()
+        self._global_limit = asyncio.Semaphore(max_concurrency)
+        self._feature_concurrency = feature_concurrency or {}
+        self._feature_limits: Dict[str, asyncio.Semaphore] = {}
+        self._cache: "OrderedDict[str, Tuple[float, LLMResponse]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._stats: Dict[str, FeatureStats] = {}
+
+    @staticmethod
+    def cache_key(model: str, messages: Messages, params: Dict[str, Any]) -> str:
+        payload = json.dumps([model, messages, params], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _feature_stats(self, feature: str) -> FeatureStats:
+        stats = self._stats.get(feature)
+        if stats is None:
+            stats = self._stats[feature] = FeatureStats()
+        return stats
+
+    def _feature_limit(self, feature: str) -> Optional[asyncio.Semaphore]:
+        limit = self._feature_limits.get(feature)
+        if limit is None and feature in self._feature_concurrency:
+            limit = self._feature_limits[feature] = asyncio.Semaphore(self._feature_concurrency[feature])
+        return limit
+
+    def _hedge_delay(self, feature: str, stats: FeatureStats) -> Optional[float]:
+        """Seconds after which to hedge, or None when the feature is not hedged or has too few samples"""
+        if feature not in self.hedge_features or len(stats.latencies) < self.hedge_min_samples:
+            return None
+        return percentile(stats.latencies, self.hedge_quantile)
+
+    def _cache_get(self, key: str) -> Optional[LLMResponse]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return response
+
+    def _cache_put(self, key: str, response: LLMResponse):
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = (time.monotonic() + self.cache_ttl, response)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def complete(
+        self,
+        messages: Messages,
+        feature: str,
+        model: Optional[str] = None,
+        use_cache: bool = True,
+        timeout: Optional[float] = None,
+        **params
+    ) -> LLMResponse:
+        """
+        Run a chat completion for `feature` (summarizer, entity_extractor, ...).
+        `timeout` is the deadline in seconds, including time queued behind the
+        concurrency limits; it defaults to the feature's configured timeout.
+        `params` are passed to the provider (temperature, max_tokens, ...) and
+        are part of the cache key.
+        """
+        model = model or self.default_model
+        stats = self._feature_stats(feature)
+        stats.calls += 1
+        key = self.cache_key(model, messages, params)
+        timeout = timeout if timeout is not None else self.feature_timeouts.get(feature, self.timeout)
+        deadline = asyncio.get_running_loop().time() + timeout
+
+        if use_cache:
+            cached = self._cache_get(key)
+            if cached is not None:
+                stats.cache_hits += 1
+                return cached._replace(cached=True)
+
+        in_flight = self._in_flight.get(key)
+        while in_flight is not None:
+            stats.coalesced += 1
+            try:
+                remaining = max(0.0, deadline - asyncio.get_running_loop().time())
+                return await asyncio.wait_for(asyncio.shield(in_flight), remaining)
+            except asyncio.TimeoutError:
+                stats.timeouts += 1
+                raise LLMTimeoutError(f"{feature} call timed out after {timeout}s")
+            except asyncio.CancelledError:
+                if not in_flight.cancelled():
+                    raise
+                # The leading call was cancelled by its own caller, not this one;
+                # make the call here, or join whichever call replaced it
+                logger.info(f"Coalesced {feature} call lost its leader, retrying")
+                in_flight = self._in_flight.get(key)
+
+        if not self.breaker.allow():
+            stats.rejected += 1
+            raise LLMUnavailableError("LLM circuit breaker is open")
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            response = await self._call(feature, stats, model, messages, params, deadline)
+            if use_cache:
+                self._cache_put(key, response)
+            future.set_result(response)
+            return response
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting; mark the exception retrieved
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    @asynccontextmanager
+    async def _slot(self, feature: str, deadline: float) -> AsyncIterator[None]:
+        """Hold the feature and global concurrency slots, waiting no longer than the deadline"""
+        loop = asyncio.get_running_loop()
+        feature_limit = self._feature_limit(feature)
+        acquired = []
+        try:
+            for limit in (feature_limit, self._global_limit):
+                if limit is None:
+                    continue
+                await asyncio.wait_for(limit.acquire(), max(0.0, deadline - loop.time()))
+                acquired.append(limit)
+            yield
+        finally:
+            for limit in acquired:
+                limit.release()
+
+    async def _call(
+        self,
+        feature: str,
+        stats: FeatureStats,
+        model: str,
+        messages: Messages,
+        params: Dict[str, Any],
+        deadline: float
+    ) -> LLMResponse:
+        try:
+            async with self._slot(feature, deadline):
+                response = await self._hedged_call(feature, stats, model, messages, params, deadline)
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            raise LLMTimeoutError(f"{feature} call missed its deadline")
+        finally:
+            self.breaker.abandon()
+
+        stats.prompt_tokens += response.prompt_tokens
+        stats.completion_tokens += response.completion_tokens
+        return response
+
+    async def _hedged_call(
+        self,
+        feature: str,
+        stats: FeatureStats,
+        model: str,
+        messages: Messages,
+        params: Dict[str, Any],
+        deadline: float
+    ) -> LLMResponse:
+        """
+        Call the provider, and if the call is still running after the hedge
+        delay start a second identical one; the first to succeed wins and the
+        other is cancelled. The hedge takes a global slot only if one is free,
+        so hedging never queues ahead of new work.
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        hedge_delay = self._hedge_delay(feature, stats)
+        attempts = [asyncio.ensure_future(self.backend.complete(model, messages, params))]
+        hedge = None
+        error: Optional[BaseException] = None
+
+        try:
+            while attempts:
+                wait_until = deadline
+                if hedge_delay is not None and hedge is None:
+                    wait_until = min(deadline, start + hedge_delay)
+                done, _ = await asyncio.wait(attempts, timeout=max(0.0, wait_until - loop.time()), return_when=asyncio.FIRST_COMPLETED)
+
+                for attempt in done:
+                    attempts.remove(attempt)
+                    if attempt.exception() is None:
+                        stats.latencies.append(loop.time() - start)
+                        if attempt is hedge:
+                            stats.hedge_wins += 1
+                        self.breaker.record(True)
+                        return attempt.result()
+                    error = attempt.exception()
+
+                if loop.time() >= deadline:
+                    self.breaker.record(False)
+                    raise asyncio.TimeoutError()
+                if hedge is None and hedge_delay is not None and attempts and not self._global_limit.locked():
+                    await self._global_limit.acquire()
+                    hedge = asyncio.ensure_future(self.backend.complete(model, messages, params))
+                    hedge.add_done_callback(lambda _: self._global_limit.release())
+                    attempts.append(hedge)
+                    stats.hedges += 1
+                elif hedge is None:
+                    # No free slot for a hedge; wait for the first call until the deadline
+                    hedge_delay = None
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+        stats.errors += 1
+        self.breaker.record(False)
+        raise LLMUnavailableError(f"{feature} call failed: {error}") from error
+
+    def stats(self) -> dict:
+        features = {feature: stats.as_dict() for feature, stats in self._stats.items()}
+        return {
+            "backend": type(self.backend).__name__,
+            "breaker": self.breaker.as_dict(),
+            "cache_entries": len(self._cache),
+            "in_flight": len(self._in_flight),
+            "features": features,
+        }
+
+def create_llm_backend(backend: Optional[str] = None) -> Optional[LLMBackend]:
+    """Build the LLM backend selected by configuration, or None if it is unavailable"""
+    backend = (backend or settings.llm_backend).lower()
+
+    if backend == "fake":
+        return FakeLLMBackend(settings.llm_fake_latency)
+    if backend == "openai":
+        if not settings.openai_api_key:
+            return None
+        try:
+            return OpenAIBackend(settings.openai_api_key)
+        except ImportError:
+            logger.warning("OpenAI package not available, LLM features disabled")
+            return None
+
+    raise ValueError(f"Unknown LLM backend: {backend}")
+
+_llm_gateway: Optional[LLMGateway] = None
+_llm_gateway_created = False
+
+def get_llm_gateway() -> Optional[LLMGateway]:
+    """Get the process-wide LLM gateway, or None when no backend is available"""
+    global _llm_gateway, _llm_gateway_created
+    if not _llm_gateway_created:
+        _llm_gateway_created = True
+        backend = create_llm_backend()
+        if backend is not None:
+            _llm_gateway = LLMGateway(
+                backend,
+                settings.llm_model,
+                max_concurrency=settings.llm_max_concurrency,
+                feature_concurrency=settings.llm_feature_concurrency,
+                cache_size=settings.llm_cache_size,
+                cache_ttl=settings.llm_cache_ttl,
+                timeout=settings.llm_timeout,
+                feature_timeouts=settings.llm_feature_timeouts,
+                hedge_features=settings.llm_hedge_features,
+                hedge_quantile=settings.llm_hedge_quantile,
+                breaker=CircuitBreaker(
+                    failure_rate=settings.llm_breaker_failure_rate,
+                    min_calls=settings.llm_breaker_min_calls,
+                    cooldown=settings.llm_breaker_cooldown
+                )
+            )
+            logger.info(f"Using {type(backend).__name__} for LLM calls")
+    return _llm_gateway
@@ -0,0 +1,207 @@
+import math
+import os
+import re
+import struct
+import unicodedata
+import zlib
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+MODEL_MAGIC = b"NGLM"
+MODEL_VERSION = 1
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(__file__), "models", "langid_ngram.bin")
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(__file__), "data", "langid")
+
+# Header: magic, version, max n-gram order, classes, log2(buckets), score scale
+_HEADER = struct.Struct("<4sHHHHH")
+
+# Anything that is not a letter: digits, punctuation, symbols. Devanagari and
+# Arabic ranges are listed because their vowel signs are not \w
+_NON_LETTERS = re.compile(r"[^\w\u0900-\u0963\u0971-\u097F\u0600-\u0660\u066E-\u06FF]+|[\d_]+")
+
+def normalize_text(text: str) -> str:
+    """NFC, case folded, letters only, padded with spaces to mark word edges"""
+    text = _NON_LETTERS.sub(" ", unicodedata.normalize("NFC", text).casefold())
+    return f" {' '.join(text.split())} "
+
+def ngram_buckets(text: str, max_order: int, bucket_mask: int) -> Counter:
+    """Hashed character n-grams (orders 1..max_order) of normalised text, with counts"""
+    # Fixed-width code units, so every n-gram is a plain byte slice
+    data = text.encode("utf-32-le")
+    crc32 = zlib.crc32
+    buckets: Counter = Counter()
+    for order in range(1, max_order + 1):
+        width = 4 * order
+        buckets.update(crc32(data[i:i + width]) & bucket_mask for i in range(0, len(data) - width + 4, 4))
+    # The padding space on its own says nothing about the language
+    buckets.pop(crc32(" ".encode("utf-32-le")) & bucket_mask, None)
+    return buckets
+
+class NgramLanguageClassifier:
+    """
+    Multinomial Naive Bayes over hashed character n-grams.
+    The model is one int16 table of scaled log probabilities, buckets x
+    classes, so it loads straight from disk into an array and scoring a
+    message is a handful of table lookups. Covers the pattern languages plus
+    romanised Hindi ("hi-Latn", Hinglish).
+    """
+
+    def __init__(self, labels: List[str], table: array, max_order: int, bucket_bits: int, scale: int):
+        self.labels = labels
+        self.table = table
+        self.max_order = max_order
+        self.bucket_bits = bucket_bits
+        self.bucket_mask = (1 << bucket_bits) - 1
+        self.scale = scale
+        self._rows = None
+
+        try:
+            import numpy as np
+            self._rows = np.frombuffer(table.tobytes(), dtype="<i2").reshape(-1, len(labels))
+        except ImportError:
+            pass
+
+    def scores(self, text: str) -> List[float]:
+        """Log likelihood of the text under each class, in natural log units"""
+        buckets = ngram_buckets(normalize_text(text), self.max_order, self.bucket_mask)
+        n_classes = len(self.labels)
+
+        if self._rows is not None:
+            import numpy as np
+            index = np.fromiter(buckets.keys(), dtype=np.int64, count=len(buckets))
+            counts = np.fromiter(buckets.values(), dtype=np.int64, count=len(buckets))
+            totals = counts @ self._rows[index].astype(np.int64)
+            return [float(total) / self.scale for total in totals]
+
+        totals = [0] * n_classes
+        table = self.table
+        for bucket, count in buckets.items():
+            row = bucket * n_classes
+            for c in range(n_classes):
+                totals[c] += table[row + c] * count
+        return [total / self.scale for total in totals]
+
+    def classify(self, text: str) -> Tuple[str, float]:
+        """
+        Most likely language and its posterior probability.
+        Overlapping n-grams of every order are not independent evidence, so
+        log likelihoods are divided by the order before normalising; this
+        keeps the probability usable as a confidence.
+        """
+        scores = [score / self.max_order for score in self.scores(text)]
+        best = max(range(len(scores)), key=scores.__getitem__)
+        total = sum(math.exp(score - scores[best]) for score in scores)
+        return self.labels[best], 1.0 / total
+
+    def save(self, path: str):
+        """Write the model as a header, the label list and the raw int16 table"""
+        labels = "\n".join(self.labels).encode("utf-8")
+        table = array("h", self.table)
+        if struct.pack("=h", 1) != struct.pack("<h", 1):
+            table.byteswap()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(MODEL_MAGIC, MODEL_VERSION, self.max_order, len(self.labels), self.bucket_bits, self.scale))
+            f.write(struct.pack("<H", len(labels)))
+            f.write(labels)
+            f.write(table.tobytes())
+
+    @classmethod
+    def load(cls, path: str) -> "NgramLanguageClassifier":
+        """Load a model written by save()"""
+        with open(path, "rb") as f:
+            data = f.read()
+
+        magic, version, max_order, n_classes, bucket_bits, scale = _HEADER.unpack_from(data)
+        if magic != MODEL_MAGIC or version != MODEL_VERSION:
+            raise ValueError(f"Not a version {MODEL_VERSION} n-gram language model: {path}")
+
+        offset = _HEADER.size
+        (labels_size,) = struct.unpack_from("<H", data, offset)
+        offset += 2
+        labels = data[offset:offset + labels_size].decode("utf-8").split("\n")
+        offset += labels_size
+
+        table = array("h")
+        table.frombytes(data[offset:])
+        if struct.pack("=h", 1) != struct.pack("<h", 1):
+            table.byteswap()
+        if len(labels) != n_classes or len(table) != n_classes << bucket_bits:
+            raise ValueError(f"Corrupt n-gram language model: {path}")
+
+        return cls(labels, table, max_order, bucket_bits, scale)
+
+    @classmethod
+    def train(
+        cls,
+        samples: Iterable[Tuple[str, str]],
+        max_order: int = 3,
+        bucket_bits: int = 14,
+        alpha: float = 0.1,
+        scale: int = 256
+    ) -> "NgramLanguageClassifier":
+        """Fit a model from (text, label) pairs with additive smoothing"""
+        bucket_mask = (1 << bucket_bits) - 1
+        counts: Dict[str, Counter] = {}
+        for text, label in samples:
+            counts.setdefault(label, Counter()).update(
+                ngram_buckets(normalize_text(text), max_order, bucket_mask)
+            )
+
+        labels = sorted(counts)
+        n_buckets = 1 << bucket_bits
+        table = array("h", bytes(2 * n_buckets * len(labels)))
+        for c, label in enumerate(labels):
+            class_counts = counts[label]
+            denominator = sum(class_counts.values()) + alpha * n_buckets
+            for bucket in range(n_buckets):
+                log_prob = math.log((class_counts.get(bucket, 0) + alpha) / denominator)
+                table[bucket * len(labels) + c] = max(-32768, round(log_prob * scale))
+
+        return cls(labels, table, max_order, bucket_bits, scale)
+
+def load_corpus(corpus_dir: str = DEFAULT_CORPUS_DIR) -> List[Tuple[str, str]]:
+    """Training samples from <label>.txt files, one message per line"""
+    samples = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if not name.endswith(".txt"):
+            continue
+        label = name[:-4]
+        with open(os.path.join(corpus_dir, name), encoding="utf-8") as f:
+            samples.extend((line.strip(), label) for line in f if line.strip())
+    return samples
+
+_classifier: Optional[NgramLanguageClassifier] = None
+_classifier_loaded = False
+
+def get_language_classifier(path: Optional[str] = None) -> Optional[NgramLanguageClassifier]:
+    """Get the process-wide classifier, or None if no model file is available"""
+    global _classifier, _classifier_loaded
+    if not _classifier_loaded:
+        _classifier_loaded = True
+        try:
+            _classifier = NgramLanguageClassifier.load(path or DEFAULT_MODEL_PATH)
+            logger.info(f"Loaded n-gram language model with classes {_classifier.labels}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"N-gram language model unavailable: {e}")
+    return _classifier
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the n-gram language model from a corpus directory")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR)
+    parser.add_argument("--out", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--max-order", type=int, default=3)
+    parser.add_argument("--bucket-bits", type=int, default=14)
+    parser.add_argument("--alpha", type=float, default=0.1)
+    args = parser.parse_args()
+
+    model = NgramLanguageClassifier.train(load_corpus(args.corpus), args.max_order, args.bucket_bits, args.alpha)
+    model.save(args.out)
+    print(f"Wrote {args.out} ({os.path.getsize(args.out)} bytes, classes: {', '.join(model.labels)})")
@@ -0,0 +1,350 @@
+import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Iterator, List, NamedTuple, Optional, Tuple, Union
+import logging
+from app.config import settings
+from app.services.ai.llm_client import LLMGateway, LLMUnavailableError, count_tokens, get_llm_gateway
+from app.services.document.pdf_pages import PageStream, numbered_pages
+
+logger = logging.getLogger(__name__)
+
+CHUNK_PROMPT = (
+    "You are a legal assistant. Summarize this excerpt of a legal document in at most "
+    "150 words. Keep the parties, claims, findings, dates, amounts, deadlines and orders; "
+    "leave out citations and procedural boilerplate."
+)
+
+COMBINE_PROMPT = (
+    "You are a legal assistant. These are summaries of consecutive parts of one legal "
+    "document, in order. Merge them into one summary of at most 250 words, keeping the "
+    "parties, claims, findings, dates, amounts, deadlines and orders."
+)
+
+FINAL_PROMPT = (
+    "You are helping a person with no legal training understand a legal document. In at "
+    "most 200 words of plain language, explain who is involved, what the dispute or request "
+    "is about, what was decided or asked for, and any dates, amounts or deadlines that matter "
+    "to them. Avoid legal jargon."
+)
+
+CHUNK_SUMMARY_TOKENS = 300
+# COMBINE_PROMPT allows 250 words, about 330 tokens of English
+COMBINE_SUMMARY_TOKENS = 450
+FINAL_SUMMARY_TOKENS = 400
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?;।])\s+")
+
+class Chunk(NamedTuple):
+    first_page: int
+    last_page: int
+    text: str
+    tokens: int
+
+    @property
+    def label(self) -> str:
+        if self.first_page == self.last_page:
+            return f"Page {self.first_page}"
+        return f"Pages {self.first_page}-{self.last_page}"
+
+def _split_oversized(text: str, max_tokens: int) -> Iterator[Tuple[str, int]]:
+    """Split a paragraph over the budget at sentence ends, then between words"""
+    for sentence in _SENTENCE_END.split(text):
+        tokens = count_tokens(sentence)
+        if tokens <= max_tokens:
+            yield sentence, tokens
+            continue
+        words = sentence.split()
+        # Words per piece from the sentence's own token density
+        step = max(1, len(words) * max_tokens // tokens)
+        for start in range(0, len(words), step):
+            piece = " ".join(words[start:start + step])
+            yield piece, count_tokens(piece)
+
+def _paragraphs(text: str, max_tokens: int) -> Iterator[Tuple[str, int]]:
+    """(paragraph, tokens) for a page, none of them over `max_tokens`"""
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = count_tokens(paragraph)
+        if tokens <= max_tokens:
+            yield paragraph, tokens
+        else:
+            yield from _split_oversized(paragraph, max_tokens)
+
+def iter_chunks(source: Union[str, PageStream], max_tokens: int) -> Iterator[Chunk]:
+    """
+    Pack a document's paragraphs into chunks of at most `max_tokens`.
+    Paragraphs never span chunks, and a chunk that is at least three quarters
+    full ends at the page break rather than carrying on into the next page.
+    Pages are read one at a time, so only the current chunk is in memory.
+    """
+    parts: List[str] = []
+    tokens = 0
+    first_page = last_page = 0
+
+    def flush() -> Chunk:
+        nonlocal parts, tokens
+        chunk = Chunk(first_page, last_page, "\n\n".join(parts), tokens)
+        parts, tokens = [], 0
+        return chunk
+
+    for page_number, page_text in numbered_pages(source):
+        for paragraph, paragraph_tokens in _paragraphs(page_text, max_tokens):
+            if parts and tokens + paragraph_tokens > max_tokens:
+                yield flush()
+            if not parts:
+                first_page = page_number
+            parts.append(paragraph)
+            tokens += paragraph_tokens
+            last_page = page_number
+        if tokens >= max_tokens * 0.75:
+            yield flush()
+    if parts:
+        yield flush()
+
+async def _next_chunk(chunks: Iterator[Chunk]) -> Optional[Chunk]:
+    """
+    Next chunk, or None at the end. Pages are read and token-counted in a
+    worker thread: tokenizing a long judgment would otherwise block the
+    event loop for as long as it takes.
+    """
+    return await asyncio.to_thread(next, chunks, None)
+
+def summary_cache_key(model: str, prompt: str, text: str) -> str:
+    payload = json.dumps([model, prompt, text], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class SummaryCache:
+    """
+    Base class for the chunk summary cache.
+    Holds every chunk and reduce result, so when one call of a long
+    document fails, reprocessing it only repeats that call.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def put(self, key: str, summary: str):
+        raise NotImplementedError
+
+class InMemorySummaryCache(SummaryCache):
+    """Per-process LRU of chunk summaries with TTL"""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        super().__init__(ttl_seconds)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, summary = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return summary
+
+    async def put(self, key: str, summary: str):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, summary)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+class RedisSummaryCache(SummaryCache):
+    """Chunk summaries shared across workers, so a retry on another worker reuses them"""
+
+    KEY_PREFIX = "chunksum:"
+
+    def __init__(self, redis_url: str, ttl_seconds: int):
+        super().__init__(ttl_seconds)
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(redis_url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._client.get(f"{self.KEY_PREFIX}{key}")
+
+    async def put(self, key: str, summary: str):
+        await self._client.set(f"{self.KEY_PREFIX}{key}", summary, ex=self.ttl_seconds)
+
+def create_summary_cache(backend: Optional[str] = None) -> SummaryCache:
+    """Build the chunk summary cache selected by configuration"""
+    backend = (backend or settings.summary_cache_backend).lower()
+
+    if backend == "redis":
+        return RedisSummaryCache(settings.redis_url, settings.summary_cache_ttl)
+    if backend == "memory":
+        return InMemorySummaryCache(settings.summary_cache_ttl, settings.summary_cache_size)
+
+    raise ValueError(f"Unknown summary cache backend: {backend}")
+
+_summary_cache: Optional[SummaryCache] = None
+
+def get_summary_cache() -> SummaryCache:
+    """Get the process-wide chunk summary cache"""
+    global _summary_cache
+    if _summary_cache is None:
+        _summary_cache = create_summary_cache()
+    return _summary_cache
+
+class MapReduceSummarizer:
+    """
+    Summarizes documents of any length within the model's context window.
+    Map: the document is split into token-budgeted chunks on page and
+    paragraph boundaries, and chunks are summarized concurrently, at most
+    `concurrency` at a time. Reduce: chunk summaries are combined in batches
+    that fit `reduce_tokens`, level by level, until one batch remains; that
+    one is turned into the plain-language summary. A document that fits in
+    one chunk takes a single call.
+    """
+
+    def __init__(
+        self,
+        llm: LLMGateway,
+        cache: Optional[SummaryCache] = None,
+        chunk_tokens: int = 3000,
+        reduce_tokens: int = 3000,
+        concurrency: int = 4
+    ):
+        self.llm = llm
+        self.cache = cache
+        self.chunk_tokens = chunk_tokens
+        # A reduce batch must hold at least two summaries to make progress
+        self.reduce_tokens = max(reduce_tokens, 3 * COMBINE_SUMMARY_TOKENS)
+        self.concurrency = concurrency
+
+    async def _summarize(self, prompt: str, text: str, max_tokens: int) -> str:
+        key = summary_cache_key(self.llm.default_model, prompt, text)
+        if self.cache is not None:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        response = await self.llm.complete(
+            feature="summarizer",
+            messages=[
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": text}
+            ],
+            max_tokens=max_tokens,
+            temperature=0
+        )
+        summary = response.text.strip()
+        if self.cache is not None:
+            await self.cache.put(key, summary)
+        return summary
+
+    async def _gather_bounded(self, jobs: AsyncIterator[Tuple[str, str, int]]) -> List[str]:
+        """
+        Run (prompt, text, max_tokens) summaries at most `concurrency` at a
+        time, in order. Jobs are pulled only when a slot frees up, so chunk
+        texts are not all read up front. Every job runs even if one fails, so
+        the successful ones are cached; the first failure is then raised.
+        """
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = []
+
+        async def run(prompt: str, text: str, max_tokens: int) -> str:
+            try:
+                return await self._summarize(prompt, text, max_tokens)
+            finally:
+                slots.release()
+
+        async for prompt, text, max_tokens in jobs:
+            await slots.acquire()
+            tasks.append(asyncio.create_task(run(prompt, text, max_tokens)))
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        failures = [result for result in results if isinstance(result, BaseException)]
+        if failures:
+            logger.warning(f"{len(failures)} of {len(results)} summary calls failed")
+            raise failures[0]
+        return results
+
+    def _batches(self, summaries: List[str]) -> List[List[str]]:
+        batches: List[List[str]] = [[]]
+        tokens = 0
+        for summary in summaries:
+            summary_tokens = count_tokens(summary)
+            if batches[-1] and tokens + summary_tokens > self.reduce_tokens:
+                batches.append([])
+                tokens = 0
+            batches[-1].append(summary)
+            tokens += summary_tokens
+        return batches
+
+    async def summarize(self, source: Union[str, PageStream]) -> Optional[str]:
+        chunks = iter_chunks(source, self.chunk_tokens)
+        first = await _next_chunk(chunks)
+        if first is None:
+            return None
+        second = await _next_chunk(chunks)
+        if second is None:
+            return await self._summarize(FINAL_PROMPT, first.text, FINAL_SUMMARY_TOKENS)
+
+        labels: List[str] = []
+
+        async def chunk_jobs() -> AsyncIterator[Tuple[str, str, int]]:
+            chunk = first
+            while chunk is not None:
+                labels.append(chunk.label)
+                yield CHUNK_PROMPT, chunk.text, CHUNK_SUMMARY_TOKENS
+                chunk = second if chunk is first else await _next_chunk(chunks)
+
+        summaries = await self._gather_bounded(chunk_jobs())
+        summaries = [f"{label}: {summary}" for label, summary in zip(labels, summaries)]
+
+        batches = self._batches(summaries)
+        while len(batches) > 1:
+            summaries = await self._reduce_level(batches)
+            batches = self._batches(summaries)
+        return await self._summarize(FINAL_PROMPT, "\n\n".join(batches[0]), FINAL_SUMMARY_TOKENS)
+
+    async def _reduce_level(self, batches: List[List[str]]) -> List[str]:
+        """Combine each batch of several summaries; a batch of one passes through as is"""
+        async def combine_jobs() -> AsyncIterator[Tuple[str, str, int]]:
+            for batch in batches:
+                if len(batch) > 1:
+                    yield COMBINE_PROMPT, "\n\n".join(batch), COMBINE_SUMMARY_TOKENS
+
+        combined = iter(await self._gather_bounded(combine_jobs()))
+        return [next(combined) if len(batch) > 1 else batch[0] for batch in batches]
+
+class DocumentSummary(NamedTuple):
+    text: Optional[str]  # None when there is nothing to summarize or no LLM answered
+    degraded: bool  # The LLM was unavailable, so a later run would produce a summary
+
+async def summarize_document(source: Union[str, PageStream]) -> DocumentSummary:
+    """
+    Plain-language summary of a document of any length. The text is None for
+    documents without text, when the LLM is not configured, and when it is
+    unavailable; only the last is marked degraded.
+    """
+    llm = get_llm_gateway()
+    if llm is None:
+        return DocumentSummary(None, False)
+
+    summarizer = MapReduceSummarizer(
+        llm,
+        get_summary_cache(),
+        chunk_tokens=settings.summary_chunk_tokens,
+        reduce_tokens=settings.summary_reduce_tokens,
+        concurrency=settings.summary_concurrency
+    )
+    try:
+        return DocumentSummary(await summarizer.summarize(source), False)
+    except LLMUnavailableError as e:
+        # Finished chunks are cached; reprocessing repeats only the failed calls
+        logger.warning(f"LLM summarization unavailable: {e}")
+        return DocumentSummary(None, True)
@@ -0,0 +1,37 @@
+from typing import Optional
+import logging
+from app.services.ai.llm_client import get_llm_gateway
+
+logger = logging.getLogger(__name__)
+
+async def translate_text(text: str, target_lang: str, source_lang: Optional[str] = None) -> str:
+    """
+    Translate text to `target_lang` (an ISO 639-1 code).
+    Returns the text unchanged when it is already in the target language, when
+    no LLM is available, or when the call fails.
+    """
+    if not text or not text.strip() or source_lang == target_lang:
+        return text
+
+    llm = get_llm_gateway()
+    if llm is None:
+        return text
+
+    source = f" from '{source_lang}'" if source_lang else ""
+    try:
+        response = await llm.complete(
+            feature="translator",
+            messages=[
+                {
+                    "role": "system",
+                    "content": f"Translate the user's message{source} to the language with ISO 639-1 code '{target_lang}'. Respond with only the translation."
+                },
+                {"role": "user", "content": text}
+            ],
+            max_tokens=max(64, len(text)),
+            temperature=0
+        )
+    except Exception as e:
+        logger.error(f"Translation to {target_lang} failed: {e}")
+        return text
+    return response.text.strip() or text
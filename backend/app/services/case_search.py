@@ -0,0 +1,108 @@
+import re
+import unicodedata
+from typing import List, Optional
+from sqlalchemy import DDL, Select, and_, cast, event, func, literal, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import TSQUERY
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Base, Case
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Letters, digits and Devanagari including its vowel signs and virama, which
+# \w alone treats as word breaks; the danda (U+0964/U+0965) ends a word
+_TOKEN_RE = re.compile(r"[\w\u0900-\u0963\u0966-\u097F]+")
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Split text into search tokens.
+    Handles English, Hinglish and Devanagari Hindi alike: text is NFC
+    normalised and case folded, then split on anything that is not a letter,
+    digit or Devanagari sign. Duplicates are dropped, keeping first-seen order.
+    """
+    if not text:
+        return []
+    normalized = unicodedata.normalize("NFC", text).casefold()
+    return list(dict.fromkeys(token.strip("_") for token in _TOKEN_RE.findall(normalized) if token.strip("_")))
+
+def case_search_tokens(case: Case) -> str:
+    """Space separated tokens of a case's case number, title and description"""
+    return " ".join(dict.fromkeys(
+        tokenize(case.case_number) + tokenize(case.title) + tokenize(case.description)
+    ))
+
+@event.listens_for(Case, "before_insert")
+@event.listens_for(Case, "before_update")
+def _update_search_tokens(mapper, connection, target: Case):
+    target.search_tokens = case_search_tokens(target)
+
+# The tokens are already split by tokenize(), so the vector is built from the
+# array as-is rather than re-parsed by a text search configuration that would
+# break Devanagari words apart at vowel signs
+CASE_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE cases ADD COLUMN IF NOT EXISTS search_tokens text",
+    "ALTER TABLE cases ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (array_to_tsvector(string_to_array(coalesce(search_tokens, ''), ' '))) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_cases_search_vector ON cases USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_cases_case_number_trgm ON cases USING gin (case_number gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_cases_title_trgm ON cases USING gin (title gin_trgm_ops)",
+]
+
+for statement in CASE_SEARCH_DDL:
+    # Runs after every create_all, so existing databases pick the index up too
+    event.listen(Base.metadata, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+async def rebuild_search_tokens(db: AsyncSession, batch_size: int = 1000):
+    """Backfill search tokens for cases stored before search was indexed"""
+    updated = 0
+    while True:
+        cases = (await db.execute(
+            select(Case).where(Case.search_tokens.is_(None)).order_by(Case.id).limit(batch_size)
+        )).scalars().all()
+        if not cases:
+            break
+        for case in cases:
+            case.search_tokens = case_search_tokens(case)
+        await db.commit()
+        updated += len(cases)
+
+    logger.info(f"Rebuilt search tokens for {updated} case(s)")
+
+def _tsquery_text(tokens: List[str]) -> str:
+    # Tokens only contain word characters, so they can be quoted verbatim
+    return " & ".join(f"'{token}':*" for token in tokens)
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def apply_case_search(query: Select, term: str, dialect_name: str):
+    """
+    Filter a cases query by a search term and return it with a rank column.
+    On PostgreSQL tokens are prefix-matched against the GIN-indexed
+    search_vector, case numbers match partially through the trigram index
+    and titles match fuzzily by trigram similarity; results are ranked by
+    the best of the three. Elsewhere every token must appear in the stored
+    tokens (LIKE), which is unindexed but keeps tests offline.
+    """
+    term = term.strip()
+    tokens = tokenize(term)
+    case_number_match = Case.case_number.ilike(_like_pattern(term), escape="\\")
+
+    if dialect_name != "postgresql":
+        token_match = and_(*(Case.search_tokens.like(_like_pattern(token), escape="\\") for token in tokens))
+        condition = or_(token_match, case_number_match) if tokens else case_number_match
+        return query.where(condition), literal(0.0)
+
+    search_vector = literal_column("cases.search_vector")
+    # title % term uses pg_trgm.similarity_threshold (0.3 by default)
+    conditions = [case_number_match, Case.title.op("%")(term)]
+    rank = func.greatest(func.similarity(Case.case_number, term), func.similarity(Case.title, term))
+
+    if tokens:
+        ts_query = cast(literal(_tsquery_text(tokens)), TSQUERY)
+        conditions.append(search_vector.op("@@")(ts_query))
+        rank = func.greatest(func.ts_rank(search_vector, ts_query), rank)
+
+    return query.where(or_(*conditions)), rank
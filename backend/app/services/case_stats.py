@@ -0,0 +1,200 @@
+from datetime import date, datetime, timezone
+from typing import NamedTuple, Optional
+from sqlalchemy import and_, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models import Case, CaseDailyStats, CasePriority, CaseStatus
+from app.schemas.case import CaseStats
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Dialects whose INSERT supports ON CONFLICT DO UPDATE
+_INSERT_DIALECTS = {"postgresql": postgresql, "sqlite": sqlite}
+
+# A case counts as resolved once it is closed with a closing time; the live
+# query, the rollup and case_stats_key all use this one definition
+RESOLVED = and_(Case.status == CaseStatus.CLOSED, Case.closed_at.isnot(None))
+
+def _resolution_days(dialect: str):
+    """Whole days between creation and closing, matching timedelta.days"""
+    if dialect == "sqlite":
+        return (func.strftime("%s", Case.closed_at) - func.strftime("%s", Case.created_at)) / 86400
+    return func.floor(func.extract("epoch", Case.closed_at - Case.created_at) / 86400)
+
+def _created_day(dialect: str):
+    """UTC day a case was created; SQLite stores timestamps in UTC already"""
+    if dialect == "sqlite":
+        return func.date(Case.created_at)
+    return func.date(func.timezone("UTC", Case.created_at))
+
+class CaseStatsKey(NamedTuple):
+    """The rollup bucket a case falls into, plus its resolution contribution"""
+    day: date
+    case_type: str
+    priority: CasePriority
+    status: CaseStatus
+    resolved: bool
+    resolution_days: int
+
+def _as_utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def case_stats_key(case: Case) -> Optional[CaseStatsKey]:
+    """Snapshot a case's rollup bucket; take one before and after every change"""
+    if case.created_at is None or case.status is None or case.priority is None:
+        return None
+
+    created_at = _as_utc(case.created_at)
+    # API handlers may assign schema enums; normalise to the model enums by value
+    status = CaseStatus(case.status.value)
+    resolved = status == CaseStatus.CLOSED and case.closed_at is not None
+
+    return CaseStatsKey(
+        day=created_at.date(),
+        case_type=case.case_type,
+        priority=CasePriority(case.priority.value),
+        status=status,
+        resolved=resolved,
+        resolution_days=(_as_utc(case.closed_at) - created_at).days if resolved else 0
+    )
+
+async def record_case_change(db: AsyncSession, before: Optional[CaseStatsKey], after: Optional[CaseStatsKey]):
+    """
+    Move a case between rollup buckets inside the caller's transaction.
+    Pass before=None for new cases. No-op unless the rollup is enabled.
+    """
+    if not settings.case_stats_rollup or before == after:
+        return
+
+    dialect = _INSERT_DIALECTS[db.bind.dialect.name]
+    for key, sign in ((before, -1), (after, 1)):
+        if key is None:
+            continue
+
+        stmt = dialect.insert(CaseDailyStats).values(
+            day=key.day,
+            case_type=key.case_type,
+            priority=key.priority,
+            status=key.status,
+            case_count=sign,
+            resolved_count=sign if key.resolved else 0,
+            resolution_days_total=sign * key.resolution_days
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                CaseDailyStats.day, CaseDailyStats.case_type,
+                CaseDailyStats.priority, CaseDailyStats.status
+            ],
+            set_={
+                "case_count": CaseDailyStats.case_count + stmt.excluded.case_count,
+                "resolved_count": CaseDailyStats.resolved_count + stmt.excluded.resolved_count,
+                "resolution_days_total": CaseDailyStats.resolution_days_total + stmt.excluded.resolution_days_total,
+            }
+        )
+        await db.execute(stmt)
+
+def _fold_stats(rows) -> CaseStats:
+    """Combine per (case_type, priority) rows into the dashboard summary"""
+    stats = {"total": 0, "new": 0, "in_progress": 0, "closed": 0, "cancelled": 0}
+    cases_by_type = {}
+    cases_by_priority = {}
+    resolved = 0
+    resolution_days = 0
+
+    for row in rows:
+        for field in stats:
+            stats[field] += int(getattr(row, field) or 0)
+        if row.total:
+            cases_by_type[row.case_type] = cases_by_type.get(row.case_type, 0) + int(row.total)
+            if row.priority is not None:
+                priority = row.priority.value
+                cases_by_priority[priority] = cases_by_priority.get(priority, 0) + int(row.total)
+        resolved += int(row.resolved or 0)
+        resolution_days += int(row.resolution_days or 0)
+
+    return CaseStats(
+        total_cases=stats["total"],
+        new_cases=stats["new"],
+        in_progress_cases=stats["in_progress"],
+        closed_cases=stats["closed"],
+        cancelled_cases=stats["cancelled"],
+        cases_by_type=cases_by_type,
+        cases_by_priority=cases_by_priority,
+        average_resolution_time=resolution_days / resolved if resolved else None
+    )
+
+async def compute_case_stats(db: AsyncSession, start_date: datetime) -> CaseStats:
+    """
+    Case statistics for cases created since start_date, in one grouped query.
+    Status counts use COUNT(*) FILTER and resolution days are summed in the
+    database, so at most one row per (case_type, priority) comes back.
+    """
+    resolution_days = _resolution_days(db.bind.dialect.name)
+    query = (
+        select(
+            Case.case_type,
+            Case.priority,
+            func.count().label("total"),
+            func.count().filter(Case.status == CaseStatus.NEW).label("new"),
+            func.count().filter(Case.status == CaseStatus.IN_PROGRESS).label("in_progress"),
+            func.count().filter(Case.status == CaseStatus.CLOSED).label("closed"),
+            func.count().filter(Case.status == CaseStatus.CANCELLED).label("cancelled"),
+            func.count().filter(RESOLVED).label("resolved"),
+            func.sum(resolution_days).filter(RESOLVED).label("resolution_days"),
+        )
+        .where(Case.created_at >= start_date)
+        .group_by(Case.case_type, Case.priority)
+    )
+    return _fold_stats((await db.execute(query)).all())
+
+async def compute_case_stats_from_rollup(db: AsyncSession, start_date: datetime) -> CaseStats:
+    """
+    Case statistics from the case_daily_stats rollup.
+    Reads at most one row per day and bucket instead of scanning cases; the
+    window is rounded down to whole UTC days.
+    """
+    count = func.sum(CaseDailyStats.case_count)
+    query = (
+        select(
+            CaseDailyStats.case_type,
+            CaseDailyStats.priority,
+            count.label("total"),
+            count.filter(CaseDailyStats.status == CaseStatus.NEW).label("new"),
+            count.filter(CaseDailyStats.status == CaseStatus.IN_PROGRESS).label("in_progress"),
+            count.filter(CaseDailyStats.status == CaseStatus.CLOSED).label("closed"),
+            count.filter(CaseDailyStats.status == CaseStatus.CANCELLED).label("cancelled"),
+            func.sum(CaseDailyStats.resolved_count).label("resolved"),
+            func.sum(CaseDailyStats.resolution_days_total).label("resolution_days"),
+        )
+        .where(CaseDailyStats.day >= _as_utc(start_date).date())
+        .group_by(CaseDailyStats.case_type, CaseDailyStats.priority)
+    )
+    return _fold_stats((await db.execute(query)).all())
+
+async def rebuild_case_daily_stats(db: AsyncSession):
+    """Recompute the whole rollup from cases, e.g. when first enabling it"""
+    day = _created_day(db.bind.dialect.name)
+    resolution_days = _resolution_days(db.bind.dialect.name)
+    source = (
+        select(
+            day,
+            Case.case_type,
+            Case.priority,
+            Case.status,
+            func.count(),
+            func.count().filter(RESOLVED),
+            func.coalesce(func.sum(resolution_days).filter(RESOLVED), 0),
+        )
+        .where(Case.priority.isnot(None), Case.status.isnot(None))
+        .group_by(day, Case.case_type, Case.priority, Case.status)
+    )
+
+    await db.execute(delete(CaseDailyStats))
+    await db.execute(insert(CaseDailyStats).from_select([
+        CaseDailyStats.day, CaseDailyStats.case_type, CaseDailyStats.priority, CaseDailyStats.status,
+        CaseDailyStats.case_count, CaseDailyStats.resolved_count, CaseDailyStats.resolution_days_total
+    ], source))
+    await db.commit()
+    logger.info("Rebuilt case_daily_stats rollup")
@@ -0,0 +1,251 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, List, NamedTuple, Optional, Tuple
+import logging
+from sqlalchemy import func, select, text, update
+from sqlalchemy.dialects import postgresql
+from app.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models import ProcessedDocument
+from app.services.document.pdf_pages import PageStream
+
+logger = logging.getLogger(__name__)
+
+# Bump when extraction, OCR or the shape of summary/entities changes, so
+# results produced by older code are not served
+PIPELINE_VERSION = "2"
+
+# Prefix of DiskDocumentCache entries still being written
+STAGING_PREFIX = ".staging-"
+
+def file_sha256(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in chunks so large files are never held in memory"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def document_cache_key(content_hash: str, page_range: Optional[str] = None) -> str:
+    """
+    Cache key for a file's content under the current pipeline and model
+    versions; results for only some pages also key on the page range.
+    """
+    key = f"{content_hash}:{PIPELINE_VERSION}:{settings.document_model_version}"
+    return f"{key}:{page_range}" if page_range else key
+
+class CachedDocument(NamedTuple):
+    content_hash: str
+    summary: Any
+    entities: Any
+    pages: PageStream
+
+class DocumentCache:
+    """
+    Base class for the processed-document cache.
+    Entries hold what process_document produces for a file's content: page
+    texts, summary and entities. Backends bound their total size and evict
+    the least recently used entries first.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[CachedDocument]:
+        raise NotImplementedError
+
+    async def put(self, key: str, content_hash: str, pages: PageStream, summary: Any, entities: Any):
+        raise NotImplementedError
+
+    def _record(self, entry: Optional[CachedDocument]) -> Optional[CachedDocument]:
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+class DiskDocumentCache(DocumentCache):
+    """
+    One directory per entry under `cache_dir`: meta.json plus pages.jsonl.
+    Pages are written and read one line at a time, so large documents never
+    sit in memory whole. Recency is the directory mtime, refreshed on hits.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        super().__init__(max_bytes)
+        self.cache_dir = cache_dir
+        self._size: Optional[int] = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_dir(self, key: str) -> str:
+        name = key.replace(":", "-")
+        return os.path.join(self.cache_dir, name[:2], name)
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """(mtime, bytes, path) of every entry"""
+        entries = []
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.startswith(STAGING_PREFIX):
+                    continue
+                size = sum(f.stat().st_size for f in os.scandir(entry.path))
+                entries.append((entry.stat().st_mtime, size, entry.path))
+        return entries
+
+    def _read(self, key: str) -> Optional[CachedDocument]:
+        path = self._entry_dir(key)
+        try:
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(os.path.join(path, "pages.jsonl"), encoding="utf-8") as f:
+                pages = PageStream.from_pages(tuple(json.loads(line)) for line in f)
+            os.utime(path)
+        except (OSError, ValueError):
+            # Missing, half-evicted or unreadable entries are misses
+            return None
+        return CachedDocument(meta["content_hash"], meta["summary"], meta["entities"], pages)
+
+    def _write(self, key: str, content_hash: str, pages: PageStream, summary: Any, entities: Any):
+        path = self._entry_dir(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=os.path.dirname(path))
+        try:
+            with open(os.path.join(staging, "pages.jsonl"), "w", encoding="utf-8") as f:
+                for page in pages.numbered():
+                    f.write(json.dumps(page, ensure_ascii=False) + "\n")
+            with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"content_hash": content_hash, "summary": summary, "entities": entities}, f, ensure_ascii=False)
+            size = sum(entry.stat().st_size for entry in os.scandir(staging))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        try:
+            # Readers only ever see complete entries
+            os.rename(staging, path)
+        except OSError:
+            # Another worker cached the same content first
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+
+        if self._size is None:
+            self._size = sum(entry_size for _, entry_size, _ in self._entries())
+        else:
+            self._size += size
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until the cache is at 90% of its budget"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            for entry in os.scandir(path):
+                os.remove(entry.path)
+            os.rmdir(path)
+            total -= size
+        self._size = total
+
+    async def get(self, key: str) -> Optional[CachedDocument]:
+        return self._record(await asyncio.to_thread(self._read, key))
+
+    async def put(self, key: str, content_hash: str, pages: PageStream, summary: Any, entities: Any):
+        await asyncio.to_thread(self._write, key, content_hash, pages, summary, entities)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "bytes": self._size}
+
+# Delete the least recently used rows beyond the byte budget in one statement
+EVICT_PROCESSED_DOCUMENTS_SQL = text("""
+    DELETE FROM processed_documents
+    WHERE cache_key IN (
+        SELECT cache_key FROM (
+            SELECT cache_key, sum(size_bytes) OVER (ORDER BY last_used_at DESC, cache_key) AS kept_bytes
+            FROM processed_documents
+        ) ranked
+        WHERE kept_bytes > :max_bytes
+    )
+""")
+
+class PostgresDocumentCache(DocumentCache):
+    """Entries in the processed_documents table, shared by every worker"""
+
+    async def get(self, key: str) -> Optional[CachedDocument]:
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(
+                update(ProcessedDocument)
+                .where(ProcessedDocument.cache_key == key)
+                .values(last_used_at=func.now())
+                .returning(
+                    ProcessedDocument.content_hash, ProcessedDocument.summary,
+                    ProcessedDocument.entities, ProcessedDocument.pages
+                )
+            )).first()
+            await db.commit()
+        if row is None:
+            return self._record(None)
+        return self._record(CachedDocument(row.content_hash, row.summary, row.entities, PageStream.from_pages(row.pages)))
+
+    async def put(self, key: str, content_hash: str, pages: PageStream, summary: Any, entities: Any):
+        page_list = list(pages.numbered())
+        size = sum(len(page_text.encode("utf-8")) for _, page_text in page_list)
+        size += len(json.dumps([summary, entities], ensure_ascii=False).encode("utf-8"))
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                postgresql.insert(ProcessedDocument)
+                .values(
+                    cache_key=key, content_hash=content_hash, pages=page_list,
+                    summary=summary, entities=entities, size_bytes=size
+                )
+                .on_conflict_do_nothing(index_elements=[ProcessedDocument.cache_key])
+            )
+            total = (await db.execute(select(func.coalesce(func.sum(ProcessedDocument.size_bytes), 0)))).scalar()
+            if total > self.max_bytes:
+                await db.execute(EVICT_PROCESSED_DOCUMENTS_SQL, {"max_bytes": int(self.max_bytes * 0.9)})
+            await db.commit()
+
+def create_document_cache(backend: Optional[str] = None) -> Optional[DocumentCache]:
+    """Build the document cache selected by configuration, or None when disabled"""
+    backend = (backend or settings.document_cache_backend).lower()
+
+    if backend == "none":
+        return None
+    if backend == "disk":
+        return DiskDocumentCache(settings.document_cache_dir, settings.document_cache_max_bytes)
+    if backend == "postgres":
+        return PostgresDocumentCache(settings.document_cache_max_bytes)
+
+    raise ValueError(f"Unknown document cache backend: {backend}")
+
+_document_cache: Optional[DocumentCache] = None
+_document_cache_created = False
+
+def get_document_cache() -> Optional[DocumentCache]:
+    """Get the process-wide document cache, or None when caching is disabled"""
+    global _document_cache, _document_cache_created
+    if not _document_cache_created:
+        _document_cache_created = True
+        _document_cache = create_document_cache()
+        logger.info(f"Using {type(_document_cache).__name__} for processed documents")
+    return _document_cache
@@ -0,0 +1,188 @@
+import hashlib
+import re
+import unicodedata
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import logging
+import numpy as np
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Document, DocumentLshBucket
+from app.services.document.pdf_pages import SpooledPage, read_spooled_pages
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 3  # words per shingle
+NUM_PERM = 128  # signature length
+LSH_BANDS = 16  # NUM_PERM / LSH_BANDS rows per band
+LSH_ROWS = NUM_PERM // LSH_BANDS
+
+# Hashes are 32-bit, so (a * x + b) mod a prime just under 2**32 fits in uint64
+_PRIME = np.uint64((1 << 32) - 5)
+_rng = np.random.default_rng(20240601)
+_PERM_A = _rng.integers(1, int(_PRIME), NUM_PERM, dtype=np.uint64)[:, None]
+_PERM_B = _rng.integers(0, int(_PRIME), NUM_PERM, dtype=np.uint64)[:, None]
+_EMPTY_SIGNATURE = np.full(NUM_PERM, 0xFFFFFFFF, dtype=np.uint32)
+
+_WORDS = re.compile(r"[\w\u0900-\u0963\u0966-\u097F]+")
+
+def words(text: str) -> List[str]:
+    """Case-folded words; punctuation and layout differences between copies are ignored"""
+    return _WORDS.findall(unicodedata.normalize("NFC", text).casefold())
+
+def shingle_hashes(word_hashes: np.ndarray, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """32-bit hashes of every run of `size` consecutive words"""
+    if len(word_hashes) < size:
+        return word_hashes[:0]
+    acc = np.zeros(len(word_hashes) - size + 1, dtype=np.uint64)
+    for offset in range(size):
+        acc = (acc * np.uint64(0x100000001B3)) ^ word_hashes[offset:offset + len(acc)]
+    return ((acc ^ (acc >> np.uint64(32))) & np.uint64(0xFFFFFFFF)).astype(np.uint64)
+
+class MinHasher:
+    """
+    Incremental MinHash over word shingles.
+    Text is fed page by page; the last words of each page are carried over so
+    shingles spanning a page break are counted, and only one page's shingles
+    are ever in memory.
+    """
+
+    def __init__(self):
+        self.signature = _EMPTY_SIGNATURE.astype(np.uint64)
+        self._tail: List[int] = []
+        self.shingles = 0
+
+    def update(self, text: str):
+        hashes = self._tail + [zlib.crc32(word.encode("utf-8")) for word in words(text)]
+        self._tail = hashes[-(SHINGLE_SIZE - 1):] if len(hashes) >= SHINGLE_SIZE - 1 else hashes
+        shingles = shingle_hashes(np.asarray(hashes, dtype=np.uint64))
+        if not len(shingles):
+            return
+        self.shingles += len(shingles)
+        # Chunked so a huge page does not build a NUM_PERM x n matrix at once
+        for start in range(0, len(shingles), 4096):
+            chunk = shingles[start:start + 4096]
+            permuted = (_PERM_A * chunk[None, :] + _PERM_B) % _PRIME
+            np.minimum(self.signature, permuted.min(axis=1), out=self.signature)
+
+    def digest(self) -> np.ndarray:
+        return self.signature.astype(np.uint32)
+
+def minhash_text(texts: Iterable[str]) -> np.ndarray:
+    hasher = MinHasher()
+    for text in texts:
+        hasher.update(text)
+    return hasher.digest()
+
+def minhash_spooled(spool_path: str, pages: Sequence[SpooledPage]) -> bytes:
+    """Signature of a spooled PageStream as bytes; runs in the document process pool"""
+    hasher = MinHasher()
+    for _, text in read_spooled_pages(spool_path, pages):
+        hasher.update(text)
+    return hasher.digest().tobytes() if hasher.shingles else b""
+
+def signature_from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.uint32)
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+def band_buckets(signature: np.ndarray) -> List[int]:
+    """One signed 64-bit bucket id per LSH band"""
+    rows = signature.reshape(LSH_BANDS, LSH_ROWS)
+    return [
+        int.from_bytes(hashlib.blake2b(band.tobytes(), digest_size=8).digest(), "little", signed=True)
+        for band in rows
+    ]
+
+class LshIndex:
+    """
+    In-memory LSH index of MinHash signatures.
+    A document is a candidate when all rows of at least one band match, which
+    for 16 bands of 8 rows happens with probability ~1 at 95% similarity and
+    ~6% at 50%; candidates are then checked against the full signature.
+    """
+
+    def __init__(self):
+        self._buckets: List[Dict[int, List[int]]] = [defaultdict(list) for _ in range(LSH_BANDS)]
+        self._signatures: Dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def add(self, doc_id: int, signature: np.ndarray):
+        self._signatures[doc_id] = signature
+        for band, bucket in enumerate(band_buckets(signature)):
+            self._buckets[band][bucket].append(doc_id)
+
+    def candidates(self, signature: np.ndarray) -> Set[int]:
+        found: Set[int] = set()
+        for band, bucket in enumerate(band_buckets(signature)):
+            found.update(self._buckets[band].get(bucket, ()))
+        return found
+
+    def query(self, signature: np.ndarray, threshold: float) -> List[Tuple[int, float]]:
+        """Documents at least `threshold` similar, most similar first"""
+        matches = [
+            (doc_id, similarity(signature, self._signatures[doc_id]))
+            for doc_id in self.candidates(signature)
+        ]
+        return sorted(
+            (match for match in matches if match[1] >= threshold),
+            key=lambda match: match[1],
+            reverse=True
+        )
+
+async def index_document(db: AsyncSession, document_id: int, signature: bytes, page_range: Optional[str] = None):
+    """Store a document's signature, the page range it covers and its LSH buckets"""
+    document = await db.get(Document, document_id)
+    if document is None:
+        return
+    document.minhash = signature
+    document.page_range = page_range
+    await db.execute(delete(DocumentLshBucket).where(DocumentLshBucket.document_id == document_id))
+    if signature:
+        db.add_all(
+            DocumentLshBucket(band=band, bucket=bucket, document_id=document_id)
+            for band, bucket in enumerate(band_buckets(signature_from_bytes(signature)))
+        )
+
+async def find_near_duplicate(
+    db: AsyncSession,
+    signature: bytes,
+    threshold: float,
+    exclude_id: Optional[int] = None,
+    page_range: Optional[str] = None
+) -> Optional[Tuple[Document, float]]:
+    """
+    The most similar already-processed document at or above `threshold`
+    whose text covers the same page range.
+    Candidates come from the bucket index, so only documents sharing a band
+    are loaded and compared.
+    """
+    if not signature:
+        return None
+    query_signature = signature_from_bytes(signature)
+    keys = list(enumerate(band_buckets(query_signature)))
+
+    candidate_ids = select(DocumentLshBucket.document_id).where(
+        tuple_(DocumentLshBucket.band, DocumentLshBucket.bucket).in_(keys)
+    )
+    query = select(Document).where(
+        Document.id.in_(candidate_ids),
+        Document.content_hash.isnot(None),
+        Document.page_range.is_not_distinct_from(page_range)
+    )
+    if exclude_id is not None:
+        query = query.where(Document.id != exclude_id)
+
+    best = None
+    for document in (await db.execute(query)).scalars():
+        if not document.minhash:
+            continue
+        score = similarity(query_signature, signature_from_bytes(document.minhash))
+        if score >= threshold and (best is None or score > best[1]):
+            best = (document, score)
+    return best
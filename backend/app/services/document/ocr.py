@@ -0,0 +1,199 @@
+import asyncio
+import io
+import math
+from typing import List, NamedTuple, Optional, Tuple
+import logging
+import numpy as np
+from app.config import settings
+from app.services.document.pool import get_process_pool
+
+logger = logging.getLogger(__name__)
+
+# Skew angles tried when straightening a page, in degrees
+DESKEW_ANGLES = np.arange(-5.0, 5.01, 0.25)
+
+class OcrPage(NamedTuple):
+    number: int  # 1-based frame of the image file
+    text: str
+    confidence: float  # mean word confidence, 0-100
+    tiles: int
+
+class OcrResult(NamedTuple):
+    pages: List[OcrPage]
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(page.text for page in self.pages if page.text)
+
+    @property
+    def confidence(self) -> float:
+        """Mean page confidence weighted by the amount of text on each page"""
+        weights = [len(page.text) for page in self.pages]
+        if not sum(weights):
+            return 0.0
+        return sum(page.confidence * weight for page, weight in zip(self.pages, weights)) / sum(weights)
+
+def downscale(gray: np.ndarray, max_side: int) -> np.ndarray:
+    """Shrink by an integer factor with block averaging until the longest side fits"""
+    factor = math.ceil(max(gray.shape) / max_side)
+    if factor <= 1:
+        return gray
+    height, width = (gray.shape[0] // factor) * factor, (gray.shape[1] // factor) * factor
+    blocks = gray[:height, :width].reshape(height // factor, factor, width // factor, factor)
+    return blocks.mean(axis=(1, 3)).astype(np.uint8)
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """Grey level that best separates ink from paper (Otsu's method)"""
+    histogram = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    weight_dark = np.cumsum(histogram)
+    weight_light = weight_dark[-1] - weight_dark
+    cumulative = np.cumsum(histogram * np.arange(256))
+    mean_dark = cumulative / np.maximum(weight_dark, 1)
+    mean_light = (cumulative[-1] - cumulative) / np.maximum(weight_light, 1)
+    between = weight_dark * weight_light * (mean_dark - mean_light) ** 2
+    return int(np.argmax(between))
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    """Black text on white, as uint8 0/255"""
+    return np.where(gray > otsu_threshold(gray), 255, 0).astype(np.uint8)
+
+def estimate_skew(binary: np.ndarray, angles: np.ndarray = DESKEW_ANGLES) -> float:
+    """
+    Skew of the text lines in degrees, by projection profiles.
+    For each candidate angle the ink pixels are sheared onto rows; when the
+    angle matches the text, lines stack into sharp peaks and the variance of
+    the row histogram is highest. Small angles make shearing a close enough
+    stand-in for rotation, so no image is actually rotated here.
+    """
+    sample = downscale(binary, 800) < 128
+    ys, xs = np.nonzero(sample)
+    if len(ys) < 100:
+        return 0.0
+    best_angle, best_score = 0.0, -1.0
+    for angle in angles:
+        rows = np.round(ys - xs * math.tan(math.radians(angle))).astype(np.int64)
+        score = np.bincount(rows - rows.min()).astype(np.float64).var()
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+def split_tiles(binary: np.ndarray, tile_height: int) -> List[np.ndarray]:
+    """
+    Cut a tall page into horizontal strips of roughly tile_height rows.
+    Each cut is moved to the emptiest row near its target, so cuts fall
+    between text lines instead of through them.
+    """
+    height = binary.shape[0]
+    if height <= tile_height * 1.5:
+        return [binary]
+    ink = (binary < 128).sum(axis=1)
+    margin = tile_height // 4
+    cuts = [0]
+    while height - cuts[-1] > tile_height * 1.5:
+        target = cuts[-1] + tile_height
+        window = ink[target - margin:target + margin]
+        cuts.append(target - margin + int(np.argmin(window)))
+    cuts.append(height)
+    return [binary[top:bottom] for top, bottom in zip(cuts, cuts[1:])]
+
+def preprocess(gray: np.ndarray, max_side: int) -> np.ndarray:
+    """Downscale, straighten and binarize a greyscale page"""
+    from PIL import Image
+
+    gray = downscale(gray, max_side)
+    angle = estimate_skew(binarize(gray))
+    if abs(angle) >= 0.25:
+        # Rotate the greyscale so binarization sees interpolated edges
+        rotated = Image.fromarray(gray).rotate(angle, resample=Image.BILINEAR, expand=True, fillcolor=255)
+        gray = np.asarray(rotated)
+    return binarize(gray)
+
+def count_frames(file_path: str) -> int:
+    """Pages in an image file: multi-page TIFFs have several, photos one"""
+    from PIL import Image
+
+    with Image.open(file_path) as image:
+        return getattr(image, "n_frames", 1)
+
+def prepare_page(file_path: str, frame: int, max_side: int, tile_height: int) -> List[bytes]:
+    """Load one frame, preprocess it and return its tiles as PNG bytes; runs in the process pool"""
+    from PIL import Image, ImageOps
+
+    with Image.open(file_path) as image:
+        image.seek(frame)
+        # Phone photos are often stored sideways with an EXIF rotation flag
+        gray = np.asarray(ImageOps.exif_transpose(image).convert("L"))
+
+    tiles = []
+    for tile in split_tiles(preprocess(gray, max_side), tile_height):
+        buffer = io.BytesIO()
+        Image.fromarray(tile).save(buffer, format="PNG")
+        tiles.append(buffer.getvalue())
+    return tiles
+
+def recognize_tile(png: bytes, languages: str, tesseract_cmd: Optional[str] = None) -> Tuple[str, float, int]:
+    """
+    Run Tesseract on one tile; runs in the process pool.
+    Returns the text line by line, the mean word confidence and the number of words.
+    """
+    import pytesseract
+    from PIL import Image
+
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+    data = pytesseract.image_to_data(
+        Image.open(io.BytesIO(png)), lang=languages, config="--psm 6", output_type=pytesseract.Output.DICT
+    )
+    lines = {}
+    confidences = []
+    for i, word in enumerate(data["text"]):
+        confidence = float(data["conf"][i])
+        if confidence < 0 or not word.strip():
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        lines.setdefault(key, []).append(word)
+        confidences.append(confidence)
+
+    text = "\n".join(" ".join(words) for words in lines.values())
+    return text, (sum(confidences) / len(confidences) if confidences else 0.0), len(confidences)
+
+async def ocr_image(file_path: str, languages: Optional[str] = None) -> OcrResult:
+    """
+    OCR every page of an image file.
+    Pages are preprocessed in parallel, then all their tiles are recognised in
+    parallel, both in the shared document process pool.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    languages = languages or settings.ocr_languages
+
+    frames = await loop.run_in_executor(pool, count_frames, file_path)
+    pages_tiles = await asyncio.gather(*(
+        loop.run_in_executor(pool, prepare_page, file_path, frame, settings.ocr_max_side, settings.ocr_tile_height)
+        for frame in range(frames)
+    ))
+    results = await asyncio.gather(*(
+        loop.run_in_executor(pool, recognize_tile, tile, languages, settings.tesseract_cmd or None)
+        for tiles in pages_tiles for tile in tiles
+    ))
+
+    pages = []
+    position = 0
+    for number, tiles in enumerate(pages_tiles, 1):
+        page_results = results[position:position + len(tiles)]
+        position += len(tiles)
+        words = sum(count for _, _, count in page_results)
+        confidence = sum(conf * count for _, conf, count in page_results) / words if words else 0.0
+        text = "\n".join(text for text, _, _ in page_results if text)
+        pages.append(OcrPage(number, text, confidence, len(tiles)))
+        logger.info(f"OCR {file_path} page {number}: {len(tiles)} tile(s), confidence {confidence:.1f}")
+
+    return OcrResult(pages)
+
+async def extract_text_from_image(file_path: str) -> str:
+    """Text of an image upload or scanned PDF page, via local Tesseract OCR"""
+    result = await ocr_image(file_path)
+    if result.pages and result.confidence < settings.ocr_min_confidence:
+        logger.warning(f"Low OCR confidence {result.confidence:.1f} for {file_path}")
+    return result.text
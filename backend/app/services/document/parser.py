@@ -1,28 +1,207 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional, Union
+import logging
+from sqlalchemy import update
+from app.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models import Document
+from app.services.document.cache import DocumentCache, document_cache_key, file_sha256, get_document_cache
+from app.services.document.near_duplicates import find_near_duplicate, index_document, minhash_spooled
 from app.services.document.ocr import extract_text_from_image
+from app.services.document.pool import get_process_pool
+from app.services.document.pdf_pages import PageStream, iter_pdf_pages, spool_pdf_pages
 from app.services.ai.summarizer import summarize_document
-from app.services.ai.entity_extractor import extract_legal_entities
-import PyPDF2
-
-async def process_document(file_path: str, file_type: str):
-    """Main document processing pipeline"""
-    
-    # 1. Extract text
-    if file_type == "application/pdf":
-        text = extract_text_from_pdf(file_path)
-    else:  # image
-        text = await extract_text_from_image(file_path)
-    
-    # 2. Summarize
-    summary = await summarize_document(text)
-    
-    # 3. Extract entities
-    entities = await extract_legal_entities(text)
-    
-    # 4. Store in vector DB
+from app.services.ai.entity_extractor import extract_legal_entities, relocate_entities
+
+logger = logging.getLogger(__name__)
+
+def extract_text_from_pdf(file_path: str) -> str:
+    """Extract the text layer of a whole PDF as one string; prefer iter_pdf_pages for large files"""
+    return "\n".join(page.text for page in iter_pdf_pages(file_path))
+
+_ai_semaphore: Optional[asyncio.Semaphore] = None
+
+def _get_ai_semaphore() -> asyncio.Semaphore:
+    global _ai_semaphore
+    if _ai_semaphore is None:
+        _ai_semaphore = asyncio.Semaphore(settings.document_ai_concurrency)
+    return _ai_semaphore
+
+class StageTimings:
+    """Wall-clock milliseconds spent in each pipeline stage"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round((time.perf_counter() - start) * 1000, 2)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {**self.stages, "total": round((time.perf_counter() - self.started) * 1000, 2)}
+
+async def _extract_stage(file_path: str, file_type: str, first_page: int, last_page: Optional[int]) -> PageStream:
+    if file_type != "application/pdf":
+        return PageStream.from_text(await extract_text_from_image(file_path))
+
+    spool = PageStream.create_spool()
+    loop = asyncio.get_running_loop()
+    pages = await loop.run_in_executor(
+        get_process_pool(), spool_pdf_pages, file_path, spool.name, first_page, last_page
+    )
+    return PageStream(spool, pages)
+
+async def _ocr_stage(stream: PageStream):
+    """OCR only the pages that had no usable text layer"""
+    scanned = [page for page in stream.scanned_pages if page.image_path]
+    texts = await asyncio.gather(*(extract_text_from_image(page.image_path) for page in scanned))
+    for page, text in zip(scanned, texts):
+        stream.set_page_text(page.number, text)
+
+async def _ai_stage(timings: StageTimings, name: str, func: Callable[[Union[str, PageStream]], Awaitable], text: PageStream):
+    # Bounded across all documents, so a burst of uploads cannot fan out unbounded LLM calls
+    async with _get_ai_semaphore():
+        async with timings.stage(name):
+            return await func(text)
+
+async def link_document(document_id: int, content_hash: str):
+    """Record the content hash on the Document row, tying it to other copies of the file"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(Document).where(Document.id == document_id).values(content_hash=content_hash))
+        await db.commit()
+
+async def _reuse_near_duplicate(
+    document_id: int,
+    text: PageStream,
+    page_range: Optional[str],
+    cache: Optional[DocumentCache]
+):
+    """
+    Index the document's MinHash signature and look for an already processed
+    document whose text is at least NEAR_DUPLICATE_THRESHOLD similar (a
+    re-scan, a recompressed PDF). Only documents processed over the same page
+    range match, and their results are read under the key they were cached
+    with. Returns that document's cached summary and entities, or None. The
+    entities are re-located in this document's text, so their offsets never
+    point into the other one.
+    """
+    loop = asyncio.get_running_loop()
+    signature = await loop.run_in_executor(get_process_pool(), minhash_spooled, text.spool_path, list(text.pages))
+
+    async with AsyncSessionLocal() as db:
+        await index_document(db, document_id, signature, page_range)
+        match = await find_near_duplicate(
+            db, signature, settings.near_duplicate_threshold, exclude_id=document_id, page_range=page_range
+        )
+        await db.commit()
+
+    if match is None or cache is None:
+        return None
+    original, score = match
+    cached = await cache.get(document_cache_key(original.content_hash, original.page_range))
+    if cached is None:
+        return None
+    cached.pages.close()
+    logger.info(f"Document {document_id} is {score:.0%} similar to document {original.id}, reusing its results")
+    entities = await asyncio.to_thread(relocate_entities, cached.entities, text) if cached.entities else cached.entities
+    return cached.summary, entities, original.id
+
+async def process_document(
+    file_path: str,
+    file_type: str,
+    first_page: int = 1,
+    last_page: Optional[int] = None,
+    document_id: Optional[int] = None
+):
+    """
+    Main document processing pipeline.
+    0. Look the file's SHA-256 up in the document cache; a hit skips everything
+    1. Extract text page by page: PDFs in the process pool, images through OCR
+    2. OCR the scanned pages of PDFs
+    3. With a document_id, reuse the results of a near-duplicate document
+    4. Otherwise summarize and extract entities concurrently, as both only need the text
+    The text is returned as a PageStream spooled to disk, never as one string.
+    """
+    timings = StageTimings()
+    if last_page is None and settings.document_max_pages:
+        last_page = first_page + settings.document_max_pages - 1
+
+    async with timings.stage("hash"):
+        content_hash = await asyncio.to_thread(file_sha256, file_path)
+    if document_id is not None:
+        await link_document(document_id, content_hash)
+
+    cache = get_document_cache()
+    page_range = f"{first_page}-{last_page or ''}" if first_page != 1 or last_page is not None else None
+    cache_key = document_cache_key(content_hash, page_range)
+
+    if cache is not None:
+        async with timings.stage("cache"):
+            cached = await cache.get(cache_key)
+        if cached is not None:
+            timings = timings.as_dict()
+            logger.info(f"Document cache hit for {file_path} ({content_hash[:12]}) in {timings['total']:.0f} ms")
+            return {
+                "text": cached.pages,
+                "summary": cached.summary,
+                "entities": cached.entities,
+                "content_hash": content_hash,
+                "cached": True,
+                "duplicate_of": None,
+                "timings": timings
+            }
+
+    async with timings.stage("extract"):
+        text = await _extract_stage(file_path, file_type, first_page, last_page)
+
+    if text.scanned_pages:
+        async with timings.stage("ocr"):
+            await _ocr_stage(text)
+
+    near_duplicate = None
+    if document_id is not None and settings.near_duplicate_threshold:
+        async with timings.stage("near_duplicate"):
+            near_duplicate = await _reuse_near_duplicate(document_id, text, page_range, cache)
+
+    if near_duplicate is not None:
+        summary, entities, duplicate_of = near_duplicate
+        degraded = False
+    else:
+        duplicate_of = None
+        summarized, extracted = await asyncio.gather(
+            _ai_stage(timings, "summarize", summarize_document, text),
+            _ai_stage(timings, "entities", extract_legal_entities, text),
+        )
+        summary, entities = summarized.text, extracted.entities
+        # Results produced while the LLM was unavailable are not cached, so
+        # the document gets full results once the LLM is back
+        degraded = summarized.degraded or extracted.degraded
+
+    if cache is not None and not degraded:
+        try:
+            await cache.put(cache_key, content_hash, text, summary, entities)
+        except Exception as e:
+            logger.error(f"Failed to cache processed document {content_hash[:12]}: {e}")
+
+    # Store in vector DB
     # await store_embeddings(text, document_id)
-    
+
+    timings = timings.as_dict()
+    logger.info(f"Processed {file_path} ({len(text)} pages) in {timings['total']:.0f} ms: {timings}")
+
     return {
         "text": text,
         "summary": summary,
-        "entities": entities
-    }
\ No newline at end of file
+        "entities": entities,
+        "content_hash": content_hash,
+        "cached": False,
+        "duplicate_of": duplicate_of,
+        "timings": timings
+    }
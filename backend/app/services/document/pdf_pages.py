@@ -0,0 +1,267 @@
+import mmap
+import os
+import tempfile
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+import logging
+import PyPDF2
+
+logger = logging.getLogger(__name__)
+
+# A page with less extractable text than this that carries an image is
+# treated as scanned and sent to OCR
+SCANNED_PAGE_MIN_CHARS = 20
+
+class PdfPage(NamedTuple):
+    number: int  # 1-based
+    text: str
+    scanned: bool
+
+class SpooledPage(NamedTuple):
+    number: int
+    offset: int  # byte range of the page text in the spool file
+    length: int
+    scanned: bool
+    image_path: Optional[str] = None  # page image for OCR, scanned pages only
+
+# Image filters whose encoded stream is already a standalone image file
+_RAW_IMAGE_FILTERS = {"/DCTDecode": ".jpg", "/JPXDecode": ".jp2"}
+
+def _page_images(page) -> list:
+    """The image XObjects a page draws, without decoding them"""
+    try:
+        xobjects = page["/Resources"].get_object().get("/XObject")
+        if xobjects is None:
+            return []
+        images = []
+        for name, xobject in xobjects.get_object().items():
+            xobject = xobject.get_object()
+            if xobject.get("/Subtype") == "/Image":
+                images.append((name, xobject))
+        return images
+    except (KeyError, AttributeError, TypeError):
+        return []
+
+def _largest_image(page) -> Optional[Tuple[str, bytes]]:
+    """
+    The biggest image on the page as (file suffix, bytes).
+    JPEG and JPEG 2000 streams, which is what scanners produce, are copied out
+    as-is; other encodings go through PyPDF2, which needs Pillow.
+    """
+    images = _page_images(page)
+    if not images:
+        return None
+    name, xobject = max(images, key=lambda image: len(image[1]._data))
+    filters = xobject.get("/Filter")
+    filters = [filters] if isinstance(filters, str) else list(filters or [])
+    if len(filters) == 1 and filters[0] in _RAW_IMAGE_FILTERS:
+        return _RAW_IMAGE_FILTERS[filters[0]], xobject._data
+
+    try:
+        decoded = max(page.images, key=lambda image: len(image.data))
+    except Exception as e:
+        logger.warning(f"Could not extract page image {name}: {e}")
+        return None
+    return os.path.splitext(decoded.name)[1] or ".img", decoded.data
+
+# Page attributes a page takes from its ancestors in the page tree when it has none of its own
+_INHERITABLE_PAGE_ATTRIBUTES = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+def _walk_page_tree(reader: PyPDF2.PdfReader, first_page: int, last_page: Optional[int]) -> Iterator[Tuple[int, PyPDF2.PageObject]]:
+    """
+    (number, page) for pages first_page..last_page, straight from the page tree.
+    reader.pages builds a page object for every page of the document up front;
+    this builds one at a time, and subtrees wholly before first_page are
+    skipped by their /Count without being read.
+    """
+    number = 0
+
+    def walk(node, inherited: dict) -> Iterator[Tuple[int, PyPDF2.PageObject]]:
+        nonlocal number
+        inherited = {**inherited, **{key: node[key] for key in _INHERITABLE_PAGE_ATTRIBUTES if key in node}}
+        for kid_reference in node["/Kids"]:
+            if last_page is not None and number >= last_page:
+                return
+            kid = kid_reference.get_object()
+            if kid.get("/Type", "/Pages") == "/Pages":
+                count = int(kid.get("/Count", 0))
+                if count and number + count < first_page:
+                    number += count
+                else:
+                    yield from walk(kid, inherited)
+                continue
+
+            number += 1
+            if number < first_page:
+                continue
+            page = PyPDF2.PageObject(reader, kid_reference if isinstance(kid_reference, PyPDF2.generic.IndirectObject) else None)
+            page.update(kid)
+            for key, value in inherited.items():
+                if key not in page:
+                    page[PyPDF2.generic.NameObject(key)] = value
+            yield number, page
+
+    yield from walk(reader.trailer["/Root"]["/Pages"], {})
+
+def _iter_reader_pages(file_path: str, first_page: int, last_page: Optional[int], min_text_chars: int):
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        reader = PyPDF2.PdfReader(data)
+        for number, page in _walk_page_tree(reader, max(first_page, 1), last_page):
+            text = page.extract_text() or ""
+            yield page, PdfPage(number, text, len(text.strip()) < min_text_chars and bool(_page_images(page)))
+            # PyPDF2 keeps every object it has parsed; pages are visited once,
+            # so drop them or memory grows with the document
+            reader.resolved_objects.clear()
+
+def iter_pdf_pages(
+    file_path: str,
+    first_page: int = 1,
+    last_page: Optional[int] = None,
+    min_text_chars: int = SCANNED_PAGE_MIN_CHARS
+) -> Iterator[PdfPage]:
+    """
+    Yield the text of each page in [first_page, last_page], one page at a time.
+    The file is memory-mapped rather than read, so only the pages being parsed
+    are resident; stop iterating early to skip the rest of the document.
+    Memory is not entirely flat: PyPDF2 parses the whole cross-reference table
+    when the file is opened, and a page's parent node holds its /Kids array,
+    which together cost about 0.5 KB per page (0.7 MB peak heap at 800
+    pages, 2.5 MB at 3200; see benchmarks/bench_pdf_extraction.py).
+    """
+    for _, page in _iter_reader_pages(file_path, first_page, last_page, min_text_chars):
+        yield page
+
+def spool_pdf_pages(
+    file_path: str,
+    spool_dir: str,
+    first_page: int = 1,
+    last_page: Optional[int] = None
+) -> List[SpooledPage]:
+    """
+    Write page texts to a spool file and return the page index.
+    Runs in the document process pool. Scanned pages get their largest image
+    written next to the spool so OCR can read it from disk.
+    """
+    pages = []
+    with open(os.path.join(spool_dir, "pages.txt"), "ab") as spool:
+        for reader_page, page in _iter_reader_pages(file_path, first_page, last_page, SCANNED_PAGE_MIN_CHARS):
+            data = page.text.encode("utf-8")
+            offset = spool.tell()
+            spool.write(data)
+
+            image_path = None
+            if page.scanned:
+                # Only scanned pages pay for image decoding
+                image = _largest_image(reader_page)
+                if image:
+                    suffix, image_data = image
+                    image_path = os.path.join(spool_dir, f"page-{page.number}{suffix}")
+                    with open(image_path, "wb") as f:
+                        f.write(image_data)
+            pages.append(SpooledPage(page.number, offset, len(data), page.scanned, image_path))
+    return pages
+
+def read_spooled_pages(spool_path: str, pages: Iterable[SpooledPage]) -> Iterator[Tuple[int, str]]:
+    """(page number, text) of spooled pages; usable in pool workers, which get the path rather than the stream"""
+    with open(spool_path, "rb") as spool:
+        for page in pages:
+            spool.seek(page.offset)
+            yield page.number, spool.read(page.length).decode("utf-8")
+
+class PageStream:
+    """
+    Re-iterable page texts of one document, backed by a temporary spool file.
+    Each iteration reads pages back one at a time, so several consumers can
+    walk a several-hundred-page document without it ever being held in
+    memory as one string. The spool is removed by close() or on collection.
+    """
+
+    def __init__(self, spool: tempfile.TemporaryDirectory, pages: List[SpooledPage]):
+        self._spool = spool
+        self.pages = pages
+
+    @classmethod
+    def create_spool(cls) -> tempfile.TemporaryDirectory:
+        return tempfile.TemporaryDirectory(prefix="doc-pages-")
+
+    @classmethod
+    def from_text(cls, text: str) -> "PageStream":
+        """Single-page stream for text that did not come from a PDF, e.g. OCR of an image"""
+        spool = cls.create_spool()
+        stream = cls(spool, [])
+        stream.set_page_text(1, text)
+        return stream
+
+    @classmethod
+    def from_pages(cls, pages: Iterable[Tuple[int, str]]) -> "PageStream":
+        """Stream over (page number, text) pairs, spooled as they are consumed"""
+        stream = cls(cls.create_spool(), [])
+        with open(stream.spool_path, "ab") as spool:
+            for number, text in pages:
+                data = text.encode("utf-8")
+                stream.pages.append(SpooledPage(number, spool.tell(), len(data), False))
+                spool.write(data)
+        return stream
+
+    @property
+    def spool_path(self) -> str:
+        return os.path.join(self._spool.name, "pages.txt")
+
+    @property
+    def scanned_pages(self) -> List[SpooledPage]:
+        return [page for page in self.pages if page.scanned]
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def __iter__(self) -> Iterator[str]:
+        for _, text in self.numbered():
+            yield text
+
+    def numbered(self) -> Iterator[Tuple[int, str]]:
+        """(page number, text) pairs in page order"""
+        if self.pages:
+            yield from read_spooled_pages(self.spool_path, self.pages)
+
+    def set_page_text(self, number: int, text: str):
+        """Replace a page's text, e.g. with OCR output, by appending it to the spool"""
+        data = text.encode("utf-8")
+        with open(self.spool_path, "ab") as spool:
+            offset = spool.tell()
+            spool.write(data)
+        for i, page in enumerate(self.pages):
+            if page.number == number:
+                self.pages[i] = page._replace(offset=offset, length=len(data), scanned=False)
+                return
+        self.pages.append(SpooledPage(number, offset, len(data), False))
+
+    def read(self) -> str:
+        """The whole text as one string; avoid for large documents"""
+        return "\n".join(self)
+
+    def close(self):
+        self._spool.cleanup()
+
+def numbered_pages(source: Union[str, PageStream]) -> Iterator[Tuple[int, str]]:
+    """(page number, text) pairs of a stream, or a plain string as page 1"""
+    if isinstance(source, str):
+        yield 1, source
+    else:
+        yield from source.numbered()
+
+def iter_page_texts(source: Union[str, PageStream]) -> Iterator[str]:
+    """Page texts of a stream, or a plain string as a single page"""
+    if isinstance(source, str):
+        yield source
+    else:
+        yield from source
+
+def leading_text(source: Union[str, PageStream], limit: int) -> str:
+    """Text of the first pages up to `limit` characters, read page by page"""
+    parts = []
+    remaining = limit
+    for page_text in iter_page_texts(source):
+        if remaining <= 0:
+            break
+        parts.append(page_text[:remaining])
+        remaining -= len(parts[-1])
+    return "\n".join(parts)
@@ -0,0 +1,18 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from app.config import settings
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Process pool for CPU-bound document work (PDF parsing, OCR), shared by all documents"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=settings.document_process_workers or None)
+    return _process_pool
+
+def shutdown_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
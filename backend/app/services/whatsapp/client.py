@@ -0,0 +1,234 @@
+import asyncio
+import random
+import time
+from typing import Dict, Iterable, List, Optional
+import logging
+import httpx
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying: throttling and transient server errors
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Failures before the request reached Meta, so a retry cannot send a message
+# twice; anything later (e.g. a read timeout) may already have been delivered
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+class WhatsAppSendError(Exception):
+    """Raised when Meta rejects a message or retries are exhausted"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, response: Optional[dict] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = response
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per second with bursts up to `capacity`.
+    Waiters are served in arrival order, so a busy sender cannot starve others.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        async with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill(time.monotonic())
+            self._tokens -= tokens
+
+    def pause(self, seconds: float):
+        """Drain the bucket for `seconds`, e.g. after Meta answers 429"""
+        self._refill(time.monotonic())
+        self._tokens = min(self._tokens, -seconds * self.rate)
+
+class WhatsAppClient:
+    """
+    Outbound sender for the WhatsApp Cloud API.
+    All sends share one keep-alive HTTP/2 connection pool and one token bucket sized to the phone number's throughput
+    tier. Messages to the same recipient are sent one at a time, in call
+    order; different recipients go out concurrently. 429 and 5xx responses,
+    and connections that could not be made, are retried with jittered
+    exponential backoff.
+    """
+
+    def __init__(
+        self,
+        access_token: str,
+        phone_number_id: str,
+        base_url: str = "https://graph.facebook.com/v18.0",
+        messages_per_second: float = 80,
+        max_connections: int = 100,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        timeout: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.phone_number_id = phone_number_id
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limiter = TokenBucket(messages_per_second)
+        self._recipient_locks: Dict[str, asyncio.Lock] = {}
+        self._lock_users: Dict[str, int] = {}
+        self.sent = 0
+        self.retries = 0
+        self.failed = 0
+
+        self._http = httpx.AsyncClient(
+            base_url=base_url.rstrip("/") + "/",
+            headers={"Authorization": f"Bearer {access_token}"},
+            http2=transport is None,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+            transport=transport
+        )
+
+    async def close(self):
+        await self._http.aclose()
+
+    def _acquire_recipient(self, phone: str) -> asyncio.Lock:
+        lock = self._recipient_locks.get(phone)
+        if lock is None:
+            lock = self._recipient_locks[phone] = asyncio.Lock()
+        self._lock_users[phone] = self._lock_users.get(phone, 0) + 1
+        return lock
+
+    def _release_recipient(self, phone: str):
+        # Drop the lock once nobody is sending to or waiting on this recipient
+        self._lock_users[phone] -= 1
+        if not self._lock_users[phone]:
+            del self._lock_users[phone]
+            del self._recipient_locks[phone]
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        """Full-jitter exponential backoff, never shorter than Retry-After"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+
+    @staticmethod
+    def _json(response: httpx.Response) -> dict:
+        try:
+            return response.json()
+        except ValueError as e:
+            raise WhatsAppSendError(
+                f"WhatsApp API returned {response.status_code} with an invalid JSON body", response.status_code
+            ) from e
+
+    async def _post(self, payload: dict) -> dict:
+        path = f"{self.phone_number_id}/messages"
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+            try:
+                response = await self._http.post(path, json=payload)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise WhatsAppSendError(f"WhatsApp API unreachable: {e!r}") from e
+                delay = self._backoff(attempt, None)
+                logger.warning(f"WhatsApp send failed ({e!r}), retrying in {delay:.2f}s")
+            except httpx.TransportError as e:
+                raise WhatsAppSendError(f"WhatsApp send failed after the request was sent: {e!r}") from e
+            else:
+                if response.status_code < 400:
+                    return self._json(response)
+
+                body = None
+                if response.headers.get("content-type", "").startswith("application/json"):
+                    try:
+                        body = response.json()
+                    except ValueError:
+                        pass
+                if response.status_code not in RETRYABLE_STATUSES or attempt == self.max_retries:
+                    raise WhatsAppSendError(
+                        f"WhatsApp API returned {response.status_code}", response.status_code, body
+                    )
+                delay = self._backoff(attempt, response.headers.get("retry-after"))
+                if response.status_code == 429:
+                    self.limiter.pause(delay)
+                logger.warning(f"WhatsApp API returned {response.status_code}, retrying in {delay:.2f}s")
+
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def send_payloads(self, phone: str, payloads: Iterable[dict]) -> List[dict]:
+        """Send messages to one recipient in order; nothing else is sent to them in between"""
+        lock = self._acquire_recipient(phone)
+        try:
+            async with lock:
+                results = []
+                for payload in payloads:
+                    try:
+                        results.append(await self._post({"messaging_product": "whatsapp", "to": phone, **payload}))
+                    except WhatsAppSendError:
+                        self.failed += 1
+                        raise
+                    self.sent += 1
+                return results
+        finally:
+            self._release_recipient(phone)
+
+    async def send_text(self, phone: str, text: str) -> dict:
+        """Send a text message"""
+        (result,) = await self.send_payloads(phone, [{"type": "text", "text": {"body": text}}])
+        return result
+
+    async def send_texts(self, phone: str, texts: Iterable[str]) -> List[dict]:
+        """Send several text messages back to back, keeping their order"""
+        return await self.send_payloads(phone, ({"type": "text", "text": {"body": text}} for text in texts))
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "retries": self.retries,
+            "failed": self.failed,
+            "active_recipients": len(self._recipient_locks),
+        }
+
+_whatsapp_client: Optional[WhatsAppClient] = None
+
+def get_whatsapp_client() -> WhatsAppClient:
+    """Get the process-wide WhatsApp client"""
+    global _whatsapp_client
+    if _whatsapp_client is None:
+        _whatsapp_client = WhatsAppClient(
+            settings.meta_access_token,
+            settings.meta_phone_number_id,
+            base_url=settings.meta_api_base_url,
+            messages_per_second=settings.meta_messages_per_second,
+            max_connections=settings.meta_max_connections,
+            max_retries=settings.meta_send_max_retries,
+            timeout=settings.meta_send_timeout
+        )
+    return _whatsapp_client
+
+async def close_whatsapp_client():
+    """Close the shared connection pool, e.g. on shutdown"""
+    global _whatsapp_client
+    if _whatsapp_client is not None:
+        await _whatsapp_client.close()
+        _whatsapp_client = None
+
+async def send_message(phone: str, text: str) -> dict:
+    """Send a WhatsApp text message through the shared client"""
+    return await get_whatsapp_client().send_text(phone, text)
+
+async def send_messages(phone: str, texts: Iterable[str]) -> List[dict]:
+    """Send WhatsApp text messages to one recipient, in order"""
+    return await get_whatsapp_client().send_texts(phone, texts)
@@ -1,6 +1,9 @@
 from enum import Enum
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
 from app.services.whatsapp.client import send_message
-from app.services.ai.language_detector import detect_language
+from app.services.whatsapp.message_catalog import get_message_catalog
+from app.services.whatsapp.state_store import ConversationStateStore, get_state_store
+from app.services.ai.language_detector import DetectedLanguage, language_detector
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,224 +20,179 @@ class ConversationState(Enum):
     SUMMARY = "summary"
     HANDOVER = "handover"
 
+# Kinds of input a transition can be keyed on
+TEXT = "text"
+MEDIA = "media"
+ANY = "*"
+
 class ConversationManager:
     """
     Manages WhatsApp conversation flow for legal intake.
-    Uses in-memory storage for now (can be upgraded to Redis later).
+    State and collected answers live in a shared ConversationStateStore
+    (in-process LRU or Redis), loaded once and written once per message.
     """
 
-    def __init__(self, phone_number: str):
+    def __init__(
+        self,
+        phone_number: str,
+        store: Optional[ConversationStateStore] = None,
+        send: Optional[Callable[[str, str], Awaitable]] = None,
+        detector=None
+    ):
         self.phone = phone_number
         self.state_key = f"conv:{phone_number}"
-        # In-memory storage for conversation states (replace with Redis later)
-        self._memory_store = {}
+        self.store = store if store is not None else get_state_store()
+        # Injectable so the simulator can run the flow without Meta or OpenAI
+        self.send = send or send_message
+        self.detector = detector or language_detector
+        self._data: Dict[str, str] = {}
+        self._loaded = False
+        self._dirty = False
+        self._in_message = False
+
+    async def load(self):
+        """Load state and all collected fields in a single store round trip"""
+        self._data = await self.store.load(self.state_key)
+        self._loaded = True
+        self._dirty = False
+
+    async def save(self):
+        """Write back state and collected fields if anything changed"""
+        if self._dirty:
+            await self.store.save(self.state_key, self._data)
+            self._dirty = False
+
+    def _get_field(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        return self._data.get(name, default)
+
+    def _set_field(self, name: str, value: str):
+        self._data[name] = value
+        self._dirty = True
 
     async def get_state(self) -> ConversationState:
         """Get current conversation state"""
-        state = self._memory_store.get(self.state_key)
+        if not self._loaded:
+            await self.load()
+        state = self._get_field("state")
         return ConversationState(state) if state else ConversationState.GREETING
 
     async def set_state(self, state: ConversationState):
         """Set conversation state"""
-        self._memory_store[self.state_key] = state.value
+        self._set_field("state", state.value)
         logger.info(f"Set conversation state for {self.phone}: {state.value}")
 
+        # Outside handle_message there is no batched write-back, so persist now
+        if not self._in_message:
+            await self.save()
+
     async def handle_message(self, message: str, media: dict = None):
         """Handle incoming WhatsApp message"""
+        await self.load()
+        self._in_message = True
+        try:
+            return await self._dispatch(message, media)
+        finally:
+            self._in_message = False
+            await self.save()
+
+    async def _dispatch(self, message: str, media: dict = None):
+        """Route the message through the transition table for the current state"""
         state = await self.get_state()
-        lang = await detect_language(message)
+        lang = (await self._conversation_language(message)).language
 
         logger.info(f"Handling message in state {state.value} for {self.phone}")
 
-        if state == ConversationState.GREETING:
-            return await self._handle_greeting(lang)
-        elif state == ConversationState.CONSENT:
-            return await self._handle_consent(message, lang)
-        elif state == ConversationState.LANGUAGE:
-            return await self._handle_language_selection(message, lang)
-        elif state == ConversationState.MATTER_TYPE:
-            return await self._handle_matter_type(message, lang)
-        elif state == ConversationState.DESCRIPTION:
-            return await self._handle_description(message, lang)
-        elif state == ConversationState.JURISDICTION:
-            return await self._handle_jurisdiction(message, lang)
-        elif state == ConversationState.DOCUMENT_UPLOAD:
-            return await self._handle_document_upload(message, lang, media)
-        elif state == ConversationState.CONTACT_INFO:
-            return await self._handle_contact_info(message, lang)
-        elif state == ConversationState.SUMMARY:
-            return await self._handle_summary(message, lang)
-        elif state == ConversationState.HANDOVER:
-            return await self._handle_handover(message, lang)
-        else:
+        input_kind = MEDIA if media else TEXT
+        transition = TRANSITIONS.get((state, input_kind)) or TRANSITIONS.get((state, ANY))
+        if transition is None:
             return await self._handle_fallback(message, lang)
 
-    async def _handle_greeting(self, lang: str):
-        """Handle initial greeting and consent"""
-        # Send greeting message
-        greeting_text = self._get_localized_message("greeting", lang)
-        await send_message(self.phone, greeting_text)
-
-        # Move to consent stage
-        await self.set_state(ConversationState.CONSENT)
-        return {"stage": "greeting", "next": "consent"}
-
-    async def _handle_consent(self, message: str, lang: str):
-        """Handle consent collection"""
-        consent_text = self._get_localized_message("consent", lang)
-        await send_message(self.phone, consent_text)
-
-        # For now, assume consent and move to language selection
-        await self.set_state(ConversationState.LANGUAGE)
-        return {"stage": "consent", "next": "language"}
-
-    async def _handle_language_selection(self, message: str, lang: str):
+        result = {"stage": state.value, "next": transition.next_state.value}
+        result.update(await transition.handler(self, transition, message, lang, media) or {})
+        await self.set_state(transition.next_state)
+        return result
+
+    async def _conversation_language(self, message: str) -> DetectedLanguage:
+        """
+        Language for this message.
+        Only a confident detection is stored as the conversation's language;
+        once stored it is reused for every later message instead of detecting
+        again. Guesses are used for this message alone.
+        """
+        lang = self._get_field("language")
+        if lang:
+            return DetectedLanguage(lang, True)
+
+        detected = await self.detector.detect(message)
+        if detected.confident:
+            self._set_field("language", detected.language)
+        return detected
+
+    async def _collect_and_prompt(self, transition: "Transition", message: str, lang: str, media: dict = None):
+        """Store the answer for this state, if it collects one, and ask the next question"""
+        if transition.field:
+            self._set_field(transition.field, message)
+        await self.send(self.phone, self._get_localized_message(transition.prompt, lang))
+
+    async def _handle_language_selection(self, transition: "Transition", message: str, lang: str, media: dict = None):
         """Handle language preference"""
-        # Store detected language preference
-        self._memory_store[f"{self.state_key}:language"] = lang
-
-        # Ask for legal matter type
-        matter_text = self._get_localized_message("matter_type", lang)
-        await send_message(self.phone, matter_text)
-
-        await self.set_state(ConversationState.MATTER_TYPE)
-        return {"stage": "language", "next": "matter_type"}
-
-    async def _handle_matter_type(self, message: str, lang: str):
-        """Handle legal matter type selection"""
-        # Store matter type
-        self._memory_store[f"{self.state_key}:matter_type"] = message
-
-        # Ask for description
-        desc_text = self._get_localized_message("description", lang)
-        await send_message(self.phone, desc_text)
-
-        await self.set_state(ConversationState.DESCRIPTION)
-        return {"stage": "matter_type", "next": "description"}
-
-    async def _handle_description(self, message: str, lang: str):
-        """Handle case description"""
-        # Store description
-        self._memory_store[f"{self.state_key}:description"] = message
-
-        # Ask for jurisdiction
-        jurisdiction_text = self._get_localized_message("jurisdiction", lang)
-        await send_message(self.phone, jurisdiction_text)
-
-        await self.set_state(ConversationState.JURISDICTION)
-        return {"stage": "description", "next": "jurisdiction"}
-
-    async def _handle_jurisdiction(self, message: str, lang: str):
-        """Handle jurisdiction information"""
-        # Store jurisdiction
-        self._memory_store[f"{self.state_key}:jurisdiction"] = message
-
-        # Ask for document upload
-        doc_text = self._get_localized_message("document_upload", lang)
-        await send_message(self.phone, doc_text)
-
-        await self.set_state(ConversationState.DOCUMENT_UPLOAD)
-        return {"stage": "jurisdiction", "next": "document_upload"}
-
-    async def _handle_document_upload(self, message: str, lang: str, media: dict = None):
-        """Handle document upload"""
-        # For now, just acknowledge and move to contact info
-        contact_text = self._get_localized_message("contact_info", lang)
-        await send_message(self.phone, contact_text)
-
-        await self.set_state(ConversationState.CONTACT_INFO)
-        return {"stage": "document_upload", "next": "contact_info"}
-
-    async def _handle_contact_info(self, message: str, lang: str):
-        """Handle contact information collection"""
-        # Store contact info
-        self._memory_store[f"{self.state_key}:contact_info"] = message
-
-        # Show summary
-        summary_text = self._get_localized_message("summary", lang)
-        await send_message(self.phone, summary_text)
-
-        await self.set_state(ConversationState.SUMMARY)
-        return {"stage": "contact_info", "next": "summary"}
-
-    async def _handle_summary(self, message: str, lang: str):
-        """Handle case summary confirmation"""
-        # Generate summary of collected information
-        summary = self._generate_case_summary(lang)
-
-        # Send summary to user
-        await send_message(self.phone, summary)
-
-        # Ask for confirmation
-        confirm_text = self._get_localized_message("summary_confirm", lang)
-        await send_message(self.phone, confirm_text)
-
-        await self.set_state(ConversationState.HANDOVER)
-        return {"stage": "summary", "next": "handover"}
+        # The preference was stored by _conversation_language if the reply
+        # was detected confidently; a guess must not fix it for good
+        await self.send(self.phone, self._get_localized_message(transition.prompt, lang))
 
-    async def _handle_handover(self, message: str, lang: str):
-        """Handle final handover to legal team"""
-        handover_text = self._get_localized_message("handover", lang)
-        await send_message(self.phone, handover_text)
+    async def _handle_summary(self, transition: "Transition", message: str, lang: str, media: dict = None):
+        """Send the collected case details and ask for confirmation"""
+        await self.send(self.phone, self._generate_case_summary(lang))
+        await self.send(self.phone, self._get_localized_message(transition.prompt, lang))
 
-        # Mark conversation as completed
-        await self.set_state(ConversationState.GREETING)  # Reset for next interaction
-        return {"stage": "handover", "status": "completed"}
+    async def _handle_handover(self, transition: "Transition", message: str, lang: str, media: dict = None):
+        """Handle final handover to legal team; the conversation starts over afterwards"""
+        await self.send(self.phone, self._get_localized_message(transition.prompt, lang))
+        return {"status": "completed"}
 
     async def _handle_fallback(self, message: str, lang: str):
         """Handle unexpected messages"""
         fallback_text = self._get_localized_message("fallback", lang)
-        await send_message(self.phone, fallback_text)
+        await self.send(self.phone, fallback_text)
         return {"stage": "fallback"}
 
-    def _get_localized_message(self, message_type: str, lang: str) -> str:
+    def _get_localized_message(self, message_type: str, lang: str, **params) -> str:
         """Get localized message based on language"""
-        messages = {
-            'en': {
-                'greeting': "👋 Hello! I'm here to help you with your legal matter. I'll guide you through the process step by step.",
-                'consent': "📋 Before we proceed, I need your consent to collect and process your information for legal consultation purposes. Do you agree to continue?",
-                'language': "🌐 I detected you're communicating in English. Is this correct?",
-                'matter_type': "⚖️ What type of legal matter do you need help with? (e.g., criminal, civil, family, corporate, etc.)",
-                'description': "📝 Please describe your legal issue in detail. The more information you provide, the better I can assist you.",
-                'jurisdiction': "🏛️ In which jurisdiction or court district is this matter located?",
-                'document_upload': "📎 Do you have any documents related to this case? You can upload them now or we can proceed without them.",
-                'contact_info': "📞 Please provide your full name and preferred contact method (email/phone) for follow-up.",
-                'summary': "📋 Let me summarize what we've collected:",
-                'summary_confirm': "✅ Does this summary look correct? Reply 'yes' to confirm or 'no' to make changes.",
-                'handover': "🎯 Thank you! Your case has been submitted to our legal team. A lawyer will contact you within 24 hours.",
-                'fallback': "🤔 I'm not sure I understood that. Could you please rephrase or start over?"
-            },
-            'es': {
-                'greeting': "👋 ¡Hola! Estoy aquí para ayudarte con tu asunto legal. Te guiaré paso a paso a través del proceso.",
-                'consent': "📋 Antes de proceder, necesito tu consentimiento para recopilar y procesar tu información con fines de consulta legal. ¿Estás de acuerdo en continuar?",
-                'language': "🌐 Detecté que te comunicas en español. ¿Es correcto?",
-                'matter_type': "⚖️ ¿Qué tipo de asunto legal necesitas ayuda? (ej: penal, civil, familiar, corporativo, etc.)",
-                'description': "📝 Por favor describe tu problema legal en detalle. Cuanta más información proporciones, mejor podré ayudarte.",
-                'jurisdiction': "🏛️ ¿En qué jurisdicción o distrito judicial se encuentra este asunto?",
-                'document_upload': "📎 ¿Tienes documentos relacionados con este caso? Puedes subirlos ahora o podemos proceder sin ellos.",
-                'contact_info': "📞 Por favor proporciona tu nombre completo y método de contacto preferido (email/teléfono) para seguimiento.",
-                'summary': "📋 Permíteme resumir lo que hemos recopilado:",
-                'summary_confirm': "✅ ¿Este resumen parece correcto? Responde 'sí' para confirmar o 'no' para hacer cambios.",
-                'handover': "🎯 ¡Gracias! Tu caso ha sido enviado a nuestro equipo legal. Un abogado se pondrá en contacto contigo dentro de 24 horas.",
-                'fallback': "🤔 No estoy seguro de haber entendido eso. ¿Podrías reformular o empezar de nuevo?"
-            }
-        }
-
-        return messages.get(lang, messages['en']).get(message_type, messages['en'][message_type])
+        return get_message_catalog().render(lang, message_type, **params)
 
     def _generate_case_summary(self, lang: str) -> str:
         """Generate case summary from collected data"""
-        matter_type = self._memory_store.get(f"{self.state_key}:matter_type", "Not specified")
-        description = self._memory_store.get(f"{self.state_key}:description", "Not provided")
-        jurisdiction = self._memory_store.get(f"{self.state_key}:jurisdiction", "Not specified")
-        contact_info = self._memory_store.get(f"{self.state_key}:contact_info", "Not provided")
-
-        summary_lines = [
-            "📋 *Case Summary:*",
-            f"⚖️ *Matter Type:* {matter_type}",
-            f"📝 *Description:* {description[:200]}{'...' if len(description) > 200 else ''}",
-            f"🏛️ *Jurisdiction:* {jurisdiction}",
-            f"📞 *Contact Info:* {contact_info}"
-        ]
-
-        return "\n".join(summary_lines)
\ No newline at end of file
+        messages = get_message_catalog().messages(lang)
+        not_specified = messages["not_specified"].text
+        not_provided = messages["not_provided"].text
+        description = self._get_field("description", not_provided)
+
+        return messages["case_summary"].render({
+            "matter_type": self._get_field("matter_type", not_specified),
+            "description": f"{description[:200]}{'...' if len(description) > 200 else ''}",
+            "jurisdiction": self._get_field("jurisdiction", not_specified),
+            "contact_info": self._get_field("contact_info", not_provided),
+        })
+
+class Transition(NamedTuple):
+    handler: Callable  # ConversationManager method run for the message
+    next_state: ConversationState
+    field: Optional[str] = None  # Answer field the message is stored in
+    prompt: Optional[str] = None  # Localized message sent to the user
+
+# (state, input kind) -> transition; rows keyed on TEXT or MEDIA win over ANY
+TRANSITIONS: Dict[Tuple[ConversationState, str], Transition] = {
+    (ConversationState.GREETING, ANY): Transition(ConversationManager._collect_and_prompt, ConversationState.CONSENT, prompt="greeting"),
+    # For now, assume consent and move to language selection
+    (ConversationState.CONSENT, ANY): Transition(ConversationManager._collect_and_prompt, ConversationState.LANGUAGE, prompt="consent"),
+    (ConversationState.LANGUAGE, ANY): Transition(ConversationManager._handle_language_selection, ConversationState.MATTER_TYPE, prompt="matter_type"),
+    (ConversationState.MATTER_TYPE, ANY): Transition(ConversationManager._collect_and_prompt, ConversationState.DESCRIPTION, "matter_type", "description"),
+    (ConversationState.DESCRIPTION, ANY): Transition(ConversationManager._collect_and_prompt, ConversationState.JURISDICTION, "description", "jurisdiction"),
+    (ConversationState.JURISDICTION, ANY): Transition(ConversationManager._collect_and_prompt, ConversationState.DOCUMENT_UPLOAD, "jurisdiction", "document_upload"),
+    # For now, documents are just acknowledged
+    (ConversationState.DOCUMENT_UPLOAD, ANY): Transition(ConversationManager._collect_and_prompt, ConversationState.CONTACT_INFO, prompt="contact_info"),
+    (ConversationState.CONTACT_INFO, ANY): Transition(ConversationManager._collect_and_prompt, ConversationState.SUMMARY, "contact_info", "summary"),
+    (ConversationState.SUMMARY, ANY): Transition(ConversationManager._handle_summary, ConversationState.HANDOVER, prompt="summary_confirm"),
+    # Reset for next interaction
+    (ConversationState.HANDOVER, ANY): Transition(ConversationManager._handle_handover, ConversationState.GREETING, prompt="handover"),
+}
@@ -0,0 +1,108 @@
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+import logging
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class RecentMessageIds:
+    """
+    Base class for the fast duplicate filter in front of message ingestion.
+    Meta redelivers webhooks it considers timed out; ids seen within the TTL
+    are dropped before any database, LLM or outbound work. The unique index
+    on messages.whatsapp_message_id remains the backstop for older ids.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+
+    async def claim(self, message_ids: List[str]) -> List[str]:
+        """Mark ids as seen and return those that had not been seen before"""
+        raise NotImplementedError
+
+    async def release(self, message_ids: Iterable[str]):
+        """Forget ids whose processing failed so a redelivery is accepted"""
+        raise NotImplementedError
+
+class InMemoryRecentMessageIds(RecentMessageIds):
+    """Per-process recent-id set with TTL and a size bound"""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        super().__init__(ttl_seconds)
+        self.max_entries = max_entries
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+
+    async def claim(self, message_ids: List[str]) -> List[str]:
+        now = time.monotonic()
+        self._expire(now)
+
+        new_ids = []
+        for message_id in message_ids:
+            if message_id in self._seen:
+                continue
+            self._seen[message_id] = now + self.ttl_seconds
+            new_ids.append(message_id)
+
+        while len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+        return new_ids
+
+    async def release(self, message_ids: Iterable[str]):
+        for message_id in message_ids:
+            self._seen.pop(message_id, None)
+
+    def _expire(self, now: float):
+        # Entries are inserted in time order, so expired ones are at the front
+        while self._seen:
+            message_id, expires_at = next(iter(self._seen.items()))
+            if expires_at > now:
+                break
+            del self._seen[message_id]
+
+class RedisRecentMessageIds(RecentMessageIds):
+    """Recent-id set shared across workers, one SET NX EX per id in a single pipeline"""
+
+    KEY_PREFIX = "wamid:"
+
+    def __init__(self, redis_url: str, ttl_seconds: int):
+        super().__init__(ttl_seconds)
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(redis_url, decode_responses=True)
+
+    async def claim(self, message_ids: List[str]) -> List[str]:
+        if not message_ids:
+            return []
+
+        async with self._client.pipeline(transaction=False) as pipe:
+            for message_id in message_ids:
+                pipe.set(f"{self.KEY_PREFIX}{message_id}", 1, nx=True, ex=self.ttl_seconds)
+            results = await pipe.execute()
+
+        return [message_id for message_id, created in zip(message_ids, results) if created]
+
+    async def release(self, message_ids: Iterable[str]):
+        keys = [f"{self.KEY_PREFIX}{message_id}" for message_id in message_ids]
+        if keys:
+            await self._client.delete(*keys)
+
+def create_recent_message_ids(backend: Optional[str] = None) -> RecentMessageIds:
+    """Build the duplicate filter selected by configuration"""
+    backend = (backend or settings.message_dedup_backend).lower()
+
+    if backend == "redis":
+        return RedisRecentMessageIds(settings.redis_url, settings.message_dedup_ttl)
+    if backend == "memory":
+        return InMemoryRecentMessageIds(settings.message_dedup_ttl, settings.message_dedup_max_entries)
+
+    raise ValueError(f"Unknown message dedup backend: {backend}")
+
+_recent_message_ids: Optional[RecentMessageIds] = None
+
+def get_recent_message_ids() -> RecentMessageIds:
+    """Get the process-wide duplicate filter"""
+    global _recent_message_ids
+    if _recent_message_ids is None:
+        _recent_message_ids = create_recent_message_ids()
+    return _recent_message_ids
@@ -0,0 +1,126 @@
+import asyncio
+import zlib
+from typing import Any, Awaitable, Callable, List, Optional
+import logging
+from app.config import settings
+from app.schemas.whatsapp import WebhookPayload
+
+logger = logging.getLogger(__name__)
+
+CONVERSATION_QUEUE_PREFIX = "whatsapp_conversations"
+
+def shard_for(phone: str, num_shards: int) -> int:
+    """
+    Map a phone number to a shard.
+    Uses CRC32 rather than hash() so every process agrees on the mapping.
+    """
+    return zlib.crc32(phone.encode()) % num_shards
+
+def shard_queue_name(phone: str) -> str:
+    """Celery queue that owns all messages from this phone number"""
+    return f"{CONVERSATION_QUEUE_PREFIX}.{shard_for(phone, settings.conversation_shards)}"
+
+class ConversationDispatcher:
+    """
+    Runs conversation work sharded by phone number, like an actor per conversation.
+    Every phone maps to exactly one shard and each shard has a single worker task,
+    so messages from one sender are handled strictly in order while different
+    senders proceed in parallel. Shard queues are bounded: submit() waits when
+    a shard is full, which pushes back on the ingest stage.
+    """
+
+    def __init__(self, handler: Callable[[Any], Awaitable[Any]], num_shards: int, max_queue_size: int):
+        self.handler = handler
+        self.num_shards = num_shards
+        self._queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=max_queue_size) for _ in range(num_shards)]
+        self._tasks: List[asyncio.Task] = []
+        self.processed = 0
+        self.failed = 0
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.num_shards)]
+        logger.info(f"Started conversation dispatcher with {self.num_shards} shard(s)")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, phone: str, item: Any, track_result: bool = True) -> Optional[asyncio.Future]:
+        """
+        Queue an item on the phone's shard, waiting while the shard is full.
+        Returns a future resolved with the handler's result, or None for
+        fire-and-forget submissions.
+        """
+        if not self._tasks:
+            await self.start()
+
+        future = asyncio.get_running_loop().create_future() if track_result else None
+        await self._queues[shard_for(phone, self.num_shards)].put((future, item))
+        return future
+
+    async def _worker(self, shard: int):
+        queue = self._queues[shard]
+        while True:
+            future, item = await queue.get()
+            try:
+                result = await self.handler(item)
+                self.processed += 1
+                if future and not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Conversation shard {shard} failed to handle message: {e}")
+                if future and not future.done():
+                    future.set_exception(e)
+            finally:
+                queue.task_done()
+
+    def stats(self) -> dict:
+        depths = [queue.qsize() for queue in self._queues]
+        return {
+            "shards": self.num_shards,
+            "depth": sum(depths),
+            "max_shard_depth": max(depths) if depths else 0,
+            "busy_shards": sum(1 for depth in depths if depth),
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+_dispatcher: Optional[ConversationDispatcher] = None
+
+def get_dispatcher() -> ConversationDispatcher:
+    """Get the process-wide conversation dispatcher"""
+    global _dispatcher
+    if _dispatcher is None:
+        # Imported lazily: the handler module imports this one
+        from app.services.whatsapp.message_handler import run_conversation
+
+        _dispatcher = ConversationDispatcher(
+            run_conversation,
+            settings.conversation_shards,
+            settings.conversation_shard_queue_size
+        )
+    return _dispatcher
+
+async def dispatch_conversation_message(payload: WebhookPayload, wait: bool = False):
+    """
+    Hand a persisted message to the conversation FSM on its phone's shard.
+    With the Celery backend the message goes to the shard's queue, which must be
+    consumed by a single worker process (-c 1) to keep per-phone ordering.
+    Set wait to run in-process and return the FSM result.
+    """
+    if settings.webhook_queue_backend == "celery" and not wait:
+        from app.workers.tasks.message_processing import handle_conversation_message
+
+        handle_conversation_message.apply_async(
+            args=[payload.json()],
+            queue=shard_queue_name(payload.phone)
+        )
+        return None
+
+    future = await get_dispatcher().submit(payload.phone, payload, track_result=wait)
+    return await future if wait else None
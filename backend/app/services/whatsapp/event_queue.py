@@ -0,0 +1,158 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, List, Optional
+import logging
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_QUEUE_NAME = "whatsapp_webhooks"
+WEBHOOK_LAG_KEY = "whatsapp:webhooks:last_lag"
+
+class WebhookEventQueue:
+    """
+    Base class for queues that decouple webhook acknowledgement from processing.
+    The webhook endpoint only enqueues the raw event; workers store it and hand
+    each message to the conversation dispatcher. Keep a single ingest consumer
+    (one in-process worker, or one -c 1 Celery worker on this queue) so events
+    from the same phone reach the dispatcher in arrival order.
+    """
+
+    async def start(self):
+        """Start consuming events (no-op for out-of-process backends)"""
+        return None
+
+    async def stop(self):
+        """Stop consuming events"""
+        return None
+
+    async def enqueue(self, event: dict):
+        """
+        Enqueue a raw webhook event for background processing.
+        Raises asyncio.QueueFull when the queue is at capacity.
+        """
+        raise NotImplementedError
+
+    async def stats(self) -> dict:
+        """Report queue depth and processing lag"""
+        raise NotImplementedError
+
+class InProcessEventQueue(WebhookEventQueue):
+    """
+    asyncio.Queue fallback for local runs and single-node deployments.
+    Events are lost if the process exits before they are processed.
+    """
+
+    def __init__(self, workers: int, max_size: int):
+        self.workers = workers
+        self._queue: "asyncio.Queue" = asyncio.Queue(maxsize=max_size)
+        self._received_at: Deque[float] = deque()
+        self._tasks: List[asyncio.Task] = []
+        self.processed = 0
+        self.failed = 0
+        self.last_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+
+    async def start(self):
+        if self._tasks:
+            return
+        for i in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(i)))
+        logger.info(f"Started {self.workers} in-process webhook worker(s)")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, event: dict):
+        received_at = time.time()
+        self._queue.put_nowait((received_at, event))
+        self._received_at.append(received_at)
+
+    async def _worker(self, worker_id: int):
+        # Imported lazily: the handler pulls in the database and AI services
+        from app.services.whatsapp.message_handler import process_webhook_event
+
+        while True:
+            received_at, event = await self._queue.get()
+            self._received_at.popleft()
+            self._record_lag(time.time() - received_at)
+            try:
+                await process_webhook_event(event)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Webhook worker {worker_id} failed to process event: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _record_lag(self, lag: float):
+        self.last_lag_seconds = lag
+        self.max_lag_seconds = max(self.max_lag_seconds, lag)
+
+    async def stats(self) -> dict:
+        oldest_lag = time.time() - self._received_at[0] if self._received_at else 0.0
+        return {
+            "backend": "memory",
+            "depth": self._queue.qsize(),
+            "oldest_event_age_seconds": round(oldest_lag, 3),
+            "last_lag_seconds": round(self.last_lag_seconds, 3),
+            "max_lag_seconds": round(self.max_lag_seconds, 3),
+            "processed": self.processed,
+            "failed": self.failed,
+            "workers": len(self._tasks),
+        }
+
+class CeleryEventQueue(WebhookEventQueue):
+    """
+    Celery-backed queue for multi-worker deployments.
+    Depth is read from the Redis broker list; lag is reported by the workers.
+    """
+
+    def __init__(self, redis_url: str):
+        self.redis_url = redis_url
+        self._redis = None
+
+    async def enqueue(self, event: dict):
+        from app.workers.tasks.message_processing import process_whatsapp_event
+
+        process_whatsapp_event.apply_async(args=[event, time.time()], queue=WEBHOOK_QUEUE_NAME)
+
+    async def stats(self) -> dict:
+        if self._redis is None:
+            import redis.asyncio as redis
+            self._redis = redis.from_url(self.redis_url, decode_responses=True)
+
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.llen(WEBHOOK_QUEUE_NAME)
+            pipe.get(WEBHOOK_LAG_KEY)
+            depth, last_lag = await pipe.execute()
+
+        return {
+            "backend": "celery",
+            "depth": depth,
+            "last_lag_seconds": round(float(last_lag), 3) if last_lag else 0.0,
+        }
+
+def create_event_queue(backend: Optional[str] = None) -> WebhookEventQueue:
+    """Build the webhook event queue selected by configuration"""
+    backend = (backend or settings.webhook_queue_backend).lower()
+
+    if backend == "celery":
+        return CeleryEventQueue(settings.redis_url)
+    if backend == "memory":
+        return InProcessEventQueue(settings.webhook_queue_workers, settings.webhook_queue_max_size)
+
+    raise ValueError(f"Unknown webhook queue backend: {backend}")
+
+_event_queue: Optional[WebhookEventQueue] = None
+
+def get_event_queue() -> WebhookEventQueue:
+    """Get the process-wide webhook event queue"""
+    global _event_queue
+    if _event_queue is None:
+        _event_queue = create_event_queue()
+    return _event_queue
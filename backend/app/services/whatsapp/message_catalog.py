@@ -0,0 +1,164 @@
+import json
+import os
+import string
+import time
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+import logging
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCALES_DIR = os.path.join(os.path.dirname(__file__), "locales")
+DEFAULT_LANGUAGE = "en"
+
+# Keys starting with an underscore are catalog metadata, not messages
+FALLBACK_KEY = "_fallback"
+
+class CompiledTemplate:
+    """
+    A message with its placeholders parsed once at load time.
+    Rendering joins literal chunks and parameter values; messages without
+    placeholders render to the stored string with no work at all.
+    """
+
+    __slots__ = ("text", "_parts", "fields")
+
+    def __init__(self, text: str):
+        self.text = text
+        self._parts: List[Tuple[str, Optional[str]]] = []
+        fields = []
+        for literal, field, spec, conversion in string.Formatter().parse(text):
+            if field is not None and (spec or conversion or not field.isidentifier()):
+                raise ValueError(f"Only plain {{name}} placeholders are supported: {text!r}")
+            self._parts.append((literal, field))
+            if field is not None:
+                fields.append(field)
+        self.fields = frozenset(fields)
+        if not fields:
+            # Formatter unescapes '{{' and '}}', so keep its literal output
+            self.text = "".join(literal for literal, _ in self._parts)
+            self._parts = []
+
+    def render(self, params: Mapping[str, object]) -> str:
+        if not self._parts:
+            return self.text
+        chunks = []
+        for literal, field in self._parts:
+            chunks.append(literal)
+            if field is not None:
+                chunks.append(str(params.get(field, "")))
+        return "".join(chunks)
+
+def _fallback_chain(lang: str, declared: Dict[str, List[str]], available) -> List[str]:
+    """
+    Languages to look a message up in, most specific first.
+    Explicit fallbacks from the locale file come first, then the base language
+    of a regional tag ("es-MX" -> "es"), and the chain always ends in English.
+    """
+    chain: List[str] = []
+    pending = [lang]
+    while pending:
+        current = pending.pop(0)
+        if current in chain:
+            continue
+        chain.append(current)
+        pending.extend(declared.get(current, []))
+        if "-" in current:
+            pending.append(current.split("-", 1)[0])
+    if DEFAULT_LANGUAGE not in chain:
+        chain.append(DEFAULT_LANGUAGE)
+    return [code for code in chain if code in available]
+
+class MessageCatalog:
+    """
+    Localized conversation messages loaded from one JSON file per language.
+    Every language is resolved against its fallback chain once, at load time,
+    into an immutable key -> template mapping, so a lookup is a single dict
+    access. Set MESSAGE_CATALOG_RELOAD_INTERVAL to pick up edited files
+    without a restart.
+    """
+
+    def __init__(self, locales_dir: str = DEFAULT_LOCALES_DIR, reload_interval: float = 0):
+        self.locales_dir = locales_dir
+        self.reload_interval = reload_interval
+        self._lookup: Mapping[str, Mapping[str, CompiledTemplate]] = MappingProxyType({})
+        self._mtimes: Dict[str, float] = {}
+        self._checked_at = 0.0
+        self.reload()
+
+    @property
+    def languages(self) -> List[str]:
+        return sorted(self._lookup)
+
+    def _scan(self) -> Dict[str, float]:
+        return {
+            name: os.stat(os.path.join(self.locales_dir, name)).st_mtime
+            for name in os.listdir(self.locales_dir)
+            if name.endswith(".json")
+        }
+
+    def reload(self):
+        """Load every locale file and swap in the resolved lookup"""
+        mtimes = self._scan()
+        raw: Dict[str, Dict[str, str]] = {}
+        declared: Dict[str, List[str]] = {}
+        for name in mtimes:
+            with open(os.path.join(self.locales_dir, name), encoding="utf-8") as f:
+                data = json.load(f)
+            lang = name[:-5]
+            declared[lang] = list(data.pop(FALLBACK_KEY, []))
+            raw[lang] = {key: CompiledTemplate(text) for key, text in data.items() if not key.startswith("_")}
+
+        if DEFAULT_LANGUAGE not in raw:
+            raise ValueError(f"Message catalog {self.locales_dir} has no {DEFAULT_LANGUAGE}.json")
+
+        lookup = {}
+        for lang in raw:
+            merged: Dict[str, CompiledTemplate] = {}
+            for code in reversed(_fallback_chain(lang, declared, raw)):
+                merged.update(raw[code])
+            lookup[lang] = MappingProxyType(merged)
+
+        # A single assignment, so concurrent readers see the old or the new catalog
+        self._lookup = MappingProxyType(lookup)
+        self._mtimes = mtimes
+        self._checked_at = time.monotonic()
+        logger.info(f"Loaded message catalog with languages {self.languages}")
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        try:
+            if self._scan() != self._mtimes:
+                self.reload()
+        except (OSError, ValueError) as e:
+            logger.error(f"Message catalog reload failed, keeping the previous one: {e}")
+
+    def messages(self, lang: str) -> Mapping[str, CompiledTemplate]:
+        """Resolved templates for a language, falling back to its base language or English"""
+        if self.reload_interval:
+            self._maybe_reload()
+        lookup = self._lookup
+        messages = lookup.get(lang)
+        if messages is None:
+            messages = lookup.get(lang.split("-", 1)[0]) or lookup[DEFAULT_LANGUAGE]
+        return messages
+
+    def render(self, lang: str, key: str, **params) -> str:
+        """Render a message for a language; raises KeyError if no language defines it"""
+        return self.messages(lang)[key].render(params)
+
+_message_catalog: Optional[MessageCatalog] = None
+
+def get_message_catalog() -> MessageCatalog:
+    """Get the process-wide message catalog, loading it on first use"""
+    global _message_catalog
+    if _message_catalog is None:
+        _message_catalog = MessageCatalog(
+            settings.message_catalog_dir or DEFAULT_LOCALES_DIR,
+            settings.message_catalog_reload_interval
+        )
+    return _message_catalog
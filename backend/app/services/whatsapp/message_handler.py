@@ -0,0 +1,281 @@
+import asyncio
+from typing import List, Set
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import AsyncSessionLocal
+from app.schemas.whatsapp import WhatsAppWebhookPayload, WebhookPayload
+from app.services.whatsapp.conversation_manager import ConversationManager
+from app.services.whatsapp.dispatcher import dispatch_conversation_message
+from app.services.whatsapp.dedup import get_recent_message_ids
+from app.models import Conversation, ConversationStatus, Message, User
+import logging
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_CONVERSATION_STATUSES = [ConversationStatus.NEW, ConversationStatus.IN_PROGRESS]
+
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING ... RETURNING
+_INSERT_DIALECTS = {"postgresql": postgresql, "sqlite": sqlite}
+
+async def filter_new_messages(payloads: List[WebhookPayload]) -> List[WebhookPayload]:
+    """Drop messages whose WhatsApp id was seen recently (redeliveries)"""
+    unique = list({payload.whatsapp_message_id: payload for payload in payloads}.values())
+    new_ids = set(await get_recent_message_ids().claim([payload.whatsapp_message_id for payload in unique]))
+
+    dropped = len(payloads) - len(new_ids)
+    if dropped:
+        logger.info(f"Dropped {dropped} redelivered WhatsApp message(s)")
+    return [payload for payload in unique if payload.whatsapp_message_id in new_ids]
+
+async def _insert_messages(rows: List[dict], db: AsyncSession) -> Set[str]:
+    """Insert message rows, skipping ids already stored; returns the ids inserted"""
+    dialect = _INSERT_DIALECTS[db.bind.dialect.name]
+    stmt = (
+        dialect.insert(Message)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=[Message.whatsapp_message_id])
+        .returning(Message.whatsapp_message_id)
+    )
+    return set((await db.execute(stmt)).scalars())
+
+# Upserts the sender's user and active conversation, inserts the message and,
+# if it was new, marks the conversation in progress, all in one statement.
+# Enum columns hold member names, and client-side column defaults are spelled
+# out explicitly.
+UPSERT_INCOMING_MESSAGE_SQL = text("""
+WITH existing_user AS (
+    SELECT id FROM users WHERE phone = :phone ORDER BY id LIMIT 1
+), new_user AS (
+    INSERT INTO users (phone, full_name, email, role, is_active)
+    SELECT :phone, :full_name, :email, 'CLIENT', true
+    WHERE NOT EXISTS (SELECT 1 FROM existing_user)
+    ON CONFLICT (email) DO UPDATE SET phone = EXCLUDED.phone
+    RETURNING id
+), client AS (
+    SELECT id FROM existing_user UNION ALL SELECT id FROM new_user
+), existing_conversation AS (
+    SELECT id FROM conversations
+    WHERE phone_number = :phone AND status IN ('NEW', 'IN_PROGRESS')
+    ORDER BY id LIMIT 1
+), new_conversation AS (
+    INSERT INTO conversations (client_id, phone_number, status, language, current_stage)
+    SELECT id, :phone, 'IN_PROGRESS', 'en', 'greeting' FROM client
+    WHERE NOT EXISTS (SELECT 1 FROM existing_conversation)
+    RETURNING id
+), conversation AS (
+    SELECT id FROM existing_conversation UNION ALL SELECT id FROM new_conversation
+), new_message AS (
+    INSERT INTO messages (conversation_id, message_type, content, whatsapp_message_id, is_from_user)
+    SELECT id, :message_type, :content, :whatsapp_message_id, true FROM conversation
+    ON CONFLICT (whatsapp_message_id) DO NOTHING
+    RETURNING id, conversation_id
+), touched_conversation AS (
+    UPDATE conversations SET status = 'IN_PROGRESS', updated_at = now()
+    WHERE id IN (SELECT conversation_id FROM new_message)
+)
+SELECT (SELECT id FROM conversation) AS conversation_id, (SELECT id FROM new_message) AS message_id
+""")
+
+async def upsert_incoming_message(payload: WebhookPayload, db: AsyncSession) -> bool:
+    """
+    Store one incoming message in a single round trip (PostgreSQL only).
+    Returns False if the message id was already stored.
+    """
+    result = await db.execute(UPSERT_INCOMING_MESSAGE_SQL, {
+        "phone": payload.phone,
+        "full_name": f"WhatsApp User {payload.phone}",
+        "email": f"whatsapp_{payload.phone}@temp.local",
+        "message_type": payload.message_type,
+        "content": payload.text,
+        "whatsapp_message_id": payload.whatsapp_message_id,
+    })
+    message_id = result.one().message_id
+    await db.commit()
+    return message_id is not None
+
+async def persist_incoming_messages(payloads: List[WebhookPayload], db: AsyncSession) -> List[WebhookPayload]:
+    """
+    Store a batch of incoming messages in one transaction.
+    Users and active conversations for every sender are looked up with one
+    query each, missing ones are inserted in bulk, then all messages are
+    inserted together with ON CONFLICT DO NOTHING on the WhatsApp message id.
+    Returns the payloads that were actually stored, i.e. not duplicates.
+    """
+    if not payloads:
+        return []
+
+    # The common case of one message per webhook takes the single-statement path
+    if len(payloads) == 1 and db.bind.dialect.name == "postgresql":
+        return payloads if await upsert_incoming_message(payloads[0], db) else []
+
+    phones = list(dict.fromkeys(payload.phone for payload in payloads))
+
+    # Create or get users
+    users = {user.phone: user for user in (await db.execute(select(User).where(User.phone.in_(phones)))).scalars()}
+    new_users = [
+        User(
+            phone=phone,
+            full_name=f"WhatsApp User {phone}",
+            email=f"whatsapp_{phone}@temp.local"
+        )
+        for phone in phones if phone not in users
+    ]
+    if new_users:
+        db.add_all(new_users)
+        await db.flush()
+        users.update((user.phone, user) for user in new_users)
+
+    # Create or get conversations
+    conversations = {}
+    for conversation in (await db.execute(
+        select(Conversation).where(
+            Conversation.phone_number.in_(phones),
+            Conversation.status.in_(ACTIVE_CONVERSATION_STATUSES)
+        ).order_by(Conversation.id)
+    )).scalars():
+        conversations.setdefault(conversation.phone_number, conversation)
+
+    new_conversations = [
+        Conversation(
+            client_id=users[phone].id,
+            phone_number=phone,
+            status=ConversationStatus.NEW,
+            language="en"  # Will be updated by language detector
+        )
+        for phone in phones if phone not in conversations
+    ]
+    if new_conversations:
+        db.add_all(new_conversations)
+        await db.flush()
+        conversations.update((conversation.phone_number, conversation) for conversation in new_conversations)
+
+    # Create message records
+    inserted_ids = await _insert_messages([
+        {
+            "conversation_id": conversations[payload.phone].id,
+            "message_type": payload.message_type,
+            "content": payload.text,
+            "whatsapp_message_id": payload.whatsapp_message_id,
+            "is_from_user": True
+        }
+        for payload in payloads
+    ], db)
+
+    # Update conversation status, only where a message was actually added
+    touched = {conversations[payload.phone].id for payload in payloads if payload.whatsapp_message_id in inserted_ids}
+    if touched:
+        await db.execute(
+            update(Conversation)
+            .where(Conversation.id.in_(touched))
+            .values(status=ConversationStatus.IN_PROGRESS)
+        )
+    await db.commit()
+
+    return [payload for payload in payloads if payload.whatsapp_message_id in inserted_ids]
+
+async def store_new_messages(payloads: List[WebhookPayload], db: AsyncSession) -> List[WebhookPayload]:
+    """
+    Filter out redeliveries and store the rest.
+    Returns only messages that are new, so duplicates never reach the FSM.
+    """
+    payloads = await filter_new_messages(payloads)
+    try:
+        return await persist_incoming_messages(payloads, db)
+    except Exception:
+        await db.rollback()
+        # Let Meta's redelivery through, since nothing was stored
+        await get_recent_message_ids().release(payload.whatsapp_message_id for payload in payloads)
+        raise
+
+class ConversationError(Exception):
+    """
+    The FSM failed part way through a message. Replies may already have been
+    sent and fields saved, so the message counts as handled and is not retried.
+    """
+
+async def forget_messages(payloads: List[WebhookPayload]):
+    """
+    Undo store_new_messages for messages the FSM never received, e.g. when
+    handing them to the dispatcher or the shard queue failed.
+    Their ids are released from the duplicate filter and their rows deleted,
+    so Meta's redelivery or a worker retry stores and processes them again
+    instead of dropping them as duplicates.
+    """
+    message_ids = [payload.whatsapp_message_id for payload in payloads]
+    if not message_ids:
+        return
+
+    await get_recent_message_ids().release(message_ids)
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Message).where(Message.whatsapp_message_id.in_(message_ids)))
+        await db.commit()
+    logger.warning(f"Released {len(message_ids)} unprocessed WhatsApp message(s) for redelivery")
+
+async def run_conversation(payload: WebhookPayload):
+    """Advance the conversation FSM for a message that has been persisted"""
+    manager = ConversationManager(payload.phone)
+    try:
+        result = await manager.handle_message(payload.text or "", {})
+    except Exception as e:
+        raise ConversationError(f"Conversation for {payload.phone} failed on message {payload.whatsapp_message_id}: {e}") from e
+
+    logger.info(f"Processed message from {payload.phone}: {(payload.text or '')[:50]}...")
+    return result
+
+async def handle_incoming_messages(payloads: List[WebhookPayload], db: AsyncSession):
+    """Handle every message of a WhatsApp webhook"""
+    try:
+        payloads = await store_new_messages(payloads, db)
+    except Exception as e:
+        logger.error(f"Error handling incoming messages: {e}")
+        raise
+
+    # Run through the dispatcher so concurrent requests from the same phone
+    # cannot interleave inside the FSM; different phones run in parallel
+    results = await asyncio.gather(*(
+        dispatch_conversation_message(payload, wait=True) for payload in payloads
+    ), return_exceptions=True)
+
+    # Only messages the FSM never saw are released for a retry; repeating one
+    # it failed part way through could send the client the same replies twice
+    errors = [(payload, result) for payload, result in zip(payloads, results) if isinstance(result, Exception)]
+    unprocessed = [payload for payload, error in errors if not isinstance(error, ConversationError)]
+    if unprocessed:
+        await forget_messages(unprocessed)
+        raise next(error for _, error in errors if not isinstance(error, ConversationError))
+    for _, error in errors:
+        logger.error(f"{error}")
+    return [None if isinstance(result, Exception) else result for result in results]
+
+async def handle_incoming_message(payload: WebhookPayload, db: AsyncSession):
+    """Handle incoming WhatsApp message"""
+    results = await handle_incoming_messages([payload], db)
+    return results[0] if results else None
+
+async def process_webhook_event(event: dict):
+    """
+    Process a queued WhatsApp webhook event.
+    Used by the background workers when the webhook runs in queue mode;
+    the event is the webhook body exactly as received from Meta. All of its
+    messages are stored in one transaction, then each is queued for the FSM
+    on its sender's dispatcher shard. Only queueing failures release messages
+    for the retry; the FSM's own failures happen later, in the shard worker,
+    and leave the message handled.
+    """
+    payloads = WebhookPayload.list_from_whatsapp_webhook(WhatsAppWebhookPayload.parse_obj(event))
+    if not payloads:
+        logger.info("No message found in queued webhook event")
+        return
+
+    async with AsyncSessionLocal() as db:
+        payloads = await store_new_messages(payloads, db)
+
+    for index, payload in enumerate(payloads):
+        try:
+            await dispatch_conversation_message(payload)
+        except Exception:
+            # Not queued, so the FSM never saw these; the retry of this
+            # event must not drop them as duplicates
+            await forget_messages(payloads[index:])
+            raise
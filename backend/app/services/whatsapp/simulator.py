@@ -0,0 +1,149 @@
+import asyncio
+import random
+import statistics
+import time
+from typing import Dict, List, Optional
+import logging
+from app.services.ai.language_detector import DetectedLanguage
+from app.services.whatsapp.conversation_manager import ConversationManager, TRANSITIONS
+from app.services.whatsapp.state_store import ConversationStateStore, InMemoryStateStore
+
+logger = logging.getLogger(__name__)
+
+# One plausible client reply per intake step, in order
+SCRIPTS = {
+    "en": [
+        "Hi, I need a lawyer",
+        "Yes, I agree",
+        "English is fine",
+        "civil",
+        "My landlord has kept my deposit for three months after I moved out",
+        "Mumbai",
+        "no documents",
+        "Priya Sharma, priya@example.com",
+        "ok",
+        "yes",
+    ],
+    "hi-Latn": [
+        "Namaste, mujhe vakeel chahiye",
+        "haan theek hai",
+        "Hindi chalegi",
+        "family",
+        "Shaadi ke baad se sasural wale dahej maang rahe hain",
+        "Delhi",
+        "abhi koi document nahi hai",
+        "Amit Kumar, 9876543210",
+        "theek hai",
+        "haan",
+    ],
+}
+
+class FakeSender:
+    """Stand-in for the WhatsApp client that counts messages and can add latency"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.sent = 0
+
+    async def __call__(self, phone: str, text: str):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.sent += 1
+        return {"messages": [{"id": f"wamid.fake.{self.sent}"}]}
+
+class FakeDetector:
+    """Stand-in for the language detector with a fixed answer per script"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self._languages = {message: lang for lang, script in SCRIPTS.items() for message in script}
+
+    async def detect(self, text: str) -> DetectedLanguage:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.calls += 1
+        return DetectedLanguage(self._languages.get(text, "en"), True)
+
+class SimulationReport:
+    """Per-state latency and overall throughput of a simulation run"""
+
+    def __init__(self, latencies: Dict[str, List[float]], elapsed: float, conversations: int, sent: int, detections: int):
+        self.latencies = latencies
+        self.elapsed = elapsed
+        self.conversations = conversations
+        self.sent = sent
+        self.detections = detections
+
+    @property
+    def messages(self) -> int:
+        return sum(len(samples) for samples in self.latencies.values())
+
+    @property
+    def messages_per_second(self) -> float:
+        return self.messages / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> Dict[str, dict]:
+        """Latency statistics in milliseconds for each state"""
+        stats = {}
+        for state, samples in self.latencies.items():
+            ordered = sorted(samples)
+            stats[state] = {
+                "count": len(ordered),
+                "mean_ms": statistics.fmean(ordered) * 1000,
+                "p50_ms": ordered[len(ordered) // 2] * 1000,
+                "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                "max_ms": ordered[-1] * 1000,
+            }
+        return stats
+
+    def format(self) -> str:
+        lines = [
+            f"{self.conversations} conversations, {self.messages} messages in {self.elapsed:.2f}s "
+            f"({self.messages_per_second:.0f} messages/s, {self.sent} replies, {self.detections} detections)",
+            f"{'state':<16} {'count':>7} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}",
+        ]
+        for state, row in self.summary().items():
+            lines.append(
+                f"{state:<16} {row['count']:>7} {row['mean_ms']:>9.3f} {row['p50_ms']:>9.3f} "
+                f"{row['p95_ms']:>9.3f} {row['max_ms']:>9.3f}"
+            )
+        return "\n".join(lines)
+
+async def simulate(
+    conversations: int,
+    concurrency: int = 100,
+    send_latency: float = 0.0,
+    detect_latency: float = 0.0,
+    store: Optional[ConversationStateStore] = None,
+    seed: int = 7
+) -> SimulationReport:
+    """
+    Replay synthetic intake conversations through the real FSM.
+    Each conversation walks every transition once, from greeting to handover,
+    with a fake sender and detector; up to `concurrency` run at a time.
+    """
+    rng = random.Random(seed)
+    store = store if store is not None else InMemoryStateStore(ttl_seconds=3600, max_entries=conversations + 1)
+    sender = FakeSender(send_latency)
+    detector = FakeDetector(detect_latency)
+    latencies: Dict[str, List[float]] = {state.value: [] for state, _ in TRANSITIONS}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(index: int):
+        script = SCRIPTS[rng.choice(list(SCRIPTS))]
+        manager = ConversationManager(f"sim{index:08d}", store=store, send=sender, detector=detector)
+        async with semaphore:
+            for message in script:
+                start = time.perf_counter()
+                result = await manager.handle_message(message, {})
+                latencies.setdefault(result["stage"], []).append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_one(i) for i in range(conversations)))
+    elapsed = time.perf_counter() - start
+
+    return SimulationReport(
+        {state: samples for state, samples in latencies.items() if samples},
+        elapsed, conversations, sender.sent, detector.calls
+    )
@@ -0,0 +1,136 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import logging
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class ConversationStateStore:
+    """
+    Base class for conversation state backends.
+    A conversation is kept as one flat mapping of field -> string value
+    (the FSM state plus every collected answer), so a message needs a
+    single read and a single write regardless of how many fields exist.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+
+    async def load(self, key: str) -> Dict[str, str]:
+        """Return all fields stored for a conversation (empty dict if none)"""
+        raise NotImplementedError
+
+    async def save(self, key: str, fields: Dict[str, str]):
+        """Atomically replace all fields of a conversation and refresh its expiry"""
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        """Remove a conversation from the store"""
+        raise NotImplementedError
+
+    async def close(self):
+        """Release any resources held by the backend"""
+        return None
+
+class InMemoryStateStore(ConversationStateStore):
+    """
+    In-process LRU store with idle expiry, for single-node deployments.
+    State is not shared between uvicorn workers.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        super().__init__(ttl_seconds)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, str]]]" = OrderedDict()
+
+    async def load(self, key: str) -> Dict[str, str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return {}
+
+        expires_at, fields = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return {}
+
+        # Reading counts as activity, so slide the expiry like the Redis backend does
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, fields)
+        self._entries.move_to_end(key)
+        return dict(fields)
+
+    async def save(self, key: str, fields: Dict[str, str]):
+        if not fields:
+            self._entries.pop(key, None)
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, dict(fields))
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            evicted_key, _ = self._entries.popitem(last=False)
+            logger.debug(f"Evicted conversation state {evicted_key} from memory store")
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class RedisStateStore(ConversationStateStore):
+    """
+    Redis-backed store shared by every worker and node.
+    Each conversation is one hash; reads pipeline HGETALL with EXPIRE and
+    writes replace the hash inside MULTI/EXEC, so both are one round trip.
+    """
+
+    def __init__(self, redis_url: str, ttl_seconds: int):
+        super().__init__(ttl_seconds)
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("The redis package is required for the Redis conversation state backend") from e
+
+        self._client = redis.from_url(redis_url, decode_responses=True)
+
+    async def load(self, key: str) -> Dict[str, str]:
+        async with self._client.pipeline(transaction=False) as pipe:
+            pipe.hgetall(key)
+            pipe.expire(key, self.ttl_seconds)
+            fields, _ = await pipe.execute()
+        return fields or {}
+
+    async def save(self, key: str, fields: Dict[str, str]):
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            if fields:
+                pipe.hset(key, mapping=fields)
+                pipe.expire(key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def delete(self, key: str):
+        await self._client.delete(key)
+
+    async def close(self):
+        await self._client.close()
+
+def create_state_store(backend: Optional[str] = None) -> ConversationStateStore:
+    """Build the state store selected by configuration"""
+    backend = (backend or settings.conversation_state_backend).lower()
+
+    if backend == "redis":
+        return RedisStateStore(settings.redis_url, settings.conversation_state_ttl)
+    if backend == "memory":
+        return InMemoryStateStore(settings.conversation_state_ttl, settings.conversation_state_max_entries)
+
+    raise ValueError(f"Unknown conversation state backend: {backend}")
+
+_state_store: Optional[ConversationStateStore] = None
+
+def get_state_store() -> ConversationStateStore:
+    """Get the process-wide conversation state store"""
+    global _state_store
+    if _state_store is None:
+        _state_store = create_state_store()
+        logger.info(f"Using {type(_state_store).__name__} for conversation state")
+    return _state_store
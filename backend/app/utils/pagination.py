@@ -0,0 +1,70 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ClauseElement
+import logging
+
+logger = logging.getLogger(__name__)
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """Encode the sort key of the last row on a page as an opaque token"""
+    payload = {
+        key: {"dt": value.isoformat()} if isinstance(value, datetime) else value
+        for key, value in values.items()
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(token: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Decode a token from encode_cursor; raises ValueError if it is malformed"""
+    if not token:
+        return None
+
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        return {
+            key: datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value
+            for key, value in payload.items()
+        }
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, keeping its bind parameters"""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kw)}"
+
+async def estimate_count(db: AsyncSession, query: Select) -> Optional[int]:
+    """
+    Row estimate for a query from the PostgreSQL planner, without running it.
+    Returns None on other databases or if the query cannot be explained.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return None
+
+    connection = await db.connection()
+    try:
+        # A failed EXPLAIN aborts the transaction; the savepoint keeps it usable
+        # for the exact count the caller falls back to
+        async with connection.begin_nested():
+            plan = (await connection.execute(Explain(query))).scalar()
+    except Exception as e:
+        logger.warning(f"Could not estimate row count: {e}")
+        return None
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
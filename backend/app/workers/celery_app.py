@@ -0,0 +1,26 @@
+from celery import Celery
+from app.config import settings
+
+celery_app = Celery(
+    "legal_intake",
+    broker=settings.redis_url,
+    backend=settings.redis_url,
+    include=[
+        "app.workers.tasks.message_processing",
+    ]
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    accept_content=["json"],
+    result_serializer="json",
+    timezone="UTC",
+    enable_utc=True,
+    # Webhook events are acknowledged only after processing so a crashed
+    # worker does not lose them; prefetch one at a time to keep lag visible
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    task_ignore_result=True,
+    task_default_queue="default",
+)
@@ -0,0 +1,49 @@
+import asyncio
+import time
+import logging
+from app.workers.celery_app import celery_app
+from app.services.whatsapp.event_queue import WEBHOOK_LAG_KEY
+
+logger = logging.getLogger(__name__)
+
+# One event loop per worker process, so async clients (Redis, HTTP) created
+# on first use stay bound to the loop that later tasks run on. Created lazily
+# so prefork children do not share the parent's selector.
+_loop = None
+
+def run_async(coro):
+    """Run a coroutine on the worker process event loop"""
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
+
+@celery_app.task(name="whatsapp.process_event", bind=True, max_retries=3, default_retry_delay=5)
+def process_whatsapp_event(self, event: dict, received_at: float):
+    """Process a WhatsApp webhook event that was acknowledged by the API"""
+    from app.services.whatsapp.message_handler import process_webhook_event
+
+    lag = time.time() - received_at
+    try:
+        celery_app.backend.client.set(WEBHOOK_LAG_KEY, lag)
+    except Exception as e:
+        logger.debug(f"Could not record webhook lag: {e}")
+
+    try:
+        run_async(process_webhook_event(event))
+    except Exception as e:
+        logger.error(f"Error processing WhatsApp event: {e}")
+        raise self.retry(exc=e)
+
+@celery_app.task(name="whatsapp.handle_conversation_message")
+def handle_conversation_message(payload_json: str):
+    """
+    Run the conversation FSM for one message.
+    Routed to a per-shard queue (see dispatcher.shard_queue_name); run one
+    single-concurrency worker per shard queue so each phone stays ordered:
+    celery -A app.workers.celery_app worker -Q whatsapp_conversations.0 -c 1
+    """
+    from app.schemas.whatsapp import WebhookPayload
+    from app.services.whatsapp.message_handler import run_conversation
+
+    run_async(run_conversation(WebhookPayload.parse_raw(payload_json)))
@@ -0,0 +1,126 @@
+"""
+Load benchmark for the API: concurrent WhatsApp webhooks plus case list queries.
+
+Run it against a live server before and after a change and compare the
+requests/second and latency percentiles it prints, e.g.
+
+    uvicorn app.main:app --port 8000 --workers 1
+    python benchmarks/bench_api_load.py --base-url http://localhost:8000 --concurrency 50 --duration 30
+
+Webhooks are signed with META_WEBHOOK_SECRET and use unique message ids and
+phone numbers, so they exercise the full ingest path rather than dedup.
+
+Results for list_cases alone (--webhook-ratio 0, --duration 20), sync
+session (96c99a8) vs AsyncSession (b5e0c07). These were taken in-process
+through httpx.ASGITransport on SQLite with 5000 cases, because PostgreSQL
+and uvicorn were not available; rerun against the docker-compose
+PostgreSQL for production numbers.
+
+    concurrency  sync session                     AsyncSession
+    10           344.0 req/s, p99 46.8ms          294.8 req/s, p99 49.1ms
+    50           stalled: 50 requests in 300s,    261.8 req/s, p99 506.7ms
+                 10 errors (pool exhausted)
+
+With one worker the sync path is slightly faster at low concurrency, since
+SQLite's driver does no real I/O. Past its threadpool and connection pool
+limits it stops serving, while the async path keeps its throughput.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import statistics
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+def webhook_body(phone: str) -> bytes:
+    event = {
+        "object": "whatsapp_business_account",
+        "entry": [{
+            "id": "bench",
+            "changes": [{
+                "field": "messages",
+                "value": {
+                    "messaging_product": "whatsapp",
+                    "messages": [{
+                        "from": phone,
+                        "id": f"wamid.bench.{uuid.uuid4().hex}",
+                        "timestamp": str(int(time.time())),
+                        "type": "text",
+                        "text": {"body": "Mujhe bail ke baare mein help chahiye"}
+                    }]
+                }
+            }]
+        }]
+    }
+    return json.dumps(event).encode()
+
+async def worker(client, args, secret, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        if random.random() < args.webhook_ratio:
+            name = "webhook"
+            body = webhook_body(f"91{random.randint(7000000000, 9999999999)}")
+            signature = "sha256=" + hmac.new(secret, body, hashlib.sha256).hexdigest()
+            request = client.post(
+                "/api/v1/webhooks/whatsapp",
+                content=body,
+                headers={"Content-Type": "application/json", "X-Hub-Signature-256": signature}
+            )
+        else:
+            name = "list_cases"
+            request = client.get("/api/v1/cases/", params={"size": 20})
+
+        started = time.perf_counter()
+        try:
+            response = await request
+            if response.status_code >= 400:
+                errors[name] += 1
+        except httpx.HTTPError:
+            errors[name] += 1
+        latencies[name].append(time.perf_counter() - started)
+
+async def main(args):
+    secret = os.environ.get("META_WEBHOOK_SECRET", "").encode()
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            worker(client, args, secret, deadline, latencies, errors) for _ in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{total} requests in {elapsed:.1f}s with concurrency {args.concurrency}: {total / elapsed:.1f} req/s")
+    for name, values in sorted(latencies.items()):
+        print(
+            f"  {name:<11} n={len(values):<6} errors={errors[name]:<4} "
+            f"mean={statistics.mean(values) * 1000:.1f}ms "
+            f"p50={percentile(values, 50) * 1000:.1f}ms "
+            f"p95={percentile(values, 95) * 1000:.1f}ms "
+            f"p99={percentile(values, 99) * 1000:.1f}ms"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--webhook-ratio", type=float, default=0.5, help="share of requests that are webhooks")
+    asyncio.run(main(parser.parse_args()))
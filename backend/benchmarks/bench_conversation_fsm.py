@@ -0,0 +1,42 @@
+"""
+Load test for the intake conversation FSM.
+
+Replays synthetic conversations (English and Hinglish scripts) through
+ConversationManager with a fake WhatsApp sender and language detector, so
+no Meta or OpenAI calls are made, and prints per-state latency and overall
+messages per second. Add --send-latency / --detect-latency to model the
+network, or --redis to exercise the Redis state store.
+
+    python benchmarks/bench_conversation_fsm.py --conversations 5000 --concurrency 200
+"""
+import argparse
+import asyncio
+import logging
+
+from app.config import settings
+from app.services.whatsapp.simulator import simulate
+from app.services.whatsapp.state_store import RedisStateStore
+
+async def main(args):
+    store = RedisStateStore(settings.redis_url, ttl_seconds=600) if args.redis else None
+    report = await simulate(
+        args.conversations,
+        concurrency=args.concurrency,
+        send_latency=args.send_latency,
+        detect_latency=args.detect_latency,
+        store=store,
+    )
+    print(report.format())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--send-latency", type=float, default=0.0, help="seconds per outbound message")
+    parser.add_argument("--detect-latency", type=float, default=0.0, help="seconds per language detection")
+    parser.add_argument("--redis", action="store_true", help="use the Redis state store at REDIS_URL")
+    args = parser.parse_args()
+
+    # Per-message INFO logs would dominate the measurement
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main(args))
@@ -0,0 +1,152 @@
+"""
+Accuracy and throughput benchmark for the rule-based legal entity engine.
+
+Generates --documents synthetic Indian legal documents (FIRs, petitions,
+judgments, notices) of --pages pages each, with known entities written in
+the varied surface forms real documents use and filler text between them.
+Reports precision and recall per field against those labels, documents and
+pages per second, and how many documents would still ask the LLM to fill in
+a low-confidence field.
+
+    python benchmarks/bench_entity_extraction.py --documents 500 --pages 10
+"""
+import argparse
+import random
+import time
+from collections import Counter
+
+from app.config import settings
+from app.services.ai.entity_extractor import ENTITY_FIELDS, get_entity_engine
+
+FIRST_NAMES = ["Ramesh", "Sunita", "Anil", "Priya", "Mohammed", "Lakshmi", "Vikram", "Fatima", "Harpreet", "Arjun", "Kavita", "Joseph"]
+LAST_NAMES = ["Kumar", "Sharma", "Devi", "Singh", "Khan", "Iyer", "Reddy", "Banerjee", "Gupta", "Patel", "Fernandes", "Yadav"]
+INSTITUTIONS = ["State of Punjab", "State of Maharashtra", "Union of India", "State of Uttar Pradesh", "Punjab National Bank", "Delhi Development Authority"]
+COURTS = [
+    ("Delhi High Court", ["High Court of Delhi", "Delhi High Court", "HIGH COURT OF DELHI AT NEW DELHI"]),
+    ("Bombay High Court", ["Bombay High Court", "High Court of Judicature at Bombay"]),
+    ("Madras High Court", ["Madras High Court", "High Court of Judicature at Madras"]),
+    ("Punjab and Haryana High Court", ["Punjab and Haryana High Court", "High Court of Punjab and Haryana"]),
+    ("Supreme Court of India", ["Supreme Court of India", "SUPREME COURT OF INDIA"]),
+    ("National Consumer Disputes Redressal Commission", ["National Consumer Disputes Redressal Commission", "NCDRC"]),
+]
+STATIONS = [("Saket", "Delhi"), ("Hauz Khas", "Delhi"), ("Bandra", "Mumbai"), ("Koramangala", "Bengaluru"), ("Hazratganj", "Lucknow")]
+ACTS = [("IPC", ["IPC", "the Indian Penal Code", "I.P.C."]), ("BNS", ["BNS", "the Bharatiya Nyaya Sanhita, 2023"]), ("NI Act", ["N.I. Act", "the Negotiable Instruments Act, 1881"]), ("CrPC", ["Cr.P.C.", "the Code of Criminal Procedure"])]
+CASE_TYPES = [("W.P.(C)", ["W.P.(C) No. {n}/{y}", "WP(C) {n} of {y}", "W.P. (C) No. {n} of {y}"]), ("Crl.A.", ["Crl.A. No. {n}/{y}", "CRL.A. {n} of {y}"]), ("Civil Appeal", ["Civil Appeal No. {n} of {y}"]), ("C.S.(OS)", ["CS(OS) {n}/{y}", "C.S. (OS) No. {n} of {y}"]), ("Bail Appln.", ["Bail Appln. {n}/{y}", "BAIL APPLN. No. {n} of {y}"])]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+FILLER = (
+    "the learned counsel submitted that the impugned order suffers from infirmity and the matter requires "
+    "consideration in light of the material on record para page annexure hearing adjourned the witness deposed "
+    "that he was present at the spot and the documents were exhibited the court is of the view that"
+).split()
+
+def person(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+def filler(rng, words):
+    text = " ".join(rng.choices(FILLER, k=words))
+    # Numbers that are not entities
+    return text + f" (para {rng.randint(1, 40)}.{rng.randint(1, 9)}, page {rng.randint(1, 30)} of {rng.randint(30, 60)})."
+
+def make_document(rng, pages):
+    """(page texts, gold labels) for one synthetic document"""
+    gold = {field: set() for field in ENTITY_FIELDS}
+    facts = []
+
+    party_a = person(rng)
+    party_b = rng.choice(INSTITUTIONS) if rng.random() < 0.6 else person(rng)
+    gold["parties"].update({party_a, party_b})
+    if rng.random() < 0.5:
+        title = f"{party_a} ..... Petitioner\n    VERSUS\n{party_b} ..... Respondent"
+    else:
+        title = f"{party_a} vs. {party_b}"
+    if rng.random() < 0.2:
+        # A complaint or FIR copy, filed before any court or case number exists
+        header = f"COMPLAINT\n\n{title}\n"
+    else:
+        court, court_forms = rng.choice(COURTS)
+        gold["courts"].add(court)
+        case_type, case_forms = rng.choice(CASE_TYPES)
+        number, year = rng.randint(1, 9999), rng.randint(2005, 2024)
+        gold["case_numbers"].add(f"{case_type} No. {number}/{year}")
+        header = f"IN THE {rng.choice(court_forms)}\n{rng.choice(case_forms).format(n=number, y=year)}\n\n{title}\n"
+
+    if rng.random() < 0.7:
+        station, city = rng.choice(STATIONS)
+        fir, fir_year = rng.randint(1, 999), rng.randint(2015, 2024)
+        gold["fir_numbers"].add(f"FIR {fir}/{fir_year}")
+        gold["police_stations"].add(f"{station}, {city}")
+        facts.append(rng.choice([
+            f"FIR No. {fir}/{fir_year} registered at P.S. {station}",
+            f"F.I.R. No. {fir} of {fir_year}, Police Station {station}",
+            f"FIR {fir}/{str(fir_year)[2:]} PS {station}",
+        ]))
+    for _ in range(rng.randint(1, 3)):
+        act, act_forms = rng.choice(ACTS)
+        sections = rng.sample(["302", "307", "34", "120B", "406", "420", "498A", "138", "103", "125", "438"], rng.randint(1, 3))
+        gold["statutes"].update(f"{act} Section {section}" for section in sections)
+        joined = "/".join(sections) if rng.random() < 0.5 else ", ".join(sections[:-1]) + (" and " if len(sections) > 1 else "") + sections[-1]
+        facts.append(rng.choice([f"u/s {joined} {rng.choice(act_forms)}", f"under Sections {joined} of {rng.choice(act_forms)}", f"Section {joined} {rng.choice(act_forms)}"]))
+    for _ in range(rng.randint(1, 3)):
+        day, month, year = rng.randint(1, 28), rng.randint(1, 12), rng.randint(2010, 2024)
+        gold["dates"].add(f"{year:04d}-{month:02d}-{day:02d}")
+        facts.append("dated " + rng.choice([
+            f"{day:02d}.{month:02d}.{year}", f"{day}/{month}/{year}", f"{day}th {MONTHS[month - 1]}, {year}",
+            f"{MONTHS[month - 1]} {day}, {year}", f"{day}-{MONTHS[month - 1][:3]}-{year}",
+        ]))
+    for _ in range(rng.randint(0, 2)):
+        lakhs = rng.randint(1, 90)
+        gold["amounts"].add(f"INR {lakhs * 100000}")
+        facts.append("a sum of " + rng.choice([f"Rs. {lakhs},00,000/-", f"₹{lakhs} lakh", f"INR {lakhs * 100000}", f"Rs.{lakhs} lakhs"]))
+
+    texts = [header + filler(rng, 80)]
+    for page in range(1, pages):
+        texts.append(filler(rng, 250))
+    for fact in facts:
+        page = rng.randrange(pages)
+        texts[page] += f" The {fact} is noted. " + filler(rng, 30)
+    return texts, gold
+
+def main(args):
+    rng = random.Random(args.seed)
+    corpus = [make_document(rng, args.pages) for _ in range(args.documents)]
+    engine = get_entity_engine()
+
+    start = time.perf_counter()
+    results = [engine.extract(enumerate(texts, 1)) for texts, _ in corpus]
+    elapsed = time.perf_counter() - start
+    characters = sum(len(text) for texts, _ in corpus for text in texts)
+
+    true_positive, false_positive, false_negative = Counter(), Counter(), Counter()
+    for (_, gold), entities in zip(corpus, results):
+        for field in ENTITY_FIELDS:
+            if field == "acts":
+                continue  # not labelled; acts are reported through statutes
+            found = {value.casefold() for value in entities.values(field)}
+            expected = {value.casefold() for value in gold[field]}
+            true_positive[field] += len(found & expected)
+            false_positive[field] += len(found - expected)
+            false_negative[field] += len(expected - found)
+
+    print(f"{'field':<16} {'precision':>9} {'recall':>7}")
+    for field in ENTITY_FIELDS:
+        if field == "acts":
+            continue
+        tp, fp, fn = true_positive[field], false_positive[field], false_negative[field]
+        print(f"{field:<16} {tp / max(tp + fp, 1):>9.1%} {tp / max(tp + fn, 1):>7.1%}")
+    tp, fp, fn = sum(true_positive.values()), sum(false_positive.values()), sum(false_negative.values())
+    print(f"{'overall':<16} {tp / max(tp + fp, 1):>9.1%} {tp / max(tp + fn, 1):>7.1%}")
+
+    needs_llm = sum(
+        1 for entities in results
+        if any(entities.confidence(field) < settings.entity_llm_threshold for field in settings.entity_llm_fields)
+    )
+    print(f"\n{len(corpus)} documents, {len(corpus) * args.pages} pages, {characters / 1e6:.1f} MB in {elapsed:.2f}s: "
+          f"{len(corpus) / elapsed:,.0f} docs/s, {len(corpus) * args.pages / elapsed:,.0f} pages/s, {characters / 1e6 / elapsed:.1f} MB/s")
+    print(f"documents that would ask the LLM for a low-confidence field: {needs_llm}/{len(corpus)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=500)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,76 @@
+"""
+Evaluation and throughput harness for the n-gram language classifier.
+
+Runs k-fold cross-validation over the training corpus (accuracy per
+language, the most common confusions, and accuracy at the confidence the
+detector requires before skipping OpenAI), then times model loading and
+classification with the shipped model file.
+
+    python benchmarks/bench_language_classifier.py --folds 5 --repeat 20
+"""
+import argparse
+import random
+import time
+from collections import Counter, defaultdict
+
+from app.services.ai.language_detector import LanguageDetector
+from app.services.ai.ngram_classifier import DEFAULT_MODEL_PATH, NgramLanguageClassifier, load_corpus
+
+def cross_validate(samples, folds, threshold):
+    random.shuffle(samples)
+    correct = defaultdict(int)
+    total = Counter()
+    confusions = Counter()
+    confident = confident_correct = 0
+
+    for fold in range(folds):
+        train = [sample for i, sample in enumerate(samples) if i % folds != fold]
+        test = [sample for i, sample in enumerate(samples) if i % folds == fold]
+        model = NgramLanguageClassifier.train(train)
+
+        for text, label in test:
+            predicted, probability = model.classify(text)
+            total[label] += 1
+            if predicted == label:
+                correct[label] += 1
+            else:
+                confusions[(label, predicted)] += 1
+            if probability >= threshold:
+                confident += 1
+                confident_correct += predicted == label
+
+    print(f"{folds}-fold cross-validation over {len(samples)} messages")
+    for label in sorted(total):
+        print(f"  {label:<8} {correct[label] / total[label]:6.1%}  ({total[label]} messages)")
+    print(f"  overall  {sum(correct.values()) / len(samples):6.1%}")
+    print(f"  at p >= {threshold}: {confident / len(samples):.1%} of messages, {confident_correct / max(confident, 1):.1%} correct")
+    for (label, predicted), count in confusions.most_common(5):
+        print(f"  {label} -> {predicted}: {count}")
+
+def throughput(samples, model_path, repeat):
+    start = time.perf_counter()
+    model = NgramLanguageClassifier.load(model_path)
+    load_ms = (time.perf_counter() - start) * 1000
+    print(f"Loaded {model_path} in {load_ms:.1f} ms")
+
+    texts = [text for text, _ in samples] * repeat
+    start = time.perf_counter()
+    for text in texts:
+        model.classify(text)
+    elapsed = time.perf_counter() - start
+    print(f"Classified {len(texts)} messages: {elapsed / len(texts) * 1e6:.1f} us/message")
+
+def main(args):
+    random.seed(args.seed)
+    samples = load_corpus(args.corpus) if args.corpus else load_corpus()
+    cross_validate(list(samples), args.folds, LanguageDetector.CLASSIFIER_THRESHOLD)
+    throughput(samples, args.model, args.repeat)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=None, help="directory of <label>.txt files (default: bundled corpus)")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,72 @@
+"""
+Fan-out benchmark for the LLM gateway.
+
+Fires --requests chat completions at once, drawn from --distinct prompts,
+against the fake backend with --latency seconds per call, first straight to
+the backend and then through LLMGateway. Reports provider calls, wall time,
+peak calls in flight, and the gateway's per-feature accounting.
+
+    python benchmarks/bench_llm_gateway.py --requests 2000 --distinct 300 --latency 0.05
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from app.services.ai.llm_client import FakeLLMBackend, LLMGateway
+
+class CountingBackend(FakeLLMBackend):
+    """Fake backend that tracks the most calls it ever had in flight"""
+
+    def __init__(self, latency):
+        super().__init__(latency)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def complete(self, model, messages, params):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            return await super().complete(model, messages, params)
+        finally:
+            self.in_flight -= 1
+
+def make_requests(args):
+    rng = random.Random(args.seed)
+    features = ["summarizer", "entity_extractor", "translator", "language_detector"]
+    prompts = [(rng.choice(features), f"document {i}: " + "lorem ipsum " * 50) for i in range(args.distinct)]
+    # Popular prompts repeat, as when one filing is uploaded by several parties
+    weights = [1 / (rank + 1) for rank in range(len(prompts))]
+    return rng.choices(prompts, weights, k=args.requests)
+
+async def run(label, requests, backend, call):
+    start = time.perf_counter()
+    await asyncio.gather(*(call(feature, prompt) for feature, prompt in requests))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {len(requests)} requests, {backend.calls} provider calls, "
+          f"peak {backend.peak} in flight, {elapsed:.2f}s")
+
+async def main(args):
+    requests = make_requests(args)
+    messages = lambda prompt: [{"role": "user", "content": prompt}]
+
+    direct = CountingBackend(args.latency)
+    await run("direct", requests, direct, lambda feature, prompt: direct.complete("fake", messages(prompt), {"max_tokens": 64}))
+
+    backend = CountingBackend(args.latency)
+    gateway = LLMGateway(
+        backend, "fake", max_concurrency=args.concurrency,
+        feature_concurrency={"summarizer": args.concurrency // 2, "entity_extractor": args.concurrency // 2}
+    )
+    await run("gateway", requests, backend, lambda feature, prompt: gateway.complete(messages(prompt), feature, max_tokens=64))
+    print(json.dumps(gateway.stats(), indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=300, help="distinct prompts among the requests")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per provider call")
+    parser.add_argument("--concurrency", type=int, default=16, help="gateway global concurrency limit")
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,85 @@
+"""
+Tail-latency benchmark for LLM calls through the gateway.
+
+Runs --requests distinct completions in waves of --concurrency against a
+fake provider where --hiccup-rate of calls stall for --hiccup seconds, once
+without and once with hedging, and reports client-side p50/p95/p99 and the
+extra provider calls hedging cost. Then simulates an outage to show the
+circuit breaker refusing calls instead of waiting out every deadline.
+
+    python benchmarks/bench_llm_tail_latency.py --requests 2000 --hiccup-rate 0.02 --hiccup 1.0
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from app.services.ai.llm_client import CircuitBreaker, FakeLLMBackend, LLMGateway, LLMResponse, LLMUnavailableError, percentile
+
+class HiccupBackend(FakeLLMBackend):
+    """Fake provider with occasional stalls, or failing every call during an outage"""
+
+    def __init__(self, rng, latency, hiccup_rate, hiccup):
+        super().__init__(latency)
+        self.rng = rng
+        self.hiccup_rate = hiccup_rate
+        self.hiccup = hiccup
+        self.outage = False
+
+    async def complete(self, model, messages, params):
+        self.calls += 1
+        if self.outage:
+            await asyncio.sleep(self.hiccup)
+            raise RuntimeError("provider unavailable")
+        stalled = self.rng.random() < self.hiccup_rate
+        await asyncio.sleep(self.hiccup if stalled else self.latency)
+        return LLMResponse("ok", model, 10, 1)
+
+async def run(gateway, requests, concurrency, offset=0):
+    latencies = []
+    failures = 0
+
+    async def one(i):
+        nonlocal failures
+        start = time.perf_counter()
+        try:
+            await gateway.complete([{"role": "user", "content": f"message {offset + i}"}], "language_detector")
+        except LLMUnavailableError:
+            failures += 1
+        latencies.append(time.perf_counter() - start)
+
+    for wave in range(0, requests, concurrency):
+        await asyncio.gather(*(one(i) for i in range(wave, min(wave + concurrency, requests))))
+    return latencies, failures
+
+def report(label, latencies, failures, backend):
+    p50, p95, p99 = (percentile(latencies, pct) * 1000 for pct in (0.50, 0.95, 0.99))
+    print(f"{label:<12} p50 {p50:7.1f} ms  p95 {p95:7.1f} ms  p99 {p99:7.1f} ms  "
+          f"provider calls {backend.calls}  failed {failures}")
+
+async def main(args):
+    for label, hedge_features in (("no hedging", ()), ("hedging", ("language_detector",))):
+        backend = HiccupBackend(random.Random(args.seed), args.latency, args.hiccup_rate, args.hiccup)
+        gateway = LLMGateway(backend, "fake", max_concurrency=args.concurrency * 2, timeout=args.timeout, hedge_features=hedge_features)
+        report(label, *await run(gateway, args.requests, args.concurrency), backend)
+
+    backend = HiccupBackend(random.Random(args.seed), args.latency, 0, args.hiccup)
+    backend.outage = True
+    for label, breaker in (("outage", CircuitBreaker(min_calls=10**9)), ("outage+CB", CircuitBreaker())):
+        backend.calls = 0
+        gateway = LLMGateway(backend, "fake", max_concurrency=args.concurrency * 2, timeout=args.timeout, breaker=breaker)
+        start = time.perf_counter()
+        latencies, failures = await run(gateway, args.requests // 4, args.concurrency)
+        report(label, latencies, failures, backend)
+        print(f"{'':<12} {time.perf_counter() - start:.1f}s to fail over {args.requests // 4} requests, breaker {breaker.state}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per normal provider call")
+    parser.add_argument("--hiccup-rate", type=float, default=0.02, help="fraction of calls that stall")
+    parser.add_argument("--hiccup", type=float, default=1.0, help="seconds a stalled call takes")
+    parser.add_argument("--timeout", type=float, default=2.0, help="per-call deadline")
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,106 @@
+"""
+Micro-benchmark for storing one incoming WhatsApp message.
+
+Compares the original ORM flow (user lookup/insert, conversation lookup/insert,
+message insert and status update, with up to four commits) against the
+single-statement upsert in message_handler.upsert_incoming_message. Runs
+against the configured PostgreSQL database and prints per-message latency
+and the number of statements sent to the server.
+
+    python benchmarks/bench_message_upsert.py --messages 500 --phones 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from sqlalchemy import event, select
+
+from app.core.database import AsyncSessionLocal, async_engine
+from app.models import Conversation, ConversationStatus, Message, User
+from app.schemas.whatsapp import WebhookPayload
+from app.services.whatsapp.message_handler import upsert_incoming_message
+
+statement_count = 0
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    global statement_count
+    statement_count += 1
+
+async def legacy_persist(payload: WebhookPayload, db):
+    """The pre-upsert flow, one statement and commit per step"""
+    user = (await db.execute(select(User).where(User.phone == payload.phone))).scalars().first()
+    if not user:
+        user = User(
+            phone=payload.phone,
+            full_name=f"WhatsApp User {payload.phone}",
+            email=f"whatsapp_{payload.phone}@temp.local"
+        )
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+
+    conversation = (await db.execute(select(Conversation).where(
+        Conversation.phone_number == payload.phone,
+        Conversation.status.in_([ConversationStatus.NEW, ConversationStatus.IN_PROGRESS])
+    ))).scalars().first()
+    if not conversation:
+        conversation = Conversation(
+            client_id=user.id,
+            phone_number=payload.phone,
+            status=ConversationStatus.NEW,
+            language="en"
+        )
+        db.add(conversation)
+        await db.commit()
+        await db.refresh(conversation)
+
+    db.add(Message(
+        conversation_id=conversation.id,
+        message_type=payload.message_type,
+        content=payload.text,
+        whatsapp_message_id=payload.whatsapp_message_id,
+        is_from_user=True
+    ))
+    await db.commit()
+
+    conversation.status = ConversationStatus.IN_PROGRESS
+    await db.commit()
+
+async def run(name, persist, args):
+    global statement_count
+    latencies = []
+    statement_count = 0
+    run_id = uuid.uuid4().hex[:8]
+
+    for i in range(args.messages):
+        payload = WebhookPayload(
+            phone=f"bench{run_id}{i % args.phones:05d}",
+            text="Mujhe property dispute mein help chahiye",
+            whatsapp_message_id=f"wamid.bench.{run_id}.{i}"
+        )
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            await persist(payload, db)
+            latencies.append(time.perf_counter() - started)
+
+    latencies.sort()
+    print(
+        f"{name:<7} mean={statistics.mean(latencies) * 1000:.2f}ms "
+        f"p50={latencies[len(latencies) // 2] * 1000:.2f}ms "
+        f"p95={latencies[int(len(latencies) * 0.95)] * 1000:.2f}ms "
+        f"statements/message={statement_count / args.messages:.2f}"
+    )
+
+async def main(args):
+    await run("legacy", legacy_persist, args)
+    await run("upsert", upsert_incoming_message, args)
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--phones", type=int, default=50, help="distinct senders; lower means more existing rows")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,99 @@
+"""
+Scale benchmark for near-duplicate document detection.
+
+Builds an LshIndex over --documents synthetic judgments, then queries it
+with OCR-style noisy copies of indexed documents (which should match) and
+with unseen documents (which should not). Reports signature and indexing
+throughput, LSH query latency against a brute-force scan of every
+signature, and precision/recall at the reuse threshold.
+
+    python benchmarks/bench_near_duplicates.py --documents 100000 --queries 1000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.config import settings
+from app.services.document.near_duplicates import LshIndex, minhash_text
+
+def make_vocabulary(rng, size):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(size)]
+
+def make_document(rng, vocabulary, weights, words):
+    return " ".join(rng.choices(vocabulary, weights, k=words))
+
+def ocr_noise(rng, text, rate):
+    """Re-scan style noise: a fraction of words lose or swap a character"""
+    words = text.split()
+    for i in rng.sample(range(len(words)), int(len(words) * rate)):
+        word = words[i]
+        position = rng.randrange(len(word))
+        words[i] = word[:position] + rng.choice("0o1lI5s") + word[position + 1:]
+    return " ".join(words)
+
+def timed(label, count, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {count} in {elapsed:.2f}s ({count / elapsed:,.0f}/s)")
+    return result
+
+def main(args):
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(rng, args.vocabulary)
+    # Zipf-like word frequencies, as in real text
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    threshold = settings.near_duplicate_threshold
+
+    documents = [make_document(rng, vocabulary, weights, args.words) for _ in range(args.documents)]
+    signatures = timed("signatures", len(documents), lambda: [minhash_text([text]) for text in documents])
+
+    index = LshIndex()
+    def build():
+        for doc_id, signature in enumerate(signatures):
+            index.add(doc_id, signature)
+    timed("index inserts", len(signatures), build)
+    matrix = np.vstack(signatures)
+
+    originals = rng.sample(range(args.documents), args.queries)
+    near_copies = [minhash_text([ocr_noise(rng, documents[i], args.noise)]) for i in originals]
+    unseen = [minhash_text([make_document(rng, vocabulary, weights, args.words)]) for _ in range(args.queries)]
+    queries = near_copies + unseen
+
+    lsh_results = timed("LSH queries", len(queries), lambda: [index.query(q, threshold) for q in queries])
+    brute_results = timed(
+        "brute-force queries", len(queries),
+        lambda: [np.count_nonzero(matrix == q, axis=1) / matrix.shape[1] for q in queries]
+    )
+
+    # Ground truth is the brute-force estimate: LSH should find whatever it finds
+    true_positive = false_positive = false_negative = 0
+    for i, (found, scores) in enumerate(zip(lsh_results, brute_results)):
+        expected = set(np.nonzero(scores >= threshold)[0].tolist())
+        found = {doc_id for doc_id, _ in found}
+        true_positive += len(found & expected)
+        false_positive += len(found - expected)
+        false_negative += len(expected - found)
+
+    matched_copies = sum(1 for i, found in enumerate(lsh_results[:args.queries]) if originals[i] in {d for d, _ in found})
+    matched_unseen = sum(1 for found in lsh_results[args.queries:] if found)
+    candidates = np.mean([len(index.candidates(q)) for q in queries[:200]])
+
+    print(f"threshold {threshold}: LSH recall vs brute force {true_positive / max(true_positive + false_negative, 1):.1%}, "
+          f"precision {true_positive / max(true_positive + false_positive, 1):.1%}")
+    print(f"noisy copies ({args.noise:.1%} of words corrupted) matched: {matched_copies}/{args.queries}; "
+          f"unseen documents matched: {matched_unseen}/{args.queries}")
+    print(f"mean candidates checked per query: {candidates:.1f} of {len(index)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--words", type=int, default=300, help="words per document")
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--noise", type=float, default=0.005, help="fraction of words corrupted in copies")
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,108 @@
+"""
+Throughput benchmark for the local OCR engine.
+
+OCRs a set of scans twice: one page at a time in this process without
+tiling, then through ocr_image (pages and tiles fanned out to the document
+process pool). Prints pages/second and mean confidence for both. Without
+--images it generates phone-photo-like FIR pages: skewed, unevenly lit and
+noisy. Needs the tesseract binary with the eng and hin language packs;
+--preprocess-only times deskew/binarize/tiling alone.
+
+    python benchmarks/bench_ocr.py --pages 12
+    python benchmarks/bench_ocr.py --images scans/*.jpg
+    python benchmarks/bench_ocr.py --pages 24 --preprocess-only
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from app.config import settings
+from app.services.document.ocr import ocr_image, prepare_page, recognize_tile
+from app.services.document.pool import shutdown_process_pool
+
+LINES = [
+    "FIRST INFORMATION REPORT (Under Section 154 Cr.P.C.)",
+    "District: South Delhi   P.S.: Saket   Year: 2024   FIR No.: 0456",
+    "Acts & Sections: IPC 1860 Sections 420, 406, 120B",
+    "Occurrence of offence: 14/03/2024 between 18:00 and 20:30 hrs",
+    "Complainant: Ramesh Kumar s/o Shri Mohan Lal, r/o Malviya Nagar",
+    "Details of known accused: Suresh Gupta and two unknown persons",
+    "The complainant states that he paid Rs. 4,50,000 for a flat which",
+    "was never handed over and the accused stopped answering his calls.",
+]
+
+def make_scan(path: str, rng: random.Random):
+    width, height = 2480, 3508  # A4 at 300 dpi
+    page = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default(size=42)
+    for row in range(60):
+        draw.text((150, 150 + row * 55), LINES[row % len(LINES)], fill=0, font=font)
+    page = page.rotate(rng.uniform(-3, 3), resample=Image.BILINEAR, expand=True, fillcolor=255)
+
+    # Uneven lighting and sensor noise, as in a phone photo
+    pixels = np.asarray(page, dtype=np.float32)
+    shade = np.linspace(0.75, 1.0, pixels.shape[1], dtype=np.float32)
+    noise = np.random.default_rng(rng.randrange(1 << 30)).normal(0, 12, pixels.shape)
+    pixels = np.clip(pixels * shade + noise, 0, 255).astype(np.uint8)
+    Image.fromarray(pixels).save(path, quality=85)
+
+def sequential(paths):
+    """Baseline: every page whole, in this process"""
+    texts = []
+    confidences = []
+    for path in paths:
+        (tile,) = prepare_page(path, 0, settings.ocr_max_side, 10 ** 9)
+        text, confidence, _ = recognize_tile(tile, settings.ocr_languages, settings.tesseract_cmd or None)
+        texts.append(text)
+        confidences.append(confidence)
+    return texts, confidences
+
+async def pooled(paths):
+    results = await asyncio.gather(*(ocr_image(path) for path in paths))
+    return [result.text for result in results], [result.confidence for result in results]
+
+def report(label, elapsed, pages, confidences=None):
+    line = f"{label:<12} {pages} pages in {elapsed:.2f}s ({pages / elapsed:.2f} pages/s)"
+    if confidences:
+        line += f", mean confidence {sum(confidences) / len(confidences):.1f}"
+    print(line)
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.images
+        if not paths:
+            rng = random.Random(args.seed)
+            paths = [os.path.join(tmp, f"fir-{i}.jpg") for i in range(args.pages)]
+            for path in paths:
+                make_scan(path, rng)
+
+        if args.preprocess_only:
+            start = time.perf_counter()
+            tiles = sum(len(prepare_page(path, 0, settings.ocr_max_side, settings.ocr_tile_height)) for path in paths)
+            report("preprocess", time.perf_counter() - start, len(paths))
+            print(f"{tiles} tiles of up to {settings.ocr_tile_height} rows")
+            return
+
+        start = time.perf_counter()
+        _, confidences = sequential(paths)
+        report("sequential", time.perf_counter() - start, len(paths), confidences)
+
+        start = time.perf_counter()
+        _, confidences = asyncio.run(pooled(paths))
+        report("pooled", time.perf_counter() - start, len(paths), confidences)
+        shutdown_process_pool()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", nargs="*", default=None, help="scans to OCR (default: generated FIR pages)")
+    parser.add_argument("--pages", type=int, default=12, help="generated pages when --images is not given")
+    parser.add_argument("--preprocess-only", action="store_true", help="skip Tesseract")
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
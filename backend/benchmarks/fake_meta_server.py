@@ -0,0 +1,102 @@
+"""
+Local stand-in for the WhatsApp Cloud API messages endpoint.
+
+Accepts POST /<version>/<phone_number_id>/messages like Meta does, with a
+per-number throughput limit answered by 429 (error code 130429), optional
+random 5xx failures and artificial latency. It records the order messages
+arrive in per recipient, so a client can be checked for reordering. Run it
+standalone and point META_API_BASE_URL at it:
+
+    python benchmarks/fake_meta_server.py --port 8090 --rate 80 --error-rate 0.01
+    META_API_BASE_URL=http://localhost:8090/v18.0 uvicorn app.main:app
+
+or mount create_app() in-process with httpx.ASGITransport, as
+bench_whatsapp_sender.py does.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import defaultdict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+class FakeMetaState:
+    def __init__(self, rate: float, latency: float, error_rate: float, seed: int):
+        self.rate = rate
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.accepted = 0
+        self.throttled = 0
+        self.errors = 0
+        self.received = defaultdict(list)
+
+    def take_token(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+def create_app(rate: float = 80, latency: float = 0.0, error_rate: float = 0.0, seed: int = 7) -> FastAPI:
+    app = FastAPI(title="Fake Meta Graph API")
+    state = app.state.fake_meta = FakeMetaState(rate, latency, error_rate, seed)
+
+    @app.post("/{version}/{phone_number_id}/messages")
+    async def send(version: str, phone_number_id: str, request: Request):
+        body = await request.json()
+        if state.latency:
+            await asyncio.sleep(state.latency)
+
+        if not state.take_token():
+            state.throttled += 1
+            return JSONResponse(
+                {"error": {"message": "(#130429) Rate limit hit", "type": "OAuthException", "code": 130429}},
+                status_code=429,
+                headers={"Retry-After": "1"},
+            )
+        if state.error_rate and state.rng.random() < state.error_rate:
+            state.errors += 1
+            return JSONResponse({"error": {"message": "Service temporarily unavailable", "code": 2}}, status_code=503)
+        if body.get("messaging_product") != "whatsapp" or "to" not in body:
+            return JSONResponse({"error": {"message": "Invalid parameter", "code": 100}}, status_code=400)
+
+        state.accepted += 1
+        state.received[body["to"]].append(body.get("text", {}).get("body"))
+        return {
+            "messaging_product": "whatsapp",
+            "contacts": [{"input": body["to"], "wa_id": body["to"]}],
+            "messages": [{"id": f"wamid.{uuid.uuid4().hex}"}],
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return {
+            "accepted": state.accepted,
+            "throttled": state.throttled,
+            "errors": state.errors,
+            "recipients": len(state.received),
+        }
+
+    return app
+
+app = create_app()
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--rate", type=float, default=80, help="messages per second before 429")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.rate, args.latency, args.error_rate), port=args.port)
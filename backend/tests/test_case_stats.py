@@ -0,0 +1,98 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.models import Base, Case, CaseDailyStats, CasePriority, CaseStatus
+from app.services.case_stats import (
+    case_stats_key,
+    compute_case_stats,
+    compute_case_stats_from_rollup,
+    rebuild_case_daily_stats,
+    record_case_change,
+)
+
+NOW = datetime(2024, 3, 31, 12, 0, tzinfo=timezone.utc)
+START = datetime(2024, 3, 1, tzinfo=timezone.utc)  # whole UTC day, as the rollup rounds to
+
+def make_cases():
+    cases = []
+    statuses = list(CaseStatus)
+    priorities = list(CasePriority)
+    for i in range(60):
+        created_at = NOW - timedelta(days=i, hours=i % 7)
+        status = statuses[i % len(statuses)]
+        closed_at = None
+        # Some closed cases have no closing time; neither path may count
+        # them as resolved
+        if status == CaseStatus.CLOSED and i % 3:
+            closed_at = created_at + timedelta(days=i % 5, hours=i % 11)
+        cases.append(Case(
+            case_number=f"CASE-{i}",
+            client_id=1,
+            title=f"Case {i}",
+            case_type=("civil", "criminal", "family")[i % 3],
+            status=status,
+            priority=priorities[i % len(priorities)],
+            created_at=created_at,
+            closed_at=closed_at,
+        ))
+    return cases
+
+async def with_session(work):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all, tables=[Case.__table__, CaseDailyStats.__table__])
+    try:
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            return await work(db)
+    finally:
+        await engine.dispose()
+
+def test_rollup_rebuild_matches_live_stats():
+    async def work(db):
+        db.add_all(make_cases())
+        await db.commit()
+        await rebuild_case_daily_stats(db)
+        return await compute_case_stats(db, START), await compute_case_stats_from_rollup(db, START)
+
+    live, rollup = asyncio.run(with_session(work))
+    assert live.total_cases > 0 and live.average_resolution_time is not None
+    assert rollup == live
+
+def test_incremental_rollup_matches_live_stats(monkeypatch):
+    monkeypatch.setattr(settings, "case_stats_rollup", True)
+
+    async def work(db):
+        cases = make_cases()
+        db.add_all(cases)
+        for case in cases:
+            await record_case_change(db, None, case_stats_key(case))
+        await db.commit()
+
+        # Close some open cases the way the update endpoint does
+        for case in cases[:20]:
+            if case.status in (CaseStatus.NEW, CaseStatus.IN_PROGRESS):
+                before = case_stats_key(case)
+                case.status = CaseStatus.CLOSED
+                case.closed_at = case.created_at + timedelta(days=2)
+                await record_case_change(db, before, case_stats_key(case))
+        await db.commit()
+        return await compute_case_stats(db, START), await compute_case_stats_from_rollup(db, START)
+
+    live, rollup = asyncio.run(with_session(work))
+    assert rollup == live
+
+@pytest.mark.parametrize("closed_after", [timedelta(hours=23), timedelta(days=1), timedelta(days=3, hours=5)])
+def test_resolution_days_match_timedelta_days(closed_after):
+    async def work(db):
+        case = make_cases()[0]
+        case.status = CaseStatus.CLOSED
+        case.closed_at = case.created_at + closed_after
+        db.add(case)
+        await db.commit()
+        return await compute_case_stats(db, START)
+
+    assert asyncio.run(with_session(work)).average_resolution_time == closed_after.days
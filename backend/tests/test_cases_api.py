@@ -0,0 +1,27 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import cases
+from app.core.database import get_async_db
+
+async def no_db():
+    # Every request here is rejected before the handler touches the session
+    yield None
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(cases.router, prefix="/api/v1/cases")
+    app.dependency_overrides[get_async_db] = no_db
+    return TestClient(app)
+
+@pytest.mark.parametrize("count", ["bogus", "EXACT", "exact; drop table cases", ""])
+def test_invalid_count_is_rejected(client, count):
+    assert client.get("/api/v1/cases/", params={"count": count}).status_code == 422
+
+@pytest.mark.parametrize("count", ["none", "estimate", "exact"])
+def test_valid_count_passes_validation(client, count):
+    # An invalid cursor is the next check, so reaching it means count was accepted
+    response = client.get("/api/v1/cases/", params={"count": count, "cursor": "not-a-cursor"})
+    assert response.status_code == 400
@@ -0,0 +1,45 @@
+import asyncio
+
+from app.services.ai.language_detector import DetectedLanguage
+from app.services.whatsapp.conversation_manager import ConversationManager, ConversationState
+from app.services.whatsapp.state_store import InMemoryStateStore
+
+class ScriptedDetector:
+    def __init__(self, results):
+        self.results = dict(results)
+
+    async def detect(self, text):
+        return self.results[text]
+
+def run_conversation(messages, results):
+    store = InMemoryStateStore(ttl_seconds=60, max_entries=10)
+    sent = []
+
+    async def send(phone, text):
+        sent.append(text)
+
+    async def run():
+        for message in messages:
+            manager = ConversationManager("15550001", store=store, send=send, detector=ScriptedDetector(results))
+            await manager.handle_message(message, {})
+        return await store.load("conv:15550001")
+
+    return asyncio.run(run()), sent
+
+def test_unconfident_language_reply_is_not_stored():
+    fields, _ = run_conversation(["hi", "ok", "Rahul"], {
+        "hi": DetectedLanguage("en", False),
+        "ok": DetectedLanguage("en", False),
+        "Rahul": DetectedLanguage("hi-Latn", False),
+    })
+    assert fields["state"] == ConversationState.MATTER_TYPE.value
+    assert "language" not in fields
+
+def test_confident_language_reply_is_stored_and_reused():
+    fields, _ = run_conversation(["hi", "ok", "Mujhe madad chahiye", "rent dispute"], {
+        "hi": DetectedLanguage("en", False),
+        "ok": DetectedLanguage("en", False),
+        "Mujhe madad chahiye": DetectedLanguage("hi-Latn", True),
+    })
+    assert fields["state"] == ConversationState.DESCRIPTION.value
+    assert fields["language"] == "hi-Latn"
@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from app.services.ai import entity_extractor, summarizer
+from app.services.ai.llm_client import FakeLLMBackend, LLMBackend, LLMGateway
+
+TEXT = "The respondent has not returned the security deposit for the flat."
+
+class DownBackend(LLMBackend):
+    async def complete(self, model, messages, params):
+        raise ConnectionError("provider down")
+
+@pytest.fixture
+def use_llm(monkeypatch):
+    def use(backend):
+        gateway = LLMGateway(backend, "test-model")
+        monkeypatch.setattr(entity_extractor, "get_llm_gateway", lambda: gateway)
+        monkeypatch.setattr(summarizer, "get_llm_gateway", lambda: gateway)
+    return use
+
+def test_entities_are_degraded_only_when_the_llm_is_down(use_llm):
+    use_llm(DownBackend())
+    assert asyncio.run(entity_extractor.extract_legal_entities(TEXT)).degraded
+
+    use_llm(FakeLLMBackend(responder=lambda model, messages, params: "{}"))
+    assert not asyncio.run(entity_extractor.extract_legal_entities(TEXT)).degraded
+
+def test_summary_is_degraded_only_when_the_llm_is_down(use_llm):
+    use_llm(DownBackend())
+    assert asyncio.run(summarizer.summarize_document(TEXT)) == (None, True)
+
+    use_llm(FakeLLMBackend(responder=lambda model, messages, params: "A deposit dispute."))
+    assert asyncio.run(summarizer.summarize_document(TEXT)) == ("A deposit dispute.", False)
+
+def test_empty_document_is_not_degraded(use_llm):
+    use_llm(FakeLLMBackend())
+    assert asyncio.run(summarizer.summarize_document("")) == (None, False)
+    assert not asyncio.run(entity_extractor.extract_legal_entities("")).degraded
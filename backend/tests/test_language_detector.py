@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from app.services.ai.language_detector import LanguageDetector
+
+@pytest.fixture
+def detector():
+    detector = LanguageDetector(cache_size=0)
+    detector.llm = None
+    return detector
+
+@pytest.mark.parametrize("text", [
+    "Ramesh Kumar Gupta",
+    "Rahul Sharma",
+    "Mumbai",
+    "New Delhi",
+    "rahul.sharma@gmail.com",
+    "9876543210",
+    "221B, Sector 15",
+])
+def test_names_places_and_numbers_are_not_confident(detector, text):
+    # These are the answers that follow a greeting; a confident result would
+    # fix the conversation's language for good
+    assert not asyncio.run(detector.detect(text)).confident
+
+@pytest.mark.parametrize("text, language", [
+    ("Mera landlord deposit wapas nahi kar raha hai", "hi-Latn"),
+    ("I need help with a dispute with my landlord about the deposit", "en"),
+    ("मुझे अपने मकान मालिक के साथ विवाद में मदद चाहिए", "hi"),
+])
+def test_sentences_are_detected_offline(detector, text, language):
+    assert asyncio.run(detector.detect(text)) == (language, True)
@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from app.services.ai.llm_client import CircuitBreaker, FakeLLMBackend, LLMGateway, LLMUnavailableError
+
+def ask(text):
+    return [{"role": "user", "content": text}]
+
+class TrackingBackend(FakeLLMBackend):
+    """FakeLLMBackend that records the most calls it had running at once"""
+
+    def __init__(self, latency):
+        super().__init__(latency)
+        self.running = 0
+        self.peak = 0
+
+    async def complete(self, model, messages, params):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            return await super().complete(model, messages, params)
+        finally:
+            self.running -= 1
+
+class FlakyBackend(FakeLLMBackend):
+    """FakeLLMBackend that fails every call while `down` is set"""
+
+    def __init__(self):
+        super().__init__()
+        self.down = True
+
+    async def complete(self, model, messages, params):
+        if self.down:
+            self.calls += 1
+            raise ConnectionError("provider down")
+        return await super().complete(model, messages, params)
+
+def test_identical_requests_share_one_call():
+    backend = FakeLLMBackend(latency=0.05)
+    gateway = LLMGateway(backend, "test-model")
+
+    async def run():
+        return await asyncio.gather(*(gateway.complete(ask("same"), "summarizer") for _ in range(5)))
+
+    responses = asyncio.run(run())
+    assert backend.calls == 1
+    assert {response.text for response in responses} == {"same"}
+    assert gateway.stats()["features"]["summarizer"]["coalesced"] == 4
+
+def test_coalesced_caller_survives_leader_cancellation():
+    backend = FakeLLMBackend(latency=0.05)
+    gateway = LLMGateway(backend, "test-model")
+
+    async def run():
+        leader = asyncio.ensure_future(gateway.complete(ask("same"), "summarizer"))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(gateway.complete(ask("same"), "summarizer"))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()).text == "same"
+    assert backend.calls == 2
+
+def test_cache_entries_expire_after_ttl():
+    backend = FakeLLMBackend()
+    gateway = LLMGateway(backend, "test-model", cache_ttl=0.05)
+
+    async def run():
+        await gateway.complete(ask("a"), "summarizer")
+        cached = await gateway.complete(ask("a"), "summarizer")
+        await asyncio.sleep(0.06)
+        expired = await gateway.complete(ask("a"), "summarizer")
+        return cached, expired
+
+    cached, expired = asyncio.run(run())
+    assert cached.cached and not expired.cached
+    assert backend.calls == 2
+
+def test_cache_evicts_least_recently_used():
+    backend = FakeLLMBackend()
+    gateway = LLMGateway(backend, "test-model", cache_size=2)
+
+    async def run():
+        for text in ["a", "b", "a", "c"]:
+            await gateway.complete(ask(text), "summarizer")
+        calls = backend.calls
+        assert (await gateway.complete(ask("a"), "summarizer")).cached
+        assert not (await gateway.complete(ask("b"), "summarizer")).cached
+        return calls
+
+    assert asyncio.run(run()) == 3
+    assert backend.calls == 4
+
+def test_feature_concurrency_limits_only_that_feature():
+    backend = TrackingBackend(latency=0.02)
+    gateway = LLMGateway(backend, "test-model", feature_concurrency={"summarizer": 2})
+
+    async def run(feature):
+        backend.peak = 0
+        await asyncio.gather(*(gateway.complete(ask(f"{feature} {n}"), feature) for n in range(8)))
+        return backend.peak
+
+    assert asyncio.run(run("summarizer")) == 2
+    assert asyncio.run(run("entity_extractor")) == 8
+
+def test_breaker_opens_then_probes_half_open_before_closing():
+    backend = FlakyBackend()
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=2, cooldown=0.05)
+    gateway = LLMGateway(backend, "test-model", breaker=breaker)
+
+    async def call(text):
+        return await gateway.complete(ask(text), "summarizer", use_cache=False)
+
+    async def run():
+        for n in range(2):
+            with pytest.raises(LLMUnavailableError):
+                await call(f"fail {n}")
+        assert breaker.state == CircuitBreaker.OPEN
+
+        # Open: refused without reaching the provider
+        with pytest.raises(LLMUnavailableError, match="breaker is open"):
+            await call("refused")
+        assert backend.calls == 2
+
+        # Half-open: a failed probe opens the breaker again
+        await asyncio.sleep(0.06)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        with pytest.raises(LLMUnavailableError):
+            await call("failed probe")
+        assert breaker.state == CircuitBreaker.OPEN
+
+        # Half-open again: a successful probe closes it
+        await asyncio.sleep(0.06)
+        backend.down = False
+        assert (await call("probe")).text == "probe"
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert (await call("after")).text == "after"
+
+    asyncio.run(run())
+    assert breaker.opened == 2
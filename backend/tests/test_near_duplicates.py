@@ -0,0 +1,34 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models import Base, Document, DocumentLshBucket
+from app.services.document.near_duplicates import find_near_duplicate, index_document, minhash_text
+
+TEXT = " ".join(f"clause {n} the tenant shall pay rent of {n * 100} rupees" for n in range(200))
+
+def find_after_indexing(indexed, page_range):
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all, tables=[Document.__table__, DocumentLshBucket.__table__])
+        try:
+            async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+                signature = minhash_text([TEXT]).tobytes()
+                for document_id, stored_range in indexed:
+                    db.add(Document(id=document_id, case_id=1, name="lease.pdf", file_path="lease.pdf", content_hash=f"{document_id:064d}"))
+                    await db.flush()
+                    await index_document(db, document_id, signature, stored_range)
+                await db.commit()
+                match = await find_near_duplicate(db, signature, 0.9, exclude_id=0, page_range=page_range)
+                return match[0].id if match else None
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run())
+
+def test_matches_only_documents_with_the_same_page_range():
+    indexed = [(1, None), (2, "1-50"), (3, "51-100")]
+    assert find_after_indexing(indexed, None) == 1
+    assert find_after_indexing(indexed, "1-50") == 2
+    assert find_after_indexing(indexed, "1-10") is None
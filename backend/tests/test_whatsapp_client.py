@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.services.whatsapp.client import WhatsAppClient, WhatsAppSendError
+from benchmarks.fake_meta_server import create_app
+
+def make_client(transport, **kwargs):
+    kwargs.setdefault("backoff_base", 0.001)
+    return WhatsAppClient("token", "1234", base_url="http://meta.test/v18.0", transport=transport, **kwargs)
+
+def fake_meta(**kwargs):
+    app = create_app(**kwargs)
+    return app.state.fake_meta, httpx.ASGITransport(app=app)
+
+def test_throttled_sends_wait_for_retry_after():
+    # The fake answers 429 with Retry-After: 1 once its burst of 2 is used up
+    state, transport = fake_meta(rate=2)
+    client = make_client(transport)
+
+    async def run():
+        started = time.monotonic()
+        try:
+            await client.send_texts("15550001", ["one", "two", "three"])
+        finally:
+            await client.close()
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(run())
+    assert state.throttled >= 1
+    assert client.retries == state.throttled
+    assert elapsed >= 1.0
+    assert state.received["15550001"] == ["one", "two", "three"]
+
+def test_each_recipient_receives_messages_in_call_order():
+    # Random 503s force retries, which must not let a later message overtake
+    state, transport = fake_meta(rate=10000, error_rate=0.3, latency=0.001)
+    client = make_client(transport, max_retries=20)
+    phones = [f"1555000{i}" for i in range(5)]
+
+    async def run():
+        try:
+            await asyncio.gather(*(
+                client.send_text(phone, f"{phone}-{n}") for n in range(10) for phone in phones
+            ))
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+    assert state.errors > 0
+    for phone in phones:
+        assert state.received[phone] == [f"{phone}-{n}" for n in range(10)]
+
+@pytest.mark.parametrize("error, attempts", [
+    (httpx.ConnectError("refused"), 3),
+    (httpx.ReadTimeout("no response"), 1),
+])
+def test_only_errors_before_sending_are_retried(error, attempts):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise error
+
+    client = make_client(httpx.MockTransport(handler), max_retries=2)
+
+    async def run():
+        try:
+            await client.send_text("15550001", "hello")
+        finally:
+            await client.close()
+
+    with pytest.raises(WhatsAppSendError):
+        asyncio.run(run())
+    assert len(calls) == attempts
+
+def test_invalid_json_body_raises_send_error():
+    client = make_client(httpx.MockTransport(lambda request: httpx.Response(200, text="<html>proxy</html>")))
+
+    async def run():
+        try:
+            await client.send_text("15550001", "hello")
+        finally:
+            await client.close()
+
+    with pytest.raises(WhatsAppSendError) as raised:
+        asyncio.run(run())
+    assert raised.value.status_code == 200